@@ -4,13 +4,36 @@
 Using rules from here: http://www.pagat.com/tile/wdom/chickenfoot.html
 '''
 
+import array
+import bisect
+import collections
+import csv
+import functools
+import gzip
+import http.server
+import importlib
 import itertools
+import json
 import logging
+import multiprocessing
+import multiprocessing.shared_memory
+import mmap
 import operator
 import optparse
+import os
+import pickle
+import platform
 import pprint
+import queue
 import random
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
 import time
+import zlib
 
 # In this particular version of the game, the double blank is worth 50 points.
 # I was introduced to the game with this rule included.
@@ -25,12 +48,109 @@ def factorial_combinations(max):
 		for a in range(b+1):
 			yield (a, b)
 
+def tile_index(a, b):
+	'''
+	Return the position of the tile (a, b) in the order produced by factorial_combinations.
+
+	The order of the ends doesn't matter.  Indices are dense, so a set of tiles can be
+	described by a bitmask in which bit N is set when the tile at index N is present.
+	'''
+	if a > b:
+		a, b = b, a
+	return b * (b + 1) // 2 + a
+
+def tile_catalogue(set_size):
+	'''
+	Return the ends (a, b) of every tile in a "double-set_size" set, ordered by tile_index.
+	'''
+	return list(factorial_combinations(set_size))
+
+# Tiles never change, so each size of set is made once, and shared; see tile_set
+_tile_sets = {}
+
+def tile_set(set_size):
+	'''
+	Return a tuple of the Tiles of a "double-set_size" set, ordered by tile_index.
+
+	The same Tiles are returned every time, to be shared by every Boneyard of the size.
+	'''
+	try:
+		return _tile_sets[set_size]
+	except KeyError:
+		# threads racing to make the first set all end up with the one that got in first
+		return _tile_sets.setdefault(set_size, tuple(Tile(a, b) for a, b in tile_catalogue(set_size)))
+
+def bits(mask):
+	'''
+	Generate the index of every set bit in the integer 'mask', lowest first.
+	'''
+	while mask:
+		low = mask & -mask
+		yield low.bit_length() - 1
+		mask ^= low
+
+MASK64 = (1 << 64) - 1
+
+def mix64(value):
+	'Scramble the bits of a 64-bit integer (the SplitMix64 finalizer)'
+	value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+	value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+	return value ^ (value >> 31)
+
+class CounterRandom(random.Random):
+	'''
+	A random.Random whose n-th number is a function of its key and n alone (SplitMix64).
+
+	There's no hidden state to carry from one number to the next, so a stream can be
+	started from its key at no cost; see round_random.
+	'''
+	def seed(self, key=None):
+		self.key = (key or 0) & MASK64
+		self.counter = 0
+
+	def _next(self):
+		'Return the next 64 random bits'
+		self.counter += 1
+		return mix64((self.key + self.counter * 0x9E3779B97F4A7C15) & MASK64)
+
+	def random(self):
+		return (self._next() >> 11) * (1.0 / (1 << 53))
+
+	def getrandbits(self, k):
+		value, bits = 0, 0
+		while bits < k:
+			value = (value << 64) | self._next()
+			bits += 64
+		return value >> (bits - k)
+
+	def getstate(self):
+		return (self.key, self.counter)
+
+	def setstate(self, state):
+		self.key, self.counter = state
+
+def round_random(seed, round_number, purpose):
+	'''
+	Return the CounterRandom for one 'purpose' (a string, e.g. "boneyard") in a round of a seeded run.
+
+	Every round, and every purpose within it, gets its own stream, so any round can
+	be replayed without playing the ones before it, and the draws from the boneyard
+	don't depend on how many random choices the players made.
+	'''
+	key = mix64(seed & MASK64)
+	key = mix64((key + round_number) & MASK64)
+	return CounterRandom(mix64((key + (zlib.crc32(purpose.encode('utf-8')) & 0xFFFFFFFF)) & MASK64))
+
 # todo: subclass list
 class Boneyard(object):
 	'The tiles from which players draw when they can\'t make a play'
-	def __init__(self, set_size):
-		'* set_size - domino sets are described in "double-X" sets, in which X is an integer.'
-		self.tiles = [Tile(a, b) for a, b in factorial_combinations(set_size)]
+	def __init__(self, set_size, rng=random):
+		'''
+		* set_size - domino sets are described in "double-X" sets, in which X is an integer.
+		* rng - source of random numbers for draws: the random module, or a random.Random
+		'''
+		self.tiles = list(tile_set(set_size))
+		self.random = rng
 
 	def draw(self):
 		'''
@@ -39,7 +159,7 @@ class Boneyard(object):
 		'''
 		if not self.tiles:
 			return None
-		tile = random.choice(self.tiles)
+		tile = self.random.choice(self.tiles)
 		self.tiles.remove(tile)
 		return tile
 
@@ -64,34 +184,374 @@ def from_iterables(iterable):
 			yield j
 
 class LoggingReporter(object):
+	'''
+	Logs every event of the game to stderr.
+
+	Messages are passed to the logger with their arguments, unformatted, so they cost
+	next to nothing if the logger's level leaves them out.  Anything that changes as
+	the round goes on (hands, the order of play) is copied.
+	'''
 	def __init__(self):
 		self.logger = logging.getLogger('chickenfoot')
 		self.logger.setLevel('DEBUG')
-		self.logger.addHandler(logging.StreamHandler()) # writes to stderr
+		# the logger is shared by every instance; one handler is enough for all of them
+		if not self.logger.handlers:
+			self.logger.addHandler(logging.StreamHandler()) # writes to stderr
+
+	def _log(self, level, message, *args):
+		'Log "message % args", formatted only if it will actually be written'
+		self.logger.log(level, message, *args)
 
 	def root_found(self, player, tile):
-		self.logger.info('Root tile %s played by %s' % (tile, player))
+		self._log(logging.INFO, 'Root tile %s played by %s', tile, player)
 
 	def play_order(self, players):
-		self.logger.info('Order of play determined: %s' % [player for player in players])
+		self._log(logging.INFO, 'Order of play determined: %s', list(players))
 
 	def draw(self, player, tile):
-		self.logger.info('Player %s drew tile: %s' % (player, tile))
+		self._log(logging.INFO, 'Player %s drew tile: %s', player, tile)
 
 	def turn_start(self, player, state):
-		self.logger.info('Turn start: %s; game state: %s' % (player, state))
+		self._log(logging.INFO, 'Turn start: %s; game state: %s', player, state)
 		
 	def root_not_found(self):
-		self.logger.info('Root not found, all players drawing')
+		self._log(logging.INFO, 'Root not found, all players drawing')
+
+	def opportunities(self, player, tiles):
+		self._log(logging.DEBUG, 'Opportunities for player %s: %s', player, list(tiles))
+
+	def play(self, player, tile, parent):
+		self._log(logging.INFO, 'Player %s played %s under %s', player, tile, parent.tile)
+
+	def initial_hands(self, players):
+		self._log(logging.INFO, 'Player hands: %s', PrettyFormat(dict((player, list(player.hand)) for player in players)))
+
+	def round_over(self, scores):
+		self._log(logging.INFO, 'Round over; scores: %s', dict(scores))
+
+class PrettyFormat(object):
+	'Wraps an object so that it\'s formatted by pprint.pformat, when it\'s formatted at all'
+	def __init__(self, obj):
+		self.obj = obj
+
+	def __str__(self):
+		return pprint.pformat(self.obj)
+
+class RingBuffer(object):
+	'''
+	A bounded, thread-safe FIFO of items, put one at a time and taken in batches.
+
+	put() waits while the buffer is full, so a fast producer is held back to the
+	pace of the consumer rather than filling up memory.
+	'''
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self._items = [None] * capacity
+		self._head = 0 # index of the oldest item
+		self._count = 0
+		self._closed = False
+		self._lock = threading.Condition()
+
+	def put(self, item):
+		with self._lock:
+			while self._count == self.capacity:
+				self._lock.wait()
+			self._items[(self._head + self._count) % self.capacity] = item
+			self._count += 1
+			if self._count == 1:
+				self._lock.notify_all()
+
+	def take(self, max_items):
+		'''
+		Remove and return a list of up to max_items of the oldest items, waiting for at
+		least one.  Returns an empty list once the buffer is closed and empty.
+		'''
+		with self._lock:
+			while not self._count and not self._closed:
+				self._lock.wait()
+			count = min(self._count, max_items)
+			batch = []
+			for i in range(count):
+				index = (self._head + i) % self.capacity
+				batch.append(self._items[index])
+				self._items[index] = None
+			self._head = (self._head + count) % self.capacity
+			self._count -= count
+			self._lock.notify_all()
+			return batch
+
+	def close(self):
+		'''
+		Let take() return an empty list once the items left have been taken
+		'''
+		with self._lock:
+			self._closed = True
+			self._lock.notify_all()
+
+class BufferedLoggingReporter(LoggingReporter):
+	'''
+	A LoggingReporter that leaves all the formatting and writing to a background thread.
+
+	Each event is kept as a (message, args) tuple.  They're gathered into batches, one
+	per thread, and each batch is put into a RingBuffer when it's full, or the round
+	is over.  The writer thread takes the batches, formats them, and writes each to
+	'stream' at once.  Call close() to write out whatever is left.
+	'''
+	def __init__(self, stream=None, level=logging.DEBUG, capacity=64, batch_size=1024):
+		'''
+		* level - least logging level of the events to write
+		* capacity - number of batches that may wait to be written, before the game waits for the writer
+		'''
+		self.stream = stream or sys.stderr
+		self.level = level
+		self.batch_size = batch_size
+		self._buffer = RingBuffer(capacity)
+		self._local = threading.local() # the batch in progress on each thread
+		self._writer = threading.Thread(target=self._write_loop)
+		self._writer.daemon = True
+		self._writer.start()
+
+	def _log(self, level, message, *args):
+		if level < self.level:
+			return
+		try:
+			events = self._local.events
+		except AttributeError:
+			events = self._local.events = []
+		events.append((message, args))
+		if len(events) >= self.batch_size:
+			self._flush()
+
+	def _flush(self):
+		'send the batch in progress on this thread to the writer'
+		events = getattr(self._local, 'events', None)
+		if events:
+			self._buffer.put(events)
+			self._local.events = []
+
+	def round_over(self, scores):
+		super(BufferedLoggingReporter, self).round_over(scores)
+		self._flush()
+
+	def _write_loop(self):
+		while True:
+			batches = self._buffer.take(16)
+			if not batches:
+				return
+			self.stream.write(''.join([
+				(message % args if args else message) + '\n' for events in batches for message, args in events]))
+			self.stream.flush()
+
+	def close(self):
+		self._flush()
+		self._buffer.close()
+		self._writer.join()
+
+class Histogram(object):
+	'''
+	Counts observations into fixed buckets, as a Prometheus histogram does
+	'''
+	def __init__(self, buckets):
+		'* buckets - the upper bound of each bucket, in increasing order; an unbounded one is added'
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.sum = 0
+		self.count = 0
+
+	def observe(self, value):
+		self.counts[bisect.bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+
+	def exposition(self, name, help_text):
+		'Return the lines describing this histogram in the Prometheus text format'
+		lines = ['# HELP %s %s' % (name, help_text), '# TYPE %s histogram' % name]
+		total = 0
+		for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+			total += count
+			lines.append('%s_bucket{le="%s"} %d' % (name, bound, total))
+		lines.append('%s_sum %s' % (name, self.sum))
+		lines.append('%s_count %d' % (name, self.count))
+		return lines
+
+class MetricsReporter(object):
+	'''
+	Keeps counters and histograms of what happens in each round, and writes them to
+	'path' in the Prometheus text format every 'interval' seconds, and on close().
+
+	Each event just adds to the tallies of the round in progress on its thread; they're
+	added to the totals, under a lock, when the round is over.
+	'''
+	COUNTERS = (
+		('rounds', 'Rounds played'),
+		('turns', 'Turns taken'),
+		('draws', 'Tiles drawn from the boneyard after the initial hands'),
+		('plays', 'Tiles played'),
+		('chickenfoots', 'Chickenfoots opened by playing a double'),
+		('root_passes', 'Times every player drew because nobody held the root tile'),
+		('stalemates', 'Rounds that ended with nobody able to play'),
+	)
+
+	def __init__(self, path, interval=15.0):
+		self.path = path
+		self.interval = interval
+		self.counters = dict((name, 0) for name, help_text in self.COUNTERS)
+		self.turns_per_round = Histogram((10, 20, 30, 40, 60, 80, 120, 160, 240))
+		self.draws_per_round = Histogram((0, 5, 10, 15, 20, 30, 40, 60))
+		self.hand_size_at_end = Histogram((0, 1, 2, 3, 5, 8, 13, 21))
+		self._local = threading.local() # tallies of the round in progress on each thread
+		self._lock = threading.Lock()
+		self._last_write = time.time()
+
+	def initial_hands(self, players):
+		tally = self._local
+		tally.turns = tally.draws = tally.plays = tally.chickenfoots = tally.root_passes = 0
+
+	def root_not_found(self):
+		self._local.root_passes += 1
+
+	def turn_start(self, player, state):
+		self._local.turns += 1
+
+	def draw(self, player, tile):
+		# draws while looking for the root don't come after a turn_start
+		if player.game.root:
+			self._local.draws += 1
+
+	def play(self, player, tile, parent):
+		tally = self._local
+		tally.plays += 1
+		game = player.game
+		if game.state == Game.State.CHICKIE and game.current_chickie.tile is tile:
+			tally.chickenfoots += 1
+
+	def round_over(self, scores):
+		tally = self._local
+		game = next(iter(scores)).game
+		with self._lock:
+			counters = self.counters
+			counters['rounds'] += 1
+			counters['turns'] += tally.turns
+			counters['draws'] += tally.draws
+			counters['plays'] += tally.plays
+			counters['chickenfoots'] += tally.chickenfoots
+			counters['root_passes'] += tally.root_passes
+			counters['stalemates'] += stalemate(game)
+			self.turns_per_round.observe(tally.turns)
+			self.draws_per_round.observe(tally.draws)
+			for player in game.players:
+				self.hand_size_at_end.observe(len(player.hand))
+			if time.time() - self._last_write >= self.interval:
+				self._write()
+
+	def exposition(self):
+		'Return the metrics in the Prometheus text format'
+		lines = []
+		for name, help_text in self.COUNTERS:
+			lines += [
+				'# HELP chickenfoot_%s_total %s' % (name, help_text),
+				'# TYPE chickenfoot_%s_total counter' % name,
+				'chickenfoot_%s_total %d' % (name, self.counters[name]),
+			]
+		lines += [
+			'# HELP chickenfoot_stalemate_ratio Fraction of rounds that ended with nobody able to play',
+			'# TYPE chickenfoot_stalemate_ratio gauge',
+			'chickenfoot_stalemate_ratio %r' % (float(self.counters['stalemates']) / max(self.counters['rounds'], 1)),
+		]
+		lines += self.turns_per_round.exposition('chickenfoot_turns_per_round', 'Turns taken in each round')
+		lines += self.draws_per_round.exposition('chickenfoot_draws_per_round', 'Tiles drawn in each round')
+		lines += self.hand_size_at_end.exposition('chickenfoot_hand_size_at_round_end', 'Tiles in each hand at the end of a round')
+		return '\n'.join(lines) + '\n'
+
+	def _write(self):
+		'''
+		Replace the file at self.path with the current metrics, by way of a temporary file
+		so that it's never read half-written
+		'''
+		temp_path = self.path + '.tmp'
+		with open(temp_path, 'w') as f:
+			f.write(self.exposition())
+		os.rename(temp_path, self.path)
+		self._last_write = time.time()
+
+	def close(self):
+		with self._lock:
+			self._write()
+
+	def root_found(self, player, tile):
+		pass
+
+	def play_order(self, players):
+		pass
+
+	def opportunities(self, player, tiles):
+		pass
+
+class NullReporter(object):
+	'''
+	Ignores every event; what Game reports to when it has no reporters
+	'''
+	def root_found(self, player, tile):
+		pass
+
+	def play_order(self, players):
+		pass
+
+	def draw(self, player, tile):
+		pass
+
+	def turn_start(self, player, state):
+		pass
+
+	def root_not_found(self):
+		pass
 
 	def opportunities(self, player, tiles):
-		self.logger.debug('Opportunities for player %s: %s' % (player, tiles))
+		pass
 
 	def play(self, player, tile, parent):
-		self.logger.info('Player %s played %s under %s' % (player, tile, parent.tile))
+		pass
+
+	def initial_hands(self, players):
+		pass
+
+	def round_over(self, scores):
+		pass
+
+class TraceReporter(NullReporter):
+	'''
+	Records the events of the rounds it's given as plain tuples in 'events', so that
+	the play of one engine can be compared with another's (see EngineComparison).
+
+	Players are recorded by name and tiles by their ends.  Opportunities aren't
+	recorded: they're only reported in the OPEN state, and are seen in the plays anyway.
+	'''
+	def __init__(self):
+		self.events = []
 
 	def initial_hands(self, players):
-		self.logger.info('Player hands: %s' % (pprint.pformat(dict((player, player.hand) for player in players))))
+		self.events.append(('initial_hands', tuple((player.name, tuple(tile.ends for tile in player.hand)) for player in players)))
+
+	def root_found(self, player, tile):
+		self.events.append(('root_found', player.name, tile.ends))
+
+	def root_not_found(self):
+		self.events.append(('root_not_found',))
+
+	def play_order(self, players):
+		self.events.append(('play_order', tuple(player.name for player in players)))
+
+	def draw(self, player, tile):
+		self.events.append(('draw', player.name, tile.ends))
+
+	def turn_start(self, player, state):
+		self.events.append(('turn_start', player.name, state))
+
+	def play(self, player, tile, parent):
+		self.events.append(('play', player.name, tile.ends, parent.tile.ends))
+
+	def round_over(self, scores):
+		self.events.append(('round_over', tuple(sorted((player.name, score) for player, score in scores.items()))))
 
 class ReporterCollection(object):
 	def __init__(self, reporters):
@@ -128,6 +588,54 @@ class ReporterCollection(object):
 	def initial_hands(self, *args, **kwargs):
 		self._dispatch('initial_hands', args, kwargs)
 
+	def round_over(self, *args, **kwargs):
+		self._dispatch('round_over', args, kwargs)
+
+class PublicKnowledge(object):
+	'''
+	What everyone at the table knows of a round in play, kept up to date by Game as it goes:
+	* unplayed - bitmask (see tile_index) of the tiles that aren't on the board
+	* hand_sizes - Player: the number of tiles in their hand
+	* voids - Player: bitmask of the pips they've shown they lack, by having nothing to play
+	* excluded - Player: bitmask of the tiles they can't be holding, being those showing a void pip
+
+	Someone with nothing to play lacks every pip open at the time, until they take a tile
+	nobody else sees.  The one they then draw is either played straight away, or shows
+	none of the open pips either, so they still lack those after drawing it.
+	'''
+	def __init__(self, set_size, players):
+		catalogue = tile_catalogue(set_size)
+		self.unplayed = (1 << len(catalogue)) - 1
+		self.hand_sizes = dict((player, 0) for player in players)
+		self.voids = dict((player, 0) for player in players)
+		self.excluded = dict((player, 0) for player in players)
+		# bitmask of the tiles showing each number of pips
+		self._pip_tiles = [0] * (set_size + 1)
+		for index, (a, b) in enumerate(catalogue):
+			self._pip_tiles[a] |= 1 << index
+			self._pip_tiles[b] |= 1 << index
+
+	def drew(self, player):
+		'"player" took a tile from the boneyard, which could show any pip'
+		self.hand_sizes[player] += 1
+		self.voids[player] = 0
+		self.excluded[player] = 0
+
+	def played(self, player, tile):
+		'"player" put "tile" on the board'
+		self.unplayed &= ~(1 << tile.index)
+		self.hand_sizes[player] -= 1
+
+	def lacks(self, player, pips):
+		'"player" had nothing to play on any of "pips", a list of numbers of pips'
+		for pip in pips:
+			self.voids[player] |= 1 << pip
+			self.excluded[player] |= self._pip_tiles[pip]
+
+	def unseen(self, player):
+		'Return a bitmask of the tiles that "player" can\'t see: those in the boneyard and the other hands'
+		return self.unplayed & ~player.hand.mask
+
 class Game(object):
 	'''
 	Store the state of the round in play, being the tiles on the field, in the boneyard, and in player's hands
@@ -144,18 +652,33 @@ class Game(object):
 		'''
 		ROOT, OPEN, CHICKIE = ('R', 'O', 'C')
 
-	def __init__(self, required_root, set_size, starting_hand_size, players, reporters=[]):
+	def __init__(self, required_root, set_size, starting_hand_size, players, reporters=[], seed=None, round_number=0,
+			rng=random):
 		'''
 		* required_root - the number of pips that must be on the root double; this changes with each round
 		* set_size - size of the set of dominoes we're playing with; e.g. 9 indicates a "double-9" set
+		* seed, round_number - if a seed is given, all the randomness of the round, the players'
+			included, comes from round_random(seed, round_number, ...), rather than from 'rng'
+		* rng - source of random numbers otherwise: the random module, or a random.Random, e.g.
+			one per thread, so that rounds in play at once have no state in common
 		'''
 		self.required_root = required_root
-		self.boneyard = Boneyard(set_size)
+		self.round_number = round_number
+		self.set_size = set_size
+		self.random = rng if seed is None else round_random(seed, round_number, 'seating')
+		self.boneyard = Boneyard(set_size, rng if seed is None else round_random(seed, round_number, 'boneyard'))
 		self.starting_hand_size = starting_hand_size
 		self.players = players
-		self.report = ReporterCollection(reporters)
+		self.report = ReporterCollection(reporters) if reporters else NullReporter()
+		self.public = PublicKnowledge(set_size, players)
+
+		# let the players see the table, so that strategies can look past their own hand
+		for player in players:
+			player.game = self
+			player.random = rng if seed is None else round_random(seed, round_number, 'player %s' % player.name)
 
 		# some placeholders
+		self.turns = 0
 		self._root = None
 		self.state = None
 		self.current_chickie = None
@@ -177,7 +700,23 @@ class Game(object):
 
 	def run(self):
 		'''
-		Simulate running a game.
+		Simulate running a game, with each player choosing their own plays.
+		'''
+		decisions = self.decisions()
+		try:
+			player, opportunities = next(decisions)
+			while True:
+				player, opportunities = decisions.send(player.pick_tile(opportunities))
+		except StopIteration:
+			pass
+
+	def decisions(self):
+		'''
+		Simulate running a game, yielding (player, opportunities) whenever a player must choose a play.
+
+		The caller makes the choice: it must send() back one of the opportunities, having
+		removed it from the player's hand, as Player.pick_tile does.  The game is over
+		when this stops iterating.
 		'''
 		# setup: everybody gets some tiles
 		self._setup_player_hands()
@@ -191,6 +730,7 @@ class Game(object):
 
 		# player-by-player turns start now
 		for player in cycle(self.players):
+			self.turns += 1
 			self.report.turn_start(player, self.state)
 			
 			# determine the subset of the player's hand that can be played
@@ -203,11 +743,14 @@ class Game(object):
 					# there was at least one pile in the boneyard;
 					# add it to the player's hand and rebuild their opportunities
 					player.add_tile(drawn)
+					self.public.drew(player)
 					self.report.draw(player, drawn)
 					opportunities = self._opportunities(player)
+				# everyone saw that there was nothing to play, and the drawn tile can only be played on the same pips
+				self.public.lacks(player, self._open_pips)
 			
 			if opportunities:
-				tile = player.pick_tile(opportunities)
+				tile = yield (player, opportunities)
 				if self.state == self.State.CHICKIE:
 					# must play to the chickenfoot in progress
 					parent = self.current_chickie
@@ -220,6 +763,7 @@ class Game(object):
 			
 				# update internal state in reaction to the last play
 				self._handle_play(tile, parent)
+				self.public.played(player, tile)
 
 				# report the play
 				self.report.play(player, tile, parent)
@@ -230,7 +774,25 @@ class Game(object):
 
 		# score player's hands
 		self.scores = dict((player, player.score) for player in self.players)
+		self.report.round_over(self.scores)
 	
+	def end_counts(self):
+		'''
+		Return a list counting, for each number of pips, the places a tile showing it could be played right now.
+
+		That's the leaves in the OPEN state, or the empty places on the root or the
+		chickenfoot in progress in the ROOT and CHICKIE states.
+		'''
+		counts = [0] * (self.set_size + 1)
+		if self.state == self.State.OPEN:
+			for leaf in self.root.leaves:
+				counts[leaf.bottom] += 1
+		elif self.state == self.State.ROOT:
+			counts[self.root.tile.a] = 4 - len(self.root.children)
+		elif self.state == self.State.CHICKIE:
+			counts[self.current_chickie.tile.a] = 3 - len(self.current_chickie.children)
+		return counts
+
 	def _handle_play(self, tile, parent):
 		'''
 		Update state in reaction to a tile being played.
@@ -287,10 +849,14 @@ class Game(object):
 	def _setup_player_hands(self):
 		'''
 		Simulate players drawing their initial hands
+
+		Any tiles left over from a previous round are discarded first.
 		'''
 		for player in self.players:
+			player.hand = Hand()
 			for i in range(self.starting_hand_size):
 				player.add_tile(self.boneyard.draw())
+				self.public.drew(player)
 			
 		# report the new hands
 		self.report.initial_hands(self.players)
@@ -308,6 +874,7 @@ class Game(object):
 			tile = player.fetch_tile(self.required_root, self.required_root)
 			if tile:
 				# we found the starting tile
+				self.public.played(player, tile)
 				self.report.root_found(player, tile)
 
 				# first, re-order self.players into the order of play
@@ -316,7 +883,7 @@ class Game(object):
 				# everybody else is randomly seated
 				# this is a mild deviation from table-top play; usually nobody re-seats themselves
 				self.players.remove(player)
-				random.shuffle(self.players)
+				self.random.shuffle(self.players)
 				self.players.append(player)
 
 				self.report.play_order(self.players)
@@ -334,6 +901,7 @@ class Game(object):
 				drawn = self.boneyard.draw()
 				if drawn:
 					i.add_tile(drawn)
+					self.public.drew(i)
 			self.report.root_not_found()
 	
 	def _opportunities(self, player):
@@ -342,16 +910,19 @@ class Game(object):
 
 		todo: refactor "opportunities" to include attachment position info
 		'''
+		# the pips that can be played on are kept for PublicKnowledge, should there be no opportunities
 		if self.state == self.State.CHICKIE:
 			# opportunities limited to current chickie
+			self._open_pips = (self.current_chickie.tile.a,)
 			return [tile for tile in player.hand if self.current_chickie.tile.a in tile.ends]
 
 		if self.state == self.State.ROOT:
 			# leaves don't count when we're in root-filling mode
+			self._open_pips = (self.root.tile.a,)
 			return [tile for tile in player.hand if self.root.tile.a in tile.ends]
 
 		# otherwise, any leaf can be used to make a play
-		leaf_ends = set(i.bottom for i in self.root.leaves)
+		leaf_ends = self._open_pips = set(i.bottom for i in self.root.leaves)
 		opportunities = [tile for tile in player.hand if leaf_ends & set([i for i in tile.ends])]
 		
 		# report these opportunities before returning them
@@ -474,6 +1045,226 @@ class Root(Node):
 		self.max_children = 4
 		self.orientation = Orientation.NORMAL
 
+class DecisionCache(object):
+	'''
+	A memo of the choices of a deterministic strategy, keyed by Player.decision_key.
+
+	Holds at most 'capacity' decisions, forgetting the least recently used first.  It's
+	shared by every player of a class, in whatever thread, so it's guarded by a lock.
+	'''
+	def __init__(self, capacity=1 << 16):
+		self.capacity = capacity
+		self.hits = 0
+		self.misses = 0
+		self._decisions = collections.OrderedDict() # key: position of the choice among the opportunities
+		self._lock = threading.Lock()
+
+	def __len__(self):
+		return len(self._decisions)
+
+	def get(self, key):
+		'Return the decision remembered for "key", or None'
+		with self._lock:
+			decision = self._decisions.get(key)
+			if decision is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+				self._decisions.move_to_end(key)
+			return decision
+
+	def put(self, key, decision):
+		'Remember "decision" for "key"'
+		with self._lock:
+			self._decisions[key] = decision
+			if len(self._decisions) > self.capacity:
+				self._decisions.popitem(last=False)
+
+class DecisionTimeout(Exception):
+	'''
+	Raised by a strategy that finds it has run past its Player.deadline
+	'''
+	pass
+
+class DecisionTimer(object):
+	'''
+	Times the decisions of a strategy, and holds them to a time limit.
+
+	Python can't interrupt a strategy that runs long, so a limit is kept in two ways:
+	strategies that search (e.g. SolverPlayer) look at Player.deadline as they go and
+	raise DecisionTimeout when it passes, and any choice made after the limit is thrown
+	away.  Either way, the timer's 'fallback' player chooses instead (a RandomPlayer by
+	default), and it's counted in 'timeouts'.  With a limit, results depend on how fast
+	the machine is, so seeded runs may not repeat exactly.
+
+	The fallback is made once per timer and has no game or hand; it chooses with the
+	random numbers of the player out of time, so any strategy that needs no game state
+	will do.
+
+	Like a DecisionCache, it's shared by every player of a class, in whatever thread.
+	'''
+	# upper bounds of the latency buckets, in seconds
+	buckets = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+	def __init__(self, limit=None, fallback=None):
+		'''
+		* limit - seconds a decision may take, or None for no limit
+		* fallback - Player class of the player that chooses for one that runs out of time
+		'''
+		self.limit = limit
+		self.fallback = (fallback or RandomPlayer)('fallback')
+		self.latencies = Histogram(self.buckets)
+		self.cpu_seconds = 0.0
+		self.timeouts = 0
+		self._lock = threading.Lock()
+
+	def decide(self, player, opportunities):
+		'''
+		Return the choice of 'player' among 'opportunities', or the fallback's if it ran out of time
+		'''
+		start_cpu = time.thread_time()
+		start = time.perf_counter()
+		player.deadline = start + self.limit if self.limit is not None else None
+		try:
+			chosen = player._choose(opportunities)
+		except DecisionTimeout:
+			chosen = None
+		finally:
+			player.deadline = None
+		elapsed = time.perf_counter() - start
+		timed_out = chosen is None or (self.limit is not None and elapsed > self.limit)
+		if timed_out:
+			with self._lock:
+				self.fallback.random = player.random
+				chosen = self.fallback._pick_tile(opportunities)
+		cpu = time.thread_time() - start_cpu
+		with self._lock:
+			self.latencies.observe(elapsed)
+			self.cpu_seconds += cpu
+			self.timeouts += timed_out
+		return chosen
+
+	def describe_latencies(self):
+		'Return the number of decisions in each latency bucket, e.g. "<=10us: 5, <=100us: 2, ..."'
+		def duration(seconds):
+			for unit, scale in (('s', 1), ('ms', 1e-3)):
+				if seconds >= scale:
+					return '%g%s' % (seconds / scale, unit)
+			return '%gus' % (seconds / 1e-6)
+		labels = ['<=' + duration(bound) for bound in self.buckets] + ['>' + duration(self.buckets[-1])]
+		return ', '.join('%s: %d' % (label, count) for label, count in zip(labels, self.latencies.counts))
+
+class Hand(object):
+	'''
+	A player's tiles, with aggregates kept up to date as tiles are added and removed:
+	* value - the total value of the tiles, i.e. the player's score
+	* doubles - the number of doubles
+	* pip_counts - a Counter of the tiles showing each number of pips, a double counting once
+	* mask - a bitmask of the tiles (see tile_index)
+
+	The tiles are also kept in order of value, highest first (in order of arrival when
+	the values are equal), for by_value and highest.
+
+	A Hand reads like a list (iterating, indexing, slicing, len, in, index, and comparing
+	equal to a list of the same tiles), but may only be changed by append, extend,
+	remove and pop, so that the aggregates can't go stale.
+	'''
+	def __init__(self, tiles=()):
+		self.value = 0
+		self.doubles = 0
+		self.pip_counts = collections.Counter()
+		self.mask = 0
+		self._held = [] # the tiles, in order of arrival
+		self._held_serials = [] # the serial of each of _held
+		self._order = [] # sorted (-value, serial) of every tile
+		self._tiles = {} # serial: tile
+		self._next_serial = 0
+		self.extend(tiles)
+
+	def __reduce__(self):
+		'Copy and pickle by the tiles alone, building the aggregates again'
+		return (self.__class__, (list(self._held),))
+
+	def __repr__(self):
+		return '%s(%r)' % (self.__class__.__name__, self._held)
+
+	def __len__(self):
+		return len(self._held)
+
+	def __iter__(self):
+		return iter(self._held)
+
+	def __contains__(self, tile):
+		return tile in self._held
+
+	def __getitem__(self, index):
+		'Return a tile, or a list of the tiles in a slice'
+		return self._held[index]
+
+	def __eq__(self, other):
+		if isinstance(other, Hand):
+			return self._held == other._held
+		if isinstance(other, list):
+			return self._held == other
+		return NotImplemented
+
+	__hash__ = None
+
+	def index(self, tile):
+		return self._held.index(tile)
+
+	def append(self, tile):
+		value = tile.value
+		self.value += value
+		if tile.a == tile.b:
+			self.doubles += 1
+			self.pip_counts[tile.a] += 1
+		else:
+			self.pip_counts[tile.a] += 1
+			self.pip_counts[tile.b] += 1
+		self.mask |= 1 << tile.index
+		serial = self._next_serial
+		self._next_serial += 1
+		self._held.append(tile)
+		self._held_serials.append(serial)
+		self._tiles[serial] = tile
+		bisect.insort(self._order, (-value, serial))
+
+	def extend(self, tiles):
+		for tile in tiles:
+			self.append(tile)
+
+	def remove(self, tile):
+		'Remove the first of "tile"; raises ValueError if it isn\'t held'
+		self.pop(self._held.index(tile))
+
+	def pop(self, index=-1):
+		tile = self._held.pop(index)
+		serial = self._held_serials.pop(index)
+		value = tile.value
+		self.value -= value
+		if tile.a == tile.b:
+			self.doubles -= 1
+			self.pip_counts[tile.a] -= 1
+		else:
+			self.pip_counts[tile.a] -= 1
+			self.pip_counts[tile.b] -= 1
+		# the mask only loses the tile if there's no other of it
+		if not any(held.index == tile.index for held in self._held):
+			self.mask &= ~(1 << tile.index)
+		del self._tiles[serial]
+		del self._order[bisect.bisect_left(self._order, (-value, serial))]
+		return tile
+
+	def by_value(self):
+		'Generate the tiles, highest value first'
+		for value, serial in self._order:
+			yield self._tiles[serial]
+
+	def highest(self):
+		'Return the tile of highest value (the first of them, if there are several), or None if there are no tiles'
+		return self._tiles[self._order[0][1]] if self._order else None
+
 class Player(object):
 	'''
 	Base class for all player strategies.
@@ -489,15 +1280,43 @@ class Player(object):
 
 	TODO: these method names are kind of weird.  Maybe this is indicative
 	of bad factoring.
+
+	Strategies whose choice depends on nothing but decision_key set 'cacheable', and
+	then may be given a DecisionCache (see --decision-cache) to remember their choices.
+
+	Any strategy may be given a DecisionTimer (see --time-decisions) to time its choices
+	and hold them to a limit.  While a timed choice is being made, 'deadline' is the
+	time.perf_counter() by which it must be made; long-running strategies should raise
+	DecisionTimeout once it has passed.
 	'''
+	cacheable = False
+	decision_cache = None
+	decision_timer = None
+	deadline = None
+
 	def __init__(self, name):
 		self.name = name
-		self.hand = []
+		self.hand = Hand()
+		# the Game currently being played; assigned by Game
+		self.game = None
+		# source of random numbers for choices: the random module, or a random.Random; assigned by Game
+		self.random = random
 
 	def __repr__(self):
 		'Describe this instance by class and player name'
 		return '<%s: %s>' % (self.__class__.__name__, self.name)
 
+	@property
+	def hand(self):
+		return self._hand
+
+	@hand.setter
+	def hand(self, tiles):
+		'''
+		Assigning a list of tiles makes a Hand of them
+		'''
+		self._hand = tiles if isinstance(tiles, Hand) else Hand(tiles)
+
 	def add_tile(self, tile):
 		'''
 		Add a tile into a player's hand
@@ -523,17 +1342,49 @@ class Player(object):
 		Call the _pick_tile method to do the actual choosing, then remove the
 		chosen tile from the player's hand and return it.
 		'''
-		chosen = self._pick_tile(opportunities)
+		if self.decision_timer is None:
+			chosen = self._choose(opportunities)
+		else:
+			chosen = self.decision_timer.decide(self, opportunities)
 		self.hand.remove(chosen)
 		return chosen
 
+	def _choose(self, opportunities):
+		'Return the choice of _pick_tile among "opportunities", remembered in decision_cache if we have one'
+		cache = self.decision_cache if self.cacheable else None
+		if cache is None:
+			chosen = self._pick_tile(opportunities)
+		else:
+			key = self.decision_key(opportunities)
+			position = cache.get(key)
+			if position is None:
+				chosen = self._pick_tile(opportunities)
+				cache.put(key, opportunities.index(chosen))
+			else:
+				chosen = opportunities[position]
+		return chosen
+
 	def _pick_tile(self, opportunities):
 		'Overriden by derived classes to implement their choosing strategies.'
 		raise NotImplementedError
 
+	def decision_key(self, opportunities):
+		'''
+		Return a canonical, hashable encoding of everything a cacheable strategy's choice
+		depends on: its class, the opportunities in order, the hand, and the open ends
+		and state of the game.  Positions that differ only elsewhere get the same key.
+		'''
+		hand = 0
+		for tile in self.hand:
+			hand |= 1 << tile.index
+		key = (self.__class__, tuple(tile.index for tile in opportunities), hand)
+		if self.game is not None:
+			key += (self.game.state, tuple(self.game.end_counts()))
+		return key
+
 	@property
 	def score(self):
-		return sum(tile.value for tile in self.hand)
+		return self.hand.value
 
 class Tile(object):
 	'''
@@ -545,6 +1396,8 @@ class Tile(object):
 	def __init__(self, a, b):
 		self.a = a
 		self.b = b
+		# this tile's position in its set; see tile_index
+		self.index = tile_index(a, b)
 
 	def __repr__(self):
 		return '<Tile (%s, %s)>' % (self.a, self.b)
@@ -580,69 +1433,2985 @@ class RandomPlayer(Player):
 		Return one of 'opportunities' at random
 		'opportunities' is guaranteed to not be empty
 		'''
-		return random.choice(opportunities)
+		return self.random.choice(opportunities)
 
 class MaxValuePlayer(Player):
 	'''
 	Plays only the highest-value tiles first.
 	'''
+	cacheable = True
+
+	def decision_key(self, opportunities):
+		'The choice depends on the opportunities alone'
+		return (self.__class__, tuple(tile.index for tile in opportunities))
+
 	def _pick_tile(self, opportunities):
 		'''
 		Return the element from 'opportunities' with the highest score value
 		'opportunities' is guaranteed to not be empty
 		'''
-		return sorted(opportunities, key=operator.attrgetter('value'), reverse=True)[0]
+		# max, like a stable sort, takes the first of equal values
+		return max(opportunities, key=operator.attrgetter('value'))
 
-class GameRunner(object):
-	def __init__(self, rounds, player_class_names, set_size, starting_hand_size, reporter_class_names):
-		self.rounds = rounds
-		self.players = [globals()[class_name]('p%d' % num) for num, class_name in enumerate(player_class_names)]
-		self.set_size = set_size
-		self.starting_hand_size = starting_hand_size
-		self.reporters = [globals()[class_name]() for class_name in reporter_class_names]
-		self.aggregate_scores = dict((player, 0) for player in self.players)
+class EndgamePosition(object):
+	'''
+	A compact, immutable description of a round in which the location of every tile is known.
 
-	def run(self):
-		required_root_iterator = itertools.cycle(xrange(self.set_size+1))
-		for i in xrange(self.rounds):
-			# FIXME: kind of funky to require .next()
-			required_root = required_root_iterator.next()
-			game = Game(required_root, self.set_size, self.starting_hand_size, self.players, reporters=self.reporters)
-			game.run()
-			for player in self.players:
-				self.aggregate_scores[player] += game.scores[player]
+	Used to search ahead without touching a real Game.  Plays are applied exactly as
+	Game.run would apply them, including attaching open plays to the first matching
+	leaf that Node.find_attach_position visits.
 
-def validate_positive_int(s, name, error_method):
+	* catalogue - the tile_catalogue of the set in use
+	* hands - tuple of bitmasks (see tile_index), one per seat, in order of play
+	* mover - index into 'hands' of the player whose turn it is
+	* state - a Game.State value
+	* ends - the bottoms of the open leaves, in the order Node.leaves visits them.  In the
+		ROOT state these are the arms of the root; in the CHICKIE state the chickenfoot in
+		progress and its children are left out.
+	* pivot - the pips every play must match in the ROOT and CHICKIE states; None when OPEN
+	* slot - CHICKIE only: the index in 'ends' at which the chickenfoot's children belong
+	* pending - CHICKIE only: the bottoms of the chickenfoot's children played so far
 	'''
-	Returns the string s as an int.
+	__slots__ = ('catalogue', 'hands', 'mover', 'state', 'ends', 'pivot', 'slot', 'pending')
 
-	If the int value of s is either invalid or less than 1, call error_method with a description.
-	This is most useful when provided the 'error' method of an optparse.OptionParser instance.
-	'''
-	# test converting s to an int
-	try: 
-		num = int(s)
-	except ValueError:
-		error_method('Invalid %s: %s; must be a number' % (name, s))
-	
-	# guarantee num > 0
-	if num <= 0:
-		error_method('Invalid %s: %s; must be greater than 0' % (name, num))
+	def __init__(self, catalogue, hands, mover, state, ends, pivot=None, slot=None, pending=()):
+		self.catalogue = catalogue
+		self.hands = hands
+		self.mover = mover
+		self.state = state
+		self.ends = ends
+		self.pivot = pivot
+		self.slot = slot
+		self.pending = pending
 
-	return num
+	def __repr__(self):
+		return '<EndgamePosition %s mover=%d ends=%s pivot=%s pending=%s>' % (
+			self.state, self.mover, self.ends, self.pivot, self.pending)
 
-def parse_args():
-	'''
-	Evaluates the invoking command line and returns (opts, num_rounds), wherein 'opts'
-	is in the style of optparse.OptionParser.
+	@classmethod
+	def from_game(cls, game, mover, hands=None):
+		'''
+		Describe the board of 'game', with 'mover' (a Player) about to take their turn.
 
+		* hands - one bitmask per player in game.players; defaults to the players' actual hands
+		'''
+		if hands is None:
+			hands = [sum(1 << tile.index for tile in player.hand) for player in game.players]
+		catalogue = tile_catalogue(game.set_size)
+		mover = game.players.index(mover)
+		if game.state == Game.State.ROOT:
+			ends = tuple(child.bottom for child in game.root.children)
+			return cls(catalogue, tuple(hands), mover, game.state, ends, pivot=game.root.tile.a)
 
-	Exits via OptionParser.error if the command line is invalid (e.g. bad options or args).
-	'''
-	parser = optparse.OptionParser(
-		usage='%prog N',
-		description='Simulates running N number of rounds of the dominoes game, "Chicken foot," and prints a result summary',
-	)
+		chickie = game.current_chickie if game.state == Game.State.CHICKIE else None
+		def walk(node):
+			'like Node.leaves, but yields the chickenfoot in progress in place of its subtree'
+			if node is chickie or not node.children:
+				yield node
+			else:
+				for child in node.children:
+					for leaf in walk(child):
+						yield leaf
+		leaves = list(walk(game.root))
+		ends = tuple(leaf.bottom for leaf in leaves if leaf is not chickie)
+		if not chickie:
+			return cls(catalogue, tuple(hands), mover, game.state, ends)
+		return cls(
+			catalogue, tuple(hands), mover, game.state, ends,
+			pivot=chickie.tile.a,
+			slot=leaves.index(chickie),
+			pending=tuple(child.bottom for child in chickie.children),
+		)
+
+	def moves(self, seat=None):
+		'''
+		Return the indices of the tiles that the player at 'seat' (default: the mover) could play
+		'''
+		ends = self.ends if self.state == Game.State.OPEN else (self.pivot,)
+		hand = self.hands[self.mover if seat is None else seat]
+		return [i for i in bits(hand) if self.catalogue[i][0] in ends or self.catalogue[i][1] in ends]
+
+	def is_terminal(self):
+		'''
+		Return True if the round is over; see Game._round_over
+		'''
+		if not all(self.hands):
+			return True
+		return not any(self.moves(seat) for seat in range(len(self.hands)))
+
+	def scores(self):
+		'''
+		Return the value of every seat's hand, as Player.score would
+		'''
+		return tuple(sum(Tile(*self.catalogue[i]).value for i in bits(hand)) for hand in self.hands)
+
+	def pass_turn(self):
+		'''
+		Return the position after the mover passes, having no plays and nothing to draw
+		'''
+		return EndgamePosition(
+			self.catalogue, self.hands, (self.mover + 1) % len(self.hands), self.state,
+			self.ends, self.pivot, self.slot, self.pending)
+
+	def play(self, index):
+		'''
+		Return the position after the mover plays the tile at 'index'; see Game._handle_play
+		'''
+		a, b = self.catalogue[index]
+		hands = list(self.hands)
+		hands[self.mover] &= ~(1 << index)
+		hands = tuple(hands)
+		mover = (self.mover + 1) % len(hands)
+
+		if self.state == Game.State.ROOT:
+			ends = self.ends + (b if a == self.pivot else a,)
+			if len(ends) == 4:
+				return EndgamePosition(self.catalogue, hands, mover, Game.State.OPEN, ends)
+			return EndgamePosition(self.catalogue, hands, mover, self.state, ends, self.pivot)
+
+		if self.state == Game.State.CHICKIE:
+			pending = self.pending + (b if a == self.pivot else a,)
+			if len(pending) == 3:
+				ends = self.ends[:self.slot] + pending + self.ends[self.slot:]
+				return EndgamePosition(self.catalogue, hands, mover, Game.State.OPEN, ends)
+			return EndgamePosition(self.catalogue, hands, mover, self.state, self.ends, self.pivot, self.slot, pending)
+
+		# open play attaches to the first leaf that matches
+		for slot, end in enumerate(self.ends):
+			if end == a or end == b:
+				break
+		else:
+			raise ValueError('can\'t attach this tile: %s' % (self.catalogue[index],))
+		if a == b:
+			# a double starts a chickenfoot in place of the leaf it was played on
+			ends = self.ends[:slot] + self.ends[slot+1:]
+			return EndgamePosition(self.catalogue, hands, mover, Game.State.CHICKIE, ends, a, slot)
+		ends = self.ends[:slot] + (b if end == a else a,) + self.ends[slot+1:]
+		return EndgamePosition(self.catalogue, hands, mover, self.state, ends)
+
+class ZobristHasher(object):
+	'''
+	Hashes EndgamePositions by XOR-ing together a random 64-bit key for each of their features:
+	every (seat, tile) held, every (slot, pips) open end, the state, the mover, etc.
+	'''
+	def __init__(self, set_size, seats, seed=0):
+		rng = random.Random(seed)
+		key = lambda: rng.getrandbits(64)
+		pips = range(set_size + 1)
+		# the root has four arms, and each completed chickenfoot adds two more leaves
+		max_ends = 4 + 2 * set_size
+		self.hand_keys = [[key() for tile in tile_catalogue(set_size)] for seat in range(seats)]
+		self.end_keys = [[key() for pip in pips] for slot in range(max_ends)]
+		self.pending_keys = [[key() for pip in pips] for slot in range(3)]
+		self.pivot_keys = [key() for pip in pips]
+		self.slot_keys = [key() for slot in range(max_ends)]
+		self.mover_keys = [key() for seat in range(seats)]
+		self.state_keys = dict((state, key()) for state in (Game.State.ROOT, Game.State.OPEN, Game.State.CHICKIE))
+
+	def hash(self, position):
+		return self.hands_hash(position) ^ self.board_hash(position)
+
+	def hands_hash(self, position):
+		'''
+		Return the part of the hash contributed by the players' hands.
+
+		This is the bulk of the work, and it only changes by one key per play: XOR
+		in hand_keys[mover][tile] to update it.
+		'''
+		h = 0
+		for seat, hand in enumerate(position.hands):
+			keys = self.hand_keys[seat]
+			for i in bits(hand):
+				h ^= keys[i]
+		return h
+
+	def board_hash(self, position):
+		'''
+		Return the part of the hash contributed by everything but the players' hands.
+		'''
+		h = self.state_keys[position.state] ^ self.mover_keys[position.mover]
+		for slot, end in enumerate(position.ends):
+			h ^= self.end_keys[slot][end]
+		if position.pivot is not None:
+			h ^= self.pivot_keys[position.pivot]
+		if position.slot is not None:
+			h ^= self.slot_keys[position.slot]
+		for slot, end in enumerate(position.pending):
+			h ^= self.pending_keys[slot][end]
+		return h
+
+class SearchLimitExceeded(Exception):
+	'''
+	Raised by EndgameSolver when a search visits more than its max_nodes
+	'''
+	pass
+
+class EndgameSolver(object):
+	'''
+	Alpha-beta search to the end of the round over EndgamePositions, from the point of view of one seat.
+
+	A finished round is worth the sum of the opponents' scores, less our own score
+	for each opponent.  Our seat maximizes that value and every opponent is assumed
+	to minimize it.  With two players that's the game-theoretic value of the
+	position; with more, it's the pessimistic ("paranoid") value.
+
+	Results are memoized in a transposition table keyed by ZobristHasher, which is
+	kept between calls, so later turns of the same round mostly hit the table.
+	'''
+	EXACT, LOWER, UPPER = range(3)
+
+	def __init__(self, hasher, seat, max_nodes=None):
+		'''
+		* hasher - a ZobristHasher for the set size and number of seats being searched
+		* seat - index of the seat whose value we maximize
+		* max_nodes - raise SearchLimitExceeded if a single call visits more positions than this
+		'''
+		self.hasher = hasher
+		self.seat = seat
+		self.max_nodes = max_nodes
+		# time.perf_counter() past which a search raises DecisionTimeout, or None
+		self.deadline = None
+		self.table = {}
+		self.nodes = 0
+
+	def evaluate(self, position):
+		'''
+		Return a dict mapping each of the mover's plays to the value of the position after it
+		'''
+		self.nodes = 0
+		hands_hash = self.hasher.hands_hash(position)
+		keys = self.hasher.hand_keys[position.mover]
+		return dict(
+			(move, self._search(position.play(move), float('-inf'), float('inf'), hands_hash ^ keys[move])[0])
+			for move in position.moves()
+		)
+
+	def solve(self, position):
+		'''
+		Return (value, index of the best tile to play), or (value, None) if the mover can't play.
+		'''
+		self.nodes = 0
+		return self._search(position, float('-inf'), float('inf'), self.hasher.hands_hash(position))
+
+	def principal_variation(self, position):
+		'''
+		Return the optimal remainder of the round as a list of (seat, tile index) plays.
+		'''
+		plays = []
+		while not position.is_terminal():
+			value, move = self.solve(position)
+			if move is None:
+				position = position.pass_turn()
+				continue
+			plays.append((position.mover, move))
+			position = position.play(move)
+		return plays
+
+	def _utility(self, position):
+		scores = position.scores()
+		others = sum(scores) - scores[self.seat]
+		return others - (len(scores) - 1) * scores[self.seat]
+
+	def _search(self, position, alpha, beta, hands_hash):
+		'''
+		Return (value, best play) for 'position'; 'hands_hash' is its ZobristHasher.hands_hash
+		'''
+		self.nodes += 1
+		if self.max_nodes is not None and self.nodes > self.max_nodes:
+			raise SearchLimitExceeded
+		# looking at the clock is slow next to a node, so only look every so often
+		if self.deadline is not None and not self.nodes & 0xff and time.perf_counter() > self.deadline:
+			raise DecisionTimeout
+
+		key = hands_hash ^ self.hasher.board_hash(position)
+		entry = self.table.get(key)
+		hint = None
+		if entry is not None:
+			value, flag, hint = entry
+			if flag == self.EXACT or (flag == self.LOWER and value >= beta) or (flag == self.UPPER and value <= alpha):
+				return value, hint
+
+		moves = position.moves()
+		if not moves or not all(position.hands):
+			if position.is_terminal():
+				value = self._utility(position)
+				self.table[key] = (value, self.EXACT, None)
+				return value, None
+			value = self._search(position.pass_turn(), alpha, beta, hands_hash)[0]
+			self.table[key] = (value, self.EXACT, None) if alpha < value < beta else (value, self.LOWER if value >= beta else self.UPPER, None)
+			return value, None
+
+		# try the remembered best play first, then the most valuable tiles; both tend to cut off sooner
+		catalogue = position.catalogue
+		moves.sort(key=lambda i: (i != hint, -sum(catalogue[i])))
+
+		keys = self.hasher.hand_keys[position.mover]
+		maximizing = position.mover == self.seat
+		lower, upper = alpha, beta
+		best, best_move = (float('-inf') if maximizing else float('inf')), None
+		for move in moves:
+			value = self._search(position.play(move), lower, upper, hands_hash ^ keys[move])[0]
+			if maximizing:
+				if value > best:
+					best, best_move = value, move
+				lower = max(lower, best)
+			else:
+				if value < best:
+					best, best_move = value, move
+				upper = min(upper, best)
+			if lower >= upper:
+				break
+
+		if best <= alpha:
+			flag = self.UPPER
+		elif best >= beta:
+			flag = self.LOWER
+		else:
+			flag = self.EXACT
+		self.table[key] = (best, flag, best_move)
+		return best, best_move
+
+class SolverPlayer(MaxValuePlayer):
+	'''
+	Plays like MaxValuePlayer until the boneyard is empty, then searches ahead to the end of the round.
+
+	Once the boneyard is empty, every tile that isn't on the board or in our hand is
+	in an opponent's hand.  With one opponent, that hand is known exactly, and
+	EndgameSolver finds the optimal play.  With more, we only know how many tiles
+	each opponent holds, so each play is scored by its average value over the
+	possible deals of the unseen tiles (sampling max_deals of them when there are
+	more).  If a search grows past max_nodes, we fall back on MaxValuePlayer.
+	'''
+	max_nodes = 20000
+	max_deals = 20
+	# the endgame depends on the whole board, not just its open ends
+	cacheable = False
+
+	def __init__(self, name):
+		super(SolverPlayer, self).__init__(name)
+		self._solver = None
+		self._solver_game = None
+
+	def _pick_tile(self, opportunities):
+		'''
+		Return the best of 'opportunities' by search in the endgame, or by value otherwise
+		'''
+		if self.game is None or self.game.boneyard.tiles:
+			return super(SolverPlayer, self)._pick_tile(opportunities)
+		try:
+			best = self._solve()
+		except SearchLimitExceeded:
+			best = None
+		for tile in opportunities:
+			if tile.index == best:
+				return tile
+		return super(SolverPlayer, self)._pick_tile(opportunities)
+
+	def _solve(self):
+		'''
+		Return the index of the best tile to play, or None if the deals don't add up.
+		'''
+		game = self.game
+		seat = game.players.index(self)
+		if self._solver_game is not game:
+			# a new round; positions from the last one are of no use
+			self._solver = EndgameSolver(ZobristHasher(game.set_size, len(game.players)), seat, self.max_nodes)
+			self._solver_game = game
+		self._solver.seat = seat
+		self._solver.deadline = self.deadline
+
+		deals = list(self._deals(game, seat))
+		if not deals:
+			return None
+		if len(deals) == 1:
+			# perfect information
+			return self._solver.solve(EndgamePosition.from_game(game, self, deals[0]))[1]
+		totals = collections.defaultdict(int)
+		for hands in deals:
+			position = EndgamePosition.from_game(game, self, hands)
+			for move, value in self._solver.evaluate(position).items():
+				totals[move] += value
+		return max(totals, key=lambda move: (totals[move], sum(tile_catalogue(game.set_size)[move])))
+
+	def _deals(self, game, seat):
+		'''
+		Generate hand bitmasks for every seat that are consistent with what we can see
+		'''
+		public = game.public
+		mine = self.hand.mask
+		unseen = list(bits(public.unseen(self)))
+		sizes = [public.hand_sizes[player] for player in game.players]
+		sizes[seat] = 0
+		if sum(sizes) != len(unseen):
+			return
+		# tiles each opponent can't hold, having shown they lack the pips
+		excluded = [public.excluded[player] for player in game.players]
+
+		def deal(tiles, seats):
+			'generate every assignment of "tiles" to the hands of "seats"'
+			if not seats:
+				yield {}
+				return
+			candidates = [i for i in tiles if not excluded[seats[0]] >> i & 1]
+			for held in itertools.combinations(candidates, sizes[seats[0]]):
+				rest = [i for i in tiles if i not in held]
+				for others in deal(rest, seats[1:]):
+					others[seats[0]] = sum(1 << i for i in held)
+					yield others
+
+		opponents = [i for i in range(len(sizes)) if i != seat]
+		count = 0
+		for assignment in deal(unseen, opponents):
+			count += 1
+			if count > self.max_deals:
+				break
+		if count > self.max_deals:
+			# too many to enumerate; sample some instead, passing over those that break a void
+			assignments = []
+			for i in range(self.max_deals * 10):
+				if len(assignments) == self.max_deals:
+					break
+				self.random.shuffle(unseen)
+				assignment, start = {}, 0
+				for opponent in opponents:
+					held = sum(1 << j for j in unseen[start:start + sizes[opponent]])
+					if held & excluded[opponent]:
+						break
+					assignment[opponent] = held
+					start += sizes[opponent]
+				else:
+					assignments.append(assignment)
+		else:
+			assignments = deal(unseen, opponents)
+
+		for assignment in assignments:
+			assignment[seat] = mine
+			yield [assignment[i] for i in range(len(sizes))]
+
+class EndgameTablebase(object):
+	'''
+	Game-theoretic values of two-player endgames in small sets, precomputed by retrograde analysis.
+
+	A position is reduced to the hands of the mover and their opponent, the state,
+	and the multiset of pips on the open ends; see _TablebaseKeys.  Values are the
+	opponent's score less the mover's score at the end of the round, under optimal
+	play by both.
+
+	Game attaches an open play to the first matching leaf, which the multiset can't
+	tell apart from the others, so a tile matching ends of two different pips could
+	lead to either of two reduced positions.  A position is only stored when every
+	such pair has the same stored value, all the way to the end of the round; then
+	its value is the same however the open ends are ordered.  Other positions, like
+	positions in which the boneyard isn't empty or a hand holds more than max_hand
+	tiles, are left out.  The table lives in a file, in an open-addressed hash
+	table that is memory-mapped on load, so a lookup costs a few reads regardless
+	of how large the table is.
+	'''
+	MAGIC = b'CFTB'
+	VERSION = 2
+	HEADER = struct.Struct('<4sIIIQQ') # magic, version, set_size, max_hand, count, capacity
+	RECORD = struct.Struct('<QQi') # low and high words of the key, value
+	OCCUPIED = 1 << 63
+
+	def __init__(self, path):
+		'''
+		Open and memory-map a tablebase written by EndgameTablebase.build
+
+		Raises ValueError if 'path' isn't a tablebase.
+		'''
+		self.path = path
+		self._file = open(path, 'rb')
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, version, self.set_size, self.max_hand, self.count, self.capacity = self.HEADER.unpack_from(self._map, 0)
+		if magic != self.MAGIC or version != self.VERSION:
+			raise ValueError('Not a chickenfoot tablebase: %s' % path)
+		self._keys = _TablebaseKeys(self.set_size)
+		self._shift = 64 - (self.capacity.bit_length() - 1)
+
+	def __len__(self):
+		return self.count
+
+	def close(self):
+		self._map.close()
+		self._file.close()
+
+	def lookup(self, key):
+		'''
+		Return the value stored for a key made by _TablebaseKeys.key, or None if there isn't one
+		'''
+		low, high = key & 0xFFFFFFFFFFFFFFFF, (key >> 64) | self.OCCUPIED
+		slot = _TablebaseKeys.slot(low, high, self._shift)
+		mask = self.capacity - 1
+		while True:
+			stored_low, stored_high, value = self.RECORD.unpack_from(self._map, self.HEADER.size + slot * self.RECORD.size)
+			if not stored_high:
+				return None
+			if stored_low == low and stored_high == high:
+				return value
+			slot = (slot + 1) & mask
+
+	def value(self, position):
+		'''
+		Return the value of an EndgamePosition to its mover, or None if it isn't in the table.
+		'''
+		if len(position.hands) != 2:
+			return None
+		return self.lookup(self._keys.from_position(position))
+
+	def evaluate(self, position):
+		'''
+		Return a dict mapping each of the mover's plays to its value, or None if any are missing.
+
+		Unlike the table itself, this attaches each play where Game would.
+		'''
+		values = {}
+		for move in position.moves():
+			value = self.value(position.play(move))
+			if value is None:
+				return None
+			values[move] = -value
+		return values
+
+	@classmethod
+	def build(cls, path, set_size, max_hand=2):
+		'''
+		Solve every endgame with up to 'max_hand' tiles per hand in a double-'set_size' set, and write them to 'path'.
+
+		Positions are solved in order of the number of tiles left in hands, starting
+		from the finished rounds, so every play leads to a position that has already
+		been solved, or left out.  Returns the number of positions written.
+
+		The number of positions grows very quickly; double-3 sets are cheap, while
+		double-5 sets are only practical with a max_hand of 1 or 2.
+		'''
+		keys = _TablebaseKeys(set_size)
+		values = {}
+		for total in range(2 * max_hand + 1):
+			# a player who can't play passes to their opponent, whose position has the
+			# same number of tiles; those are settled once the rest of the layer is done
+			passes = []
+			for position in keys.positions(total, max_hand):
+				key = keys.key(*position)
+				plays = keys.plays(position)
+				if not position[0] or not position[1] or not (plays or keys.plays(keys.passed(position))):
+					values[key] = keys.margin(position)
+				elif plays:
+					scores = []
+					for index, children in plays:
+						# where Game attaches the tile mustn't matter
+						settled = set(values.get(keys.key(*child)) for child in children)
+						if None in settled or len(settled) > 1:
+							break
+						scores.append(-settled.pop())
+					else:
+						values[key] = max(scores)
+				else:
+					passes.append((key, keys.key(*keys.passed(position))))
+			for key, passed in passes:
+				if passed in values:
+					values[key] = -values[passed]
+
+		capacity = 2
+		while capacity < 2 * len(values):
+			capacity *= 2
+		shift = 64 - (capacity.bit_length() - 1)
+		size = cls.HEADER.size + capacity * cls.RECORD.size
+		with open(path, 'w+b') as f:
+			f.truncate(size)
+			table = mmap.mmap(f.fileno(), size)
+			cls.HEADER.pack_into(table, 0, cls.MAGIC, cls.VERSION, set_size, max_hand, len(values), capacity)
+			for key, value in values.items():
+				low, high = key & 0xFFFFFFFFFFFFFFFF, (key >> 64) | cls.OCCUPIED
+				slot = _TablebaseKeys.slot(low, high, shift)
+				while cls.RECORD.unpack_from(table, cls.HEADER.size + slot * cls.RECORD.size)[1]:
+					slot = (slot + 1) & (capacity - 1)
+				cls.RECORD.pack_into(table, cls.HEADER.size + slot * cls.RECORD.size, low, high, value)
+			table.flush()
+			table.close()
+		return len(values)
+
+class _TablebaseKeys(object):
+	'''
+	Enumerates, plays out, and packs into integers the reduced positions of an EndgameTablebase.
+
+	A reduced position is a tuple (mover, other, state, pivot, pending, counts):
+	* mover, other - hand bitmasks of the player to move and their opponent
+	* state - a Game.State value
+	* pivot - the pips plays must match in the ROOT and CHICKIE states, otherwise 0
+	* pending - CHICKIE only: how many of the chickenfoot's three children are down
+	* counts - how many open ends show each number of pips.  In the ROOT state these are
+		the root's arms, and in the CHICKIE state they include the chickenfoot's children.
+	'''
+	STATES = (Game.State.ROOT, Game.State.OPEN, Game.State.CHICKIE)
+
+	def __init__(self, set_size):
+		self.catalogue = tile_catalogue(set_size)
+		self.pips = set_size + 1
+		self._tile_bits = len(self.catalogue)
+		self._pip_bits = set_size.bit_length()
+		self._count_bits = (4 + 2 * set_size).bit_length()
+
+	@staticmethod
+	def slot(low, high, shift):
+		'Return the hash table slot for a packed key; "shift" is 64 less log2 of the capacity'
+		mixed = ((low ^ (high * 0x9E3779B97F4A7C15)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+		return mixed >> shift
+
+	def key(self, mover, other, state, pivot, pending, counts):
+		'Pack a reduced position into an integer'
+		key = 0
+		for count in reversed(counts):
+			key = (key << self._count_bits) | count
+		key = (key << 2) | pending
+		key = (key << self._pip_bits) | pivot
+		key = (key << 2) | self.STATES.index(state)
+		key = (key << self._tile_bits) | other
+		return (key << self._tile_bits) | mover
+
+	def from_position(self, position):
+		'Reduce a two-seat EndgamePosition and pack it into an integer'
+		counts = [0] * self.pips
+		for end in position.ends + position.pending:
+			counts[end] += 1
+		return self.key(
+			position.hands[position.mover], position.hands[1 - position.mover], position.state,
+			position.pivot or 0, len(position.pending), tuple(counts))
+
+	def margin(self, position):
+		'Return the value of a finished round to the mover'
+		score = lambda hand: sum(Tile(*self.catalogue[i]).value for i in bits(hand))
+		return score(position[1]) - score(position[0])
+
+	def passed(self, position):
+		'Return the position after the mover passes'
+		mover, other = position[:2]
+		return (other, mover) + position[2:]
+
+	def successors(self, position):
+		'Return every position the mover can reach with one play, from their opponent\'s point of view'
+		return list(set(child for index, children in self.plays(position) for child in children))
+
+	def plays(self, position):
+		'''
+		Return (tile index, positions) for each tile the mover can play.
+
+		An open play can lead to two positions, when open ends show both of the tile's
+		pips; which one Game picks depends on the order of the ends.
+		'''
+		mover, other, state, pivot, pending, counts = position
+		plays = []
+		for i in bits(mover):
+			a, b = self.catalogue[i]
+			hand = mover & ~(1 << i)
+			children = []
+			if state == Game.State.OPEN:
+				if a == b:
+					if counts[a]:
+						children.append((other, hand, Game.State.CHICKIE, a, 0, self._moved(counts, a, None)))
+				else:
+					for end, bottom in ((a, b), (b, a)):
+						if counts[end]:
+							children.append((other, hand, state, 0, 0, self._moved(counts, end, bottom)))
+			elif pivot in (a, b):
+				after = self._moved(counts, None, b if a == pivot else a)
+				if state == Game.State.ROOT:
+					if sum(after) == 4:
+						children.append((other, hand, Game.State.OPEN, 0, 0, after))
+					else:
+						children.append((other, hand, state, pivot, 0, after))
+				elif pending == 2:
+					children.append((other, hand, Game.State.OPEN, 0, 0, after))
+				else:
+					children.append((other, hand, state, pivot, pending + 1, after))
+			if children:
+				plays.append((i, children))
+		return plays
+
+	def _moved(self, counts, removed, added):
+		counts = list(counts)
+		if removed is not None:
+			counts[removed] -= 1
+		if added is not None:
+			counts[added] += 1
+		return tuple(counts)
+
+	def positions(self, total, max_hand):
+		'''
+		Generate every reduced position with 'total' tiles in hand and an empty boneyard.
+
+		The board holds every tile not in a hand, which limits the boards possible:
+		* ROOT: the root is a double on the board, and every other tile is an arm
+		* OPEN: every double but the root is a completed chickenfoot, adding two ends
+			each to the root's four.  The number of ends showing any pip has the same
+			parity as the number of non-double board tiles with that pip.
+		* CHICKIE: as OPEN, but one double is a chickenfoot in progress
+		'''
+		tiles = range(len(self.catalogue))
+		everything = (1 << len(self.catalogue)) - 1
+		for mover_size in range(max(0, total - max_hand), min(max_hand, total) + 1):
+			for mover_tiles in itertools.combinations(tiles, mover_size):
+				mover = sum(1 << i for i in mover_tiles)
+				rest = [i for i in tiles if not mover & (1 << i)]
+				for other_tiles in itertools.combinations(rest, total - mover_size):
+					other = sum(1 << i for i in other_tiles)
+					for board in self._boards(everything & ~(mover | other)):
+						yield (mover, other) + board
+
+	def _boards(self, board):
+		tiles = [self.catalogue[i] for i in bits(board)]
+		doubles = [a for a, b in tiles if a == b]
+		# upper bounds and parities of the number of ends showing each pip
+		limits = [sum(1 for tile in tiles if pip in tile) for pip in range(self.pips)]
+		parities = [sum(1 for a, b in tiles if a != b and pip in (a, b)) % 2 for pip in range(self.pips)]
+
+		for root in doubles:
+			arms = [tile for tile in tiles if tile != (root, root)]
+			if len(arms) < 4 and all(root in arm for arm in arms):
+				counts = [0] * self.pips
+				for a, b in arms:
+					counts[b if a == root else a] += 1
+				yield (Game.State.ROOT, root, 0, tuple(counts))
+
+		if doubles and len(tiles) >= 5:
+			for counts in self._multisets(4 + 2 * (len(doubles) - 1), limits, parities):
+				yield (Game.State.OPEN, 0, 0, counts)
+
+		if len(doubles) >= 2 and len(tiles) >= 6:
+			for pivot in doubles:
+				for pending in range(3):
+					# the chickenfoot's own bottom is matched 'pending' times rather than left open
+					adjusted = list(parities)
+					adjusted[pivot] = (adjusted[pivot] + pending + 1) % 2
+					for counts in self._multisets(3 + 2 * (len(doubles) - 2) + pending, limits, adjusted):
+						yield (Game.State.CHICKIE, pivot, pending, counts)
+
+	def _multisets(self, size, limits, parities, pip=0):
+		'generate count tuples over pips from "pip" up, totalling "size", within limits and parities'
+		if pip == self.pips - 1:
+			if size <= limits[pip] and size % 2 == parities[pip]:
+				yield (size,)
+			return
+		for count in range(parities[pip], min(size, limits[pip]) + 1, 2):
+			for rest in self._multisets(size - count, limits, parities, pip + 1):
+				yield (count,) + rest
+
+class TablebasePlayer(MaxValuePlayer):
+	'''
+	Plays like MaxValuePlayer, except in two-player endgames found in the tablebase, which it plays perfectly.
+
+	The tablebase is shared by every TablebasePlayer; assign an EndgameTablebase to the
+	class attribute 'tablebase' (main does this for --tablebase).
+	'''
+	tablebase = None
+	# the endgame depends on the whole board, not just its open ends
+	cacheable = False
+
+	def _pick_tile(self, opportunities):
+		'''
+		Return the opportunity with the best tablebase value, when there is one
+		'''
+		game = self.game
+		if self.tablebase is not None and game is not None and not game.boneyard.tiles and len(game.players) == 2:
+			values = self.tablebase.evaluate(EndgamePosition.from_game(game, self))
+			if values:
+				return max(opportunities, key=lambda tile: (values[tile.index], tile.value))
+		return super(TablebasePlayer, self)._pick_tile(opportunities)
+
+class BotConnection(object):
+	'''
+	A conversation with an out-of-process strategy (a "bot") in line-delimited JSON.
+
+	Every line we send holds a batch of decision requests; every line the bot sends
+	back holds decisions for some of them, in any order:
+
+		> {"requests": [{"id": 3, "player": "p1", "state": "O", "ends": [1, 4],
+		>                "hand": [[1, 2], [4, 4]], "opportunities": [[1, 2], [4, 4]],
+		>                "boneyard": 12, "hand_sizes": [5, 2]}, ...]}
+		< {"decisions": [{"id": 3, "play": 1}, ...]}
+
+	"play" is an index into "opportunities".  Only one batch is outstanding at a
+	time: requests from any number of RemotePlayers, usually in concurrent games,
+	queue up while the bot works on a batch, and go out together in the next line,
+	up to max_batch at a time.
+	'''
+	class _Pending(object):
+		'A request waiting on a decision'
+		__slots__ = ('event', 'play', 'sent')
+		def __init__(self):
+			self.event = threading.Event()
+			self.play = None
+			self.sent = False
+
+	def __init__(self, reader, writer, max_batch=64):
+		'''
+		* reader, writer - file-like objects for lines from and to the bot
+		'''
+		self.reader = reader
+		self.writer = writer
+		self.max_batch = max_batch
+		self.closed = False
+		# number of lines (batches) and requests sent so far
+		self.batches = 0
+		self.requests = 0
+		self.process = None
+		self._queue = queue.Queue()
+		self._waiting = {} # request id -> _Pending
+		self._in_flight = 0 # number of _waiting that were sent and aren't answered
+		self._lock = threading.Condition()
+		self._ids = itertools.count()
+		self._threads = [threading.Thread(target=target) for target in (self._write_loop, self._read_loop)]
+		for thread in self._threads:
+			thread.daemon = True
+			thread.start()
+
+	@classmethod
+	def open(cls, address):
+		'''
+		Connect to a bot by 'address': "tcp://HOST:PORT" for a bot listening on a socket,
+		or else a shell command that starts a bot speaking on its stdin and stdout.
+		'''
+		if address.startswith('tcp://'):
+			host, port = address[len('tcp://'):].rsplit(':', 1)
+			sock = socket.create_connection((host, int(port)))
+			return cls(sock.makefile('r'), sock.makefile('w'))
+		process = subprocess.Popen(address, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
+		connection = cls(process.stdout, process.stdin)
+		connection.process = process
+		return connection
+
+	def decide(self, request, timeout=None):
+		'''
+		Send 'request', a dict, and wait up to 'timeout' seconds for the bot's "play".
+
+		Returns None if there is no answer in time, or if the bot has gone away.
+		'''
+		with self._lock:
+			if self.closed:
+				return None
+			ident = next(self._ids)
+			pending = self._waiting[ident] = self._Pending()
+		request['id'] = ident
+		self._queue.put(request)
+		pending.event.wait(timeout)
+		with self._lock:
+			del self._waiting[ident]
+			if pending.sent and not pending.event.is_set():
+				# timed out; stop holding up the next batch
+				self._in_flight -= 1
+				self._lock.notify_all()
+		return pending.play
+
+	def close(self):
+		'''
+		Stop talking to the bot, and if we started it, wait for it to exit.
+		'''
+		self._queue.put(None)
+		self._hang_up()
+		self._threads[0].join()
+		self.writer.close()
+		if self.process is not None:
+			self.process.wait()
+		# the bot has seen the end of its input, and should hang up in turn
+		self._threads[1].join(1.0)
+
+	def _write_loop(self):
+		while True:
+			request = self._queue.get()
+			if request is None:
+				return
+			with self._lock:
+				while self._in_flight and not self.closed:
+					self._lock.wait()
+			batch = [request]
+			while len(batch) < self.max_batch:
+				try:
+					request = self._queue.get_nowait()
+				except queue.Empty:
+					break
+				if request is None:
+					# finish this batch first
+					self._queue.put(None)
+					break
+				batch.append(request)
+			with self._lock:
+				for request in batch:
+					pending = self._waiting.get(request['id'])
+					if pending is not None:
+						pending.sent = True
+						self._in_flight += 1
+			try:
+				self.writer.write(json.dumps({'requests': batch}) + '\n')
+				self.writer.flush()
+			except (IOError, ValueError, socket.error):
+				self._hang_up()
+				return
+			self.batches += 1
+			self.requests += len(batch)
+
+	def _read_loop(self):
+		for line in iter(self.reader.readline, ''):
+			try:
+				decisions = json.loads(line)['decisions']
+			except (ValueError, KeyError, TypeError):
+				# garbled; whoever was waiting on this line will time out
+				continue
+			with self._lock:
+				for decision in decisions:
+					pending = self._waiting.get(decision.get('id'))
+					if pending is not None and pending.sent and not pending.event.is_set():
+						pending.play = decision.get('play')
+						pending.event.set()
+						self._in_flight -= 1
+				self._lock.notify_all()
+		self._hang_up()
+
+	def _hang_up(self):
+		'Give up on the bot, and release everyone waiting on it'
+		with self._lock:
+			self.closed = True
+			for pending in self._waiting.values():
+				pending.event.set()
+			self._lock.notify_all()
+
+class RemotePlayer(Player):
+	'''
+	Delegates its choices to an out-of-process strategy through a BotConnection.
+
+	When the bot doesn't answer within 'timeout' seconds, answers with something that
+	isn't one of the opportunities, or has gone away, we play a random opportunity
+	instead, as RandomPlayer would, and count it in 'fallbacks'.
+	'''
+	def __init__(self, name, connection=None, timeout=1.0):
+		super(RemotePlayer, self).__init__(name)
+		self.connection = connection
+		self.timeout = timeout
+		self.fallbacks = 0
+
+	def _pick_tile(self, opportunities):
+		'''
+		Return the opportunity chosen by the bot, or a random one
+		'''
+		choice = None
+		if self.connection is not None:
+			choice = self.connection.decide(self._request(opportunities), self.timeout)
+		if not isinstance(choice, int) or not 0 <= choice < len(opportunities):
+			self.fallbacks += 1
+			return self.random.choice(opportunities)
+		return opportunities[choice]
+
+	def _request(self, opportunities):
+		'Describe this decision for the bot'
+		request = {
+			'player': self.name,
+			'hand': [tile.ends for tile in self.hand],
+			'opportunities': [tile.ends for tile in opportunities],
+		}
+		game = self.game
+		if game is not None and game.root is not None:
+			if game.state == Game.State.CHICKIE:
+				ends = [game.current_chickie.tile.a]
+			elif game.state == Game.State.ROOT:
+				ends = [game.root.tile.a]
+			else:
+				ends = sorted(set(leaf.bottom for leaf in game.root.leaves))
+			request.update(
+				state=game.state,
+				ends=ends,
+				boneyard=len(game.boneyard.tiles),
+				hand_sizes=[len(player.hand) for player in game.players],
+			)
+		return request
+
+def serve_bot(player, infile, outfile):
+	'''
+	Act as a bot: answer the requests of a BotConnection, read from 'infile', with
+	the choices of 'player', writing them to 'outfile'.  Returns at the end of 'infile'.
+
+	This is the reference implementation of the bot's side of the protocol.  Only
+	the request is available to 'player', so strategies that look at the Game play
+	as though they couldn't see the table.
+	'''
+	for line in iter(infile.readline, ''):
+		decisions = []
+		for request in json.loads(line)['requests']:
+			player.hand = Hand(Tile(a, b) for a, b in request['hand'])
+			opportunities = [Tile(a, b) for a, b in request['opportunities']]
+			chosen = player._pick_tile(opportunities)
+			decisions.append({'id': request['id'], 'play': opportunities.index(chosen)})
+		outfile.write(json.dumps({'decisions': decisions}) + '\n')
+		outfile.flush()
+
+class RunningStats(object):
+	'''
+	Mean and variance of a stream of numbers, updated one at a time (Welford's method)
+	'''
+	def __init__(self, count=0, mean=0.0, m2=0.0):
+		self.count = count
+		self.mean = mean
+		self.m2 = m2 # sum of squared differences from the mean
+
+	@classmethod
+	def from_sums(cls, count, total, total_squares):
+		'''
+		Return RunningStats of 'count' integers, given their sum and the sum of their squares.
+
+		Integer sums can be added up in any order without rounding, so this is how
+		partial results are combined when they arrive in no particular order.
+		'''
+		if not count:
+			return cls()
+		return cls(count, float(total) / count, float(count * total_squares - total * total) / count)
+
+	def add(self, value):
+		self.count += 1
+		delta = value - self.mean
+		self.mean += delta / self.count
+		self.m2 += delta * (value - self.mean)
+
+	@property
+	def variance(self):
+		'''
+		Return the sample variance, or 0.0 if there are fewer than two values
+		'''
+		return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+	@property
+	def stddev(self):
+		return self.variance ** 0.5
+
+class TracePolicy(object):
+	'''
+	Base class for GameRunner's trace policies, which decide which rounds its reporters see.
+
+	trace() is asked before a round is played, and retrace() after an untraced round is
+	played, whereupon the round is played again for the reporters; that needs a seeded
+	run, so policies that ever retrace set "replays".  By default, neither says yes.
+	'''
+	replays = False
+
+	def trace(self, round_number):
+		return False
+
+	def retrace(self, round_number, game):
+		return False
+
+class EveryNthRound(TracePolicy):
+	'''
+	Trace policy for GameRunner: trace rounds 'offset', offset + n, offset + 2n, ...
+	'''
+	def __init__(self, n, offset=0):
+		self.n = n
+		self.offset = offset
+
+	def trace(self, round_number):
+		return round_number % self.n == self.offset
+
+class RandomRounds(TracePolicy):
+	'''
+	Trace policy for GameRunner: trace each round with probability p.
+
+	The choice is made by round_random, rather than the random module, so it doesn't
+	disturb the rounds, and the same rounds are chosen every time.
+	'''
+	def __init__(self, probability, seed=0):
+		self.probability = probability
+		self.seed = seed
+
+	def trace(self, round_number):
+		return round_random(self.seed, round_number, 'trace').random() < self.probability
+
+class MatchingRounds(TracePolicy):
+	'''
+	Trace policy for GameRunner: trace the rounds for whose finished Game 'predicate' returns True.
+
+	See stalemate and score_above for predicates.
+	'''
+	replays = True
+
+	def __init__(self, predicate):
+		self.predicate = predicate
+
+	def retrace(self, round_number, game):
+		return self.predicate(game)
+
+def stalemate(game):
+	'Return True if the finished "game" ended with nobody able to play, rather than with an empty hand'
+	return all(player.hand for player in game.players)
+
+def score_above(threshold):
+	'Return a predicate for MatchingRounds, true of rounds in which somebody scores more than "threshold"'
+	return lambda game: max(game.scores.values()) > threshold
+
+class GameRunner(object):
+	def __init__(self, rounds, player_class_names, set_size, starting_hand_size, reporter_class_names,
+			checkpoint_path=None, checkpoint_interval=10000, seed=None, trace_policies=None, results_path=None,
+			engine=None):
+		'''
+		* player_class_names - names of Player classes, or callables that take a player name
+			and return a Player, e.g. to give RemotePlayers their connections
+		* reporter_class_names - names of reporter classes, or callables that return reporters
+		* checkpoint_path - if given, the state of the run is saved here every checkpoint_interval
+			rounds, and at the end, so that it may be continued by resume()
+		* seed - if given, each round draws its random numbers from round_random, and the
+			players are reseated in their original order, so that each round can be played
+			apart from the others, e.g. by ShardCoordinator or --replay-round
+		* trace_policies - if given, only the rounds chosen by one of these TracePolicy instances
+			are reported to the reporters; the others are played with a NullReporter
+		* results_path - if given, the results of every round are added to a ResultsStore
+			in this directory; call close() to write out the last of them
+		* engine - the class that plays each round; default: Game.  Another must take the
+			same arguments and report the same events (see EngineComparison)
+		'''
+		if seed is None and any(policy.replays for policy in trace_policies or []):
+			raise ValueError('Tracing rounds by their outcome requires a seed')
+		self.rounds = rounds
+		self.player_class_names = player_class_names
+		self.players = self._make_players()
+		self.seating = list(self.players)
+		self.seed = seed
+		self.set_size = set_size
+		self.starting_hand_size = starting_hand_size
+		self.reporters = [
+			(globals()[class_name] if isinstance(class_name, str) else class_name)()
+			for class_name in reporter_class_names
+		]
+		self.trace_policies = trace_policies
+		self.traced = 0 # rounds reported to the reporters
+		self.results = ResultsWriter(results_path, self.players) if results_path else None
+		self.checkpoint_path = checkpoint_path
+		self.checkpoint_interval = checkpoint_interval
+		self.engine = engine
+		self.rounds_done = 0
+		self.aggregate_scores = dict((player, 0) for player in self.players)
+		self.stats = dict((player, RunningStats()) for player in self.players)
+
+	def _make_players(self):
+		'Return a new Player for each of player_class_names'
+		return [
+			(globals()[class_name] if isinstance(class_name, str) else class_name)('p%d' % num)
+			for num, class_name in enumerate(self.player_class_names)
+		]
+
+	def _record(self, game):
+		'Add the scores of a finished round to the totals'
+		for player in self.players:
+			self.aggregate_scores[player] += game.scores[player]
+			self.stats[player].add(game.scores[player])
+		if self.results:
+			self.results.append(game, self.seating)
+
+	def _play(self, players, seating, round_number, rng=random):
+		'''
+		Play round number 'round_number' with 'players', who sit as in 'seating' if the run
+		is seeded, and otherwise draw their random numbers from 'rng'.  Returns the finished
+		Game, and whether the reporters saw it.
+		'''
+		traced = self.trace_policies is None or any(policy.trace(round_number) for policy in self.trace_policies)
+		# the required root cycles through the set, one round at a time
+		required_root = round_number % (self.set_size + 1)
+		if self.seed is not None:
+			players[:] = seating
+		engine = self.engine or Game
+		game = engine(required_root, self.set_size, self.starting_hand_size, players,
+			reporters=self.reporters if traced else None, seed=self.seed, round_number=round_number, rng=rng)
+		game.run()
+		if not traced and any(policy.retrace(round_number, game) for policy in self.trace_policies):
+			# play it again, in just the same way, for the reporters
+			players[:] = seating
+			game = engine(required_root, self.set_size, self.starting_hand_size, players,
+				reporters=self.reporters, seed=self.seed, round_number=round_number)
+			game.run()
+			traced = True
+		return game, traced
+
+	def run(self):
+		while self.rounds_done < self.rounds:
+			game, traced = self._play(self.players, self.seating, self.rounds_done)
+			self._record(game)
+			self.traced += traced
+			self.rounds_done += 1
+			if self.checkpoint_path and (
+					self.rounds_done % self.checkpoint_interval == 0 or self.rounds_done == self.rounds):
+				self.save_checkpoint()
+
+	def close(self):
+		'''
+		Write out anything buffered, i.e. results
+		'''
+		if self.results:
+			self.results.close()
+
+	def _configuration(self):
+		'Return what a checkpoint must agree with to be resumed by this runner'
+		return {
+			'players': sorted((player.name, player.__class__.__name__) for player in self.players),
+			'set_size': self.set_size,
+			'starting_hand_size': self.starting_hand_size,
+			# rounds after the checkpoint must come from the same random numbers
+			'seed': self.seed,
+		}
+
+	def save_checkpoint(self):
+		'''
+		Save the state of the run to checkpoint_path.
+
+		The checkpoint is written to a temporary file and renamed over the last one,
+		so there's always a complete checkpoint on disk, even if we're killed mid-write.
+		'''
+		by_name = lambda values: dict((player.name, values[player]) for player in self.players)
+		state = {
+			'configuration': self._configuration(),
+			'rounds_done': self.rounds_done,
+			'aggregate_scores': by_name(self.aggregate_scores),
+			'stats': dict((name, (stats.count, stats.mean, stats.m2)) for name, stats in by_name(self.stats).items()),
+			# Game reorders the players each round, and the next round starts from that order
+			'seating': [player.name for player in self.players],
+			'random_state': random.getstate(),
+			'results_rows': self.results.rows() if self.results else None,
+		}
+		temp_path = self.checkpoint_path + '.tmp'
+		with open(temp_path, 'wb') as f:
+			pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+			f.flush()
+			os.fsync(f.fileno())
+		os.rename(temp_path, self.checkpoint_path)
+
+	def resume(self):
+		'''
+		Restore the state of the run from checkpoint_path.
+
+		run() then carries on from where the checkpointed run left off, with the same
+		results as if it had never stopped.  Raises ValueError if the checkpoint is of
+		a run with different players or sets.
+		'''
+		with open(self.checkpoint_path, 'rb') as f:
+			state = pickle.load(f)
+		if state['configuration'] != self._configuration():
+			raise ValueError('Checkpoint %s is of a different run: %r' % (self.checkpoint_path, state['configuration']))
+		players = dict((player.name, player) for player in self.players)
+		self.rounds_done = state['rounds_done']
+		self.aggregate_scores = dict((players[name], score) for name, score in state['aggregate_scores'].items())
+		self.stats = dict((players[name], RunningStats(*stats)) for name, stats in state['stats'].items())
+		self.players[:] = [players[name] for name in state['seating']]
+		random.setstate(state['random_state'])
+		if self.results and state['results_rows'] is not None:
+			# rounds played after the checkpoint will be played again
+			self.results.truncate(state['results_rows'])
+
+class StratifiedRunner(GameRunner):
+	'''
+	Plays a run stratified by required root, and estimates each player's mean score from the strata.
+
+	GameRunner plays round k with required root k % (set_size + 1); this runner chooses
+	which rounds to play, so that each root gets the rounds allocated to it: evenly, or
+	by Neyman allocation, in proportion to the spread of the scores at that root (the
+	square root of the sum of the players' variances), as found by pilot_rounds
+	rounds at each root.  Rounds are numbered as in GameRunner, so a seeded round plays
+	the same either way.
+
+	Every root is equally likely in a GameRunner run, so estimates() weighs each
+	stratum's mean equally.  The first seat is dealt by the round itself, so it can't
+	be allocated to, but the scores in each (required root, first seat) cell are kept
+	in cell_stats.
+	'''
+	EVEN, NEYMAN = ('even', 'neyman')
+
+	def __init__(self, rounds, player_class_names, set_size, starting_hand_size, reporter_class_names,
+			allocation=EVEN, pilot_rounds=None, seed=None, trace_policies=None, results_path=None):
+		'''
+		* allocation - EVEN or NEYMAN
+		* pilot_rounds - rounds per root played before a Neyman allocation; default: a tenth of
+			an even allocation, and at least 2
+		'''
+		super(StratifiedRunner, self).__init__(rounds, player_class_names, set_size, starting_hand_size,
+			reporter_class_names, seed=seed, trace_policies=trace_policies, results_path=results_path)
+		num_strata = set_size + 1
+		self.allocation = allocation
+		self.pilot_rounds = pilot_rounds or max(2, rounds // (10 * num_strata))
+		# by required root: the number of rounds played, and the stats of each player's scores
+		self.played = [0] * num_strata
+		self.strata_stats = [dict((player, RunningStats()) for player in self.players) for root in range(num_strata)]
+		# by (required root, seat of the first player): the stats of each player's scores
+		self.cell_stats = collections.defaultdict(lambda: dict((player, RunningStats()) for player in self.players))
+
+	def _record(self, game):
+		super(StratifiedRunner, self)._record(game)
+		root = game.required_root
+		first = self.seating.index(game.players[0])
+		self.played[root] += 1
+		for player in self.players:
+			self.strata_stats[root][player].add(game.scores[player])
+			self.cell_stats[root, first][player].add(game.scores[player])
+
+	def allocate(self, rounds, weights):
+		'''
+		Return the number of rounds of 'rounds' for each stratum, in proportion to 'weights';
+		the rounds lost by rounding down go to the strata with the largest remainders
+		'''
+		total = float(sum(weights))
+		if not total:
+			weights, total = [1] * len(weights), float(len(weights))
+		shares = [rounds * weight / total for weight in weights]
+		counts = [int(share) for share in shares]
+		by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+		for i in by_remainder[:rounds - sum(counts)]:
+			counts[i] += 1
+		return counts
+
+	def run(self):
+		num_strata = self.set_size + 1
+		if self.allocation == self.NEYMAN:
+			pilot = min(self.pilot_rounds, self.rounds // num_strata)
+			self._play_strata([pilot] * num_strata)
+			spreads = [sum(stats.variance for stats in self.strata_stats[root].values()) ** 0.5
+				for root in range(num_strata)]
+			targets = [pilot + extra for extra in self.allocate(self.rounds - pilot * num_strata, spreads)]
+		else:
+			targets = self.allocate(self.rounds, [1] * num_strata)
+		self._play_strata(targets)
+
+	def _play_strata(self, targets):
+		'play rounds, a root at a time in turn, until each root has had targets[root] of them'
+		num_strata = self.set_size + 1
+		while any(played < target for played, target in zip(self.played, targets)):
+			for root in range(num_strata):
+				if self.played[root] < targets[root]:
+					game, traced = self._play(self.players, self.seating, root + self.played[root] * num_strata)
+					self._record(game)
+					self.traced += traced
+					self.rounds_done += 1
+
+	def estimates(self):
+		'''
+		Return a dict mapping each player to the stratified estimate of their mean score per
+		round, and its variance: the means and variances of the means of the strata, weighed
+		equally.  Strata with no rounds are left out.
+		'''
+		strata = [stats for stats in self.strata_stats if next(iter(stats.values())).count]
+		weight = 1.0 / len(strata) if strata else 0.0
+		return dict((player, (
+			sum(weight * stats[player].mean for stats in strata),
+			sum(weight * weight * stats[player].variance / stats[player].count for stats in strata),
+		)) for player in self.players)
+
+class ConcurrentGameRunner(GameRunner):
+	'''
+	Runs rounds on several threads at once, each with its own set of players.
+
+	This pays off when players spend their turns waiting, e.g. RemotePlayers waiting
+	on bots: while one round waits, the others carry on, and their requests to the
+	same bot are sent together.  Scores are totalled by seat in aggregate_scores,
+	under the players of the first set.
+
+	The rounds in play share nothing that changes but the totals, which are kept under
+	a lock: each thread has its players, and unless the run is seeded, a random.Random
+	of its own.  So on a free-threaded build of Python they play in parallel across
+	cores, as long as the reporters are thread-safe (as BufferedLoggingReporter and
+	MetricsReporter are).
+	'''
+	def __init__(self, rounds, player_class_names, set_size, starting_hand_size, reporter_class_names, concurrency,
+			seed=None, trace_policies=None, results_path=None):
+		super(ConcurrentGameRunner, self).__init__(rounds, player_class_names, set_size, starting_hand_size,
+			reporter_class_names, seed=seed, trace_policies=trace_policies, results_path=results_path)
+		self.concurrency = concurrency
+		# rounds played by each thread, for ProgressMonitor
+		self.worker_rounds = dict(('thread %d' % num, 0) for num in range(concurrency))
+
+	def run(self):
+		rounds = iter(range(self.rounds))
+		lock = threading.Lock()
+		errors = []
+
+		def work(name, players):
+			'play rounds until there are none left'
+			seats = dict((player, seat) for seat, player in enumerate(players))
+			seating = list(players)
+			# seeded from the OS, so that no two threads deal the same rounds
+			rng = random.Random()
+			while not errors:
+				with lock:
+					i = next(rounds, None)
+				if i is None:
+					return
+				try:
+					game, traced = self._play(players, seating, i, rng)
+				except Exception:
+					errors.append(sys.exc_info())
+					return
+				with lock:
+					for player, score in game.scores.items():
+						self.aggregate_scores[self.players[seats[player]]] += score
+						self.stats[self.players[seats[player]]].add(score)
+					self.rounds_done += 1
+					self.traced += traced
+					self.worker_rounds[name] += 1
+					if self.results:
+						self.results.append(game, seating)
+
+		threads = [threading.Thread(target=work, args=('thread %d' % num, list(self.players) if num == 0 else self._make_players()))
+			for num in range(self.concurrency)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		if errors:
+			exc_type, exc_value, tb = errors[0]
+			raise exc_value.with_traceback(tb)
+
+class ShardRunner(GameRunner):
+	'''
+	Plays the rounds numbered start to start + count - 1 of a seeded run, for a ShardCoordinator
+	'''
+	def __init__(self, start, count, player_class_names, set_size, starting_hand_size, seed):
+		super(ShardRunner, self).__init__(start + count, player_class_names, set_size, starting_hand_size, [], seed=seed)
+		self.rounds_done = start
+		self.square_scores = dict((player, 0) for player in self.players)
+
+	def _record(self, game):
+		super(ShardRunner, self)._record(game)
+		for player in self.players:
+			self.square_scores[player] += game.scores[player] ** 2
+
+	def result(self):
+		'Return the sums of scores and squared scores, in order of seats'
+		return {
+			'scores': [self.aggregate_scores[player] for player in self.seating],
+			'squares': [self.square_scores[player] for player in self.seating],
+		}
+
+def run_shard(job, start, count):
+	'''
+	Play 'count' rounds from round 'start' of the seeded run described by 'job', a dict of
+	players, set_size, starting_hand_size and seed.  Returns ShardRunner.result().
+	'''
+	runner = ShardRunner(start, count, job['players'], job['set_size'], job['starting_hand_size'], job['seed'])
+	runner.run()
+	return runner.result()
+
+def run_worker(address):
+	'''
+	Connect to the ShardCoordinator at 'address', a (host, port) pair, and play the
+	shards it assigns until it says we're done.
+	'''
+	sock = socket.create_connection(address)
+	reader, writer = sock.makefile('r'), sock.makefile('w')
+	try:
+		for line in iter(reader.readline, ''):
+			message = json.loads(line)
+			if message.get('done'):
+				break
+			start_time = time.time()
+			result = run_shard(message['job'], message['start'], message['count'])
+			result.update(start=message['start'], count=message['count'], seconds=time.time() - start_time)
+			writer.write(json.dumps(result) + '\n')
+			writer.flush()
+	finally:
+		sock.close()
+
+class ShardCoordinator(GameRunner):
+	'''
+	Splits a seeded run into shards of consecutive rounds, and hands them to workers
+	(see run_worker) that connect over TCP.
+
+	Every round of a seeded run is independent of the others, so the results don't
+	depend on how the rounds are split up, or who plays them.  Each worker's shards are
+	sized to take about shard_seconds at the rate it played the last one.  A shard
+	whose worker disconnects before finishing it is given to the next worker to ask.
+
+	Scores are totalled by seat in aggregate_scores; stats are built from integer
+	sums, so they come out the same whatever order the shards finish in.
+	'''
+	def __init__(self, rounds, player_class_names, set_size, starting_hand_size, seed,
+			address=('127.0.0.1', 0), shard_seconds=10.0, first_shard=100):
+		super(ShardCoordinator, self).__init__(rounds, player_class_names, set_size, starting_hand_size, [], seed=seed)
+		self.shard_seconds = shard_seconds
+		self.first_shard = first_shard
+		self.job = {
+			'players': player_class_names,
+			'set_size': set_size,
+			'starting_hand_size': starting_hand_size,
+			'seed': seed,
+		}
+		self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self.listener.bind(address)
+		self.listener.listen(16)
+		self.address = self.listener.getsockname()
+		self.shards = 0 # shards finished
+		self.retries = 0 # shards reassigned after their worker went away
+		self._lock = threading.Condition()
+		self._next_round = 0
+		self._lost = [] # (start, count) of shards to reassign
+		self._sums = [[0, 0] for player in self.players]
+		# rounds played by each worker, by address, for ProgressMonitor
+		self.worker_rounds = {}
+
+	def _assign(self, rate):
+		'''
+		Return the (start, count) of the next shard for a worker that plays 'rate' rounds
+		per second, or None if every round has been played.
+
+		Waits while every round is assigned, but some may yet be lost.
+		'''
+		with self._lock:
+			while True:
+				if self._lost:
+					self._lost.sort()
+					return self._lost.pop(0)
+				if self._next_round < self.rounds:
+					count = self.first_shard if rate is None else max(1, int(rate * self.shard_seconds))
+					count = min(count, self.rounds - self._next_round)
+					shard = (self._next_round, count)
+					self._next_round += count
+					return shard
+				if self.rounds_done == self.rounds:
+					return None
+				self._lock.wait(0.1)
+
+	def _serve(self, sock):
+		'assign shards to the worker on "sock" until there are none left'
+		reader, writer = sock.makefile('r'), sock.makefile('w')
+		name = '%s:%d' % sock.getpeername()[:2]
+		rate = None
+		try:
+			while True:
+				shard = self._assign(rate)
+				if shard is None:
+					writer.write(json.dumps({'done': True}) + '\n')
+					writer.flush()
+					return
+				try:
+					writer.write(json.dumps({'job': self.job, 'start': shard[0], 'count': shard[1]}) + '\n')
+					writer.flush()
+					line = reader.readline()
+					result = json.loads(line)
+				except (socket.error, IOError, ValueError):
+					# the worker went away (or sent nonsense); someone else can play its shard
+					with self._lock:
+						self._lost.append(shard)
+						self.retries += 1
+						self._lock.notify_all()
+					return
+				with self._lock:
+					for player, sums, score, square in zip(self.players, self._sums, result['scores'], result['squares']):
+						self.aggregate_scores[player] += score
+						sums[0] += score
+						sums[1] += square
+					self.rounds_done += shard[1]
+					self.worker_rounds[name] = self.worker_rounds.get(name, 0) + shard[1]
+					self.shards += 1
+					self._lock.notify_all()
+				rate = shard[1] / max(result['seconds'], 1e-3)
+		finally:
+			sock.close()
+
+	def run(self):
+		'''
+		Accept workers until every round has been played, then work out the stats of their results
+		'''
+		self.listener.settimeout(0.1)
+		threads = []
+		try:
+			while True:
+				with self._lock:
+					if self.rounds_done == self.rounds:
+						break
+				try:
+					sock, address = self.listener.accept()
+				except socket.timeout:
+					continue
+				sock.settimeout(None)
+				thread = threading.Thread(target=self._serve, args=(sock,))
+				thread.start()
+				threads.append(thread)
+		finally:
+			self.listener.close()
+		for thread in threads:
+			thread.join()
+		for player, (total, total_squares) in zip(self.players, self._sums):
+			self.stats[player] = RunningStats.from_sums(self.rounds_done, total, total_squares)
+
+# a worker process's view of ProcessGameRunner's shared results, attached by _attach_results
+_shared_results = None
+
+def _attach_results(name):
+	'Pool initializer: attach to the shared memory named "name", as an array of ints'
+	global _shared_results
+	try:
+		# the parent owns the memory; it's not for the worker to clean up (Python 3.13+)
+		memory = multiprocessing.shared_memory.SharedMemory(name=name, track=False)
+	except TypeError:
+		memory = multiprocessing.shared_memory.SharedMemory(name=name)
+	_shared_results = (memory, memory.buf.cast('i'))
+
+class BlockRunner(GameRunner):
+	'''
+	Plays the rounds numbered start to start + count - 1 of a seeded run, for a ProcessGameRunner,
+	writing each round's scores, in order of seats, to 'results' from 'offset' on
+	'''
+	def __init__(self, start, count, player_class_names, set_size, starting_hand_size, seed, results, offset):
+		super(BlockRunner, self).__init__(start + count, player_class_names, set_size, starting_hand_size, [], seed=seed)
+		self.rounds_done = start
+		self.results = None
+		self._shared = results
+		self._offset = offset
+
+	def _record(self, game):
+		for player in self.seating:
+			self._shared[self._offset] = game.scores[player]
+			self._offset += 1
+
+def play_block(job, start, count, offset):
+	'''
+	Play 'count' rounds from round 'start' of the seeded run described by 'job' (see run_shard),
+	into the shared results from 'offset' on.  Returns the arguments, to say which block is done.
+	'''
+	BlockRunner(start, count, job['players'], job['set_size'], job['starting_hand_size'], job['seed'],
+		_shared_results[1], offset).run()
+	return start, count, offset
+
+class ProcessGameRunner(GameRunner):
+	'''
+	Plays a seeded run on a pool of worker processes, which write the scores of every
+	round straight into shared memory rather than sending them back.
+
+	The run is played in blocks of block_rounds rounds, each written to one of a ring of
+	slots, twice as many as there are workers; only the block's start and slot pass
+	through the pool.  As each block is done, its scores are merged into aggregate_scores,
+	score_counts (how many rounds each player ended with each score) and integer sums
+	for the stats, so they come out the same whatever order the blocks finish in, and
+	the slot is handed to the next block.
+	'''
+	def __init__(self, rounds, player_class_names, set_size, starting_hand_size, seed, processes=None,
+			block_rounds=1000):
+		super(ProcessGameRunner, self).__init__(rounds, player_class_names, set_size, starting_hand_size, [], seed=seed)
+		self.processes = processes or multiprocessing.cpu_count()
+		self.block_rounds = block_rounds
+		self.job = {
+			'players': player_class_names,
+			'set_size': set_size,
+			'starting_hand_size': starting_hand_size,
+			'seed': seed,
+		}
+		self.score_counts = dict((player, collections.Counter()) for player in self.players)
+		self._sums = [[0, 0] for player in self.players]
+
+	def run(self):
+		seats = len(self.seating)
+		slot_size = self.block_rounds * seats
+		slots = 2 * self.processes
+		memory = multiprocessing.shared_memory.SharedMemory(create=True, size=slots * slot_size * 4)
+		results = memory.buf.cast('i')
+		pool = multiprocessing.Pool(self.processes, initializer=_attach_results, initargs=(memory.name,))
+		done = queue.Queue()
+		try:
+			starts = iter(range(self.rounds_done, self.rounds, self.block_rounds))
+			free = list(range(0, slots * slot_size, slot_size))
+			pending = 0
+			while True:
+				for start in starts:
+					pool.apply_async(play_block, (self.job, start, min(self.block_rounds, self.rounds - start), free.pop()),
+						callback=done.put, error_callback=done.put)
+					pending += 1
+					if not free:
+						break
+				if not pending:
+					break
+				block = done.get()
+				if isinstance(block, BaseException):
+					raise block
+				start, count, offset = block
+				self._merge(results[offset:offset + count * seats], count)
+				free.append(offset)
+				pending -= 1
+		finally:
+			pool.terminate()
+			pool.join()
+			results.release()
+			memory.close()
+			memory.unlink()
+		for player, (total, total_squares) in zip(self.seating, self._sums):
+			self.stats[player] = RunningStats.from_sums(self.rounds_done, total, total_squares)
+
+	def _merge(self, block, count):
+		'add the scores of "count" rounds, in order of seats in "block", to the totals'
+		seats = len(self.seating)
+		for seat, (player, sums) in enumerate(zip(self.seating, self._sums)):
+			scores = block[seat::seats]
+			total = sum(scores)
+			self.aggregate_scores[player] += total
+			sums[0] += total
+			sums[1] += sum(score * score for score in scores)
+			self.score_counts[player].update(scores)
+		block.release()
+		self.rounds_done += count
+
+def sweep_points(spec):
+	'''
+	Return a list of the points of a parameter sweep, each a dict of GameRunner arguments.
+
+	'spec' is a dict, e.g. loaded from JSON, of:
+	* set_size - list of set sizes
+	* starting_hand_size - list of starting hand sizes
+	* players - list of line-ups, each a list of Player class names
+	* rounds - number of rounds to play at each point
+	* seed - optional; seed of every point's run.  Default: 0
+
+	Every combination of set size, hand size and line-up is a point.  Raises ValueError
+	for a spec missing any of these, or a point whose hands would need more tiles than
+	there are in the set.
+	'''
+	for key in ('set_size', 'starting_hand_size', 'players', 'rounds'):
+		if key not in spec:
+			raise ValueError('Sweep spec is missing "%s"' % key)
+	points = []
+	for set_size, starting_hand_size, players in itertools.product(
+			spec['set_size'], spec['starting_hand_size'], spec['players']):
+		if len(players) * starting_hand_size > len(tile_catalogue(set_size)):
+			raise ValueError('Not enough tiles in a double-%d set for %d hands of %d' % (
+				set_size, len(players), starting_hand_size))
+		points.append({
+			'index': len(points),
+			'set_size': set_size,
+			'starting_hand_size': starting_hand_size,
+			'players': list(players),
+			'rounds': spec['rounds'],
+			'seed': spec.get('seed', 0),
+		})
+	return points
+
+def expected_cost(point):
+	'''
+	Return a rough figure for the time a sweep point will take; rounds run longer
+	with more tiles, and each turn takes longer with more players
+	'''
+	return point['rounds'] * len(tile_catalogue(point['set_size'])) * len(point['players'])
+
+def run_sweep_point(point):
+	'''
+	Play the rounds of one point of a sweep, returning its results as a dict
+	'''
+	start_time = time.time()
+	runner = GameRunner(point['rounds'], point['players'], point['set_size'], point['starting_hand_size'], [],
+		seed=point['seed'])
+	runner.run()
+	return {
+		'point': point,
+		'seconds': time.time() - start_time,
+		'scores': [
+			(runner.aggregate_scores[player], runner.stats[player].mean, runner.stats[player].stddev)
+			for player in runner.seating
+		],
+	}
+
+class Sweep(object):
+	'''
+	Runs every point of a parameter sweep (see sweep_points) on a pool of worker processes.
+
+	Points are handed out longest-expected first, so that a long one isn't left
+	running on its own at the end.  Each point's run is seeded, so the results don't
+	depend on which worker played it.  The tile sets are made before the workers are
+	started, so that they share them.
+	'''
+	COLUMNS = ('set_size', 'starting_hand_size', 'num_players', 'players', 'seat', 'player',
+		'rounds', 'total_score', 'mean_score', 'stddev_score', 'seconds')
+
+	def __init__(self, spec, processes=None):
+		'''
+		* processes - number of worker processes; defaults to the number of CPUs.  With 1,
+			points are played in this process.
+		'''
+		self.points = sweep_points(spec)
+		self.processes = processes or multiprocessing.cpu_count()
+		self.results = []
+
+	def run(self):
+		for set_size in set(point['set_size'] for point in self.points):
+			tile_set(set_size)
+		ordered = sorted(self.points, key=expected_cost, reverse=True)
+		if self.processes == 1:
+			results = [run_sweep_point(point) for point in ordered]
+		else:
+			pool = multiprocessing.Pool(self.processes)
+			try:
+				results = list(pool.imap_unordered(run_sweep_point, ordered, chunksize=1))
+			finally:
+				pool.close()
+				pool.join()
+		self.results = sorted(results, key=lambda result: result['point']['index'])
+
+	def rows(self):
+		'''
+		Generate a row of the results table for each seat at each point, in the order of COLUMNS
+		'''
+		for result in self.results:
+			point = result['point']
+			for seat, (class_name, (total, mean, stddev)) in enumerate(zip(point['players'], result['scores'])):
+				yield (point['set_size'], point['starting_hand_size'], len(point['players']), '+'.join(point['players']),
+					seat, class_name, point['rounds'], total, '%.6f' % mean, '%.6f' % stddev, '%.3f' % result['seconds'])
+
+	def write_table(self, outfile):
+		'''
+		Write the results, as CSV with a header row, to the file 'outfile'
+		'''
+		writer = csv.writer(outfile)
+		writer.writerow(self.COLUMNS)
+		writer.writerows(self.rows())
+
+class EngineComparison(object):
+	'''
+	Checks that a candidate engine (e.g. a faster rewrite of Game) plays just the same rounds as the reference.
+
+	Each round of a seeded run is played by both engines, with new players each time,
+	and the events they report are compared by TraceReporter: the deal, every draw,
+	state and play, and the final scores.  Seeded rounds can be played apart from the
+	others, so a divergence is reproduced by the seed, the round number, and the sets.
+	'''
+	def __init__(self, candidate, player_class_names, set_size, starting_hand_size, seed=0, reference=None):
+		'''
+		* candidate, reference - classes taking the arguments of Game; the reference defaults to Game
+		'''
+		self.candidate = candidate
+		self.reference = reference or Game
+		self.player_class_names = player_class_names
+		self.set_size = set_size
+		self.starting_hand_size = starting_hand_size
+		self.seed = seed
+
+	def trace(self, engine, round_number, set_size=None, starting_hand_size=None):
+		'Return the events of round "round_number", played by "engine"'
+		trace = TraceReporter()
+		runner = GameRunner(1, self.player_class_names, set_size or self.set_size,
+			starting_hand_size or self.starting_hand_size, [lambda: trace], seed=self.seed, engine=engine)
+		runner._play(runner.players, runner.seating, round_number)
+		return trace.events
+
+	def divergence(self, round_number, set_size=None, starting_hand_size=None):
+		'''
+		Return (index, reference event, candidate event) of the first difference between the
+		engines' plays of a round, with None for the event of an engine that stopped first;
+		or None if they're the same
+		'''
+		expected = self.trace(self.reference, round_number, set_size, starting_hand_size)
+		actual = self.trace(self.candidate, round_number, set_size, starting_hand_size)
+		for index, (a, b) in enumerate(itertools.zip_longest(expected, actual)):
+			if a != b:
+				return index, a, b
+		return None
+
+	def check(self, rounds):
+		'''
+		Compare rounds 0 to 'rounds' - 1, and return None if the engines agree on all of them.
+
+		Otherwise, return a dict describing the first divergence, shrunk to the smallest
+		starting hand and then set that still diverge in one of those rounds: seed, round,
+		set_size, starting_hand_size, event (the index of the first event that differs),
+		reference and candidate (the events).
+		'''
+		found = self._first(rounds, self.set_size, self.starting_hand_size)
+		if found is None:
+			return None
+		for starting_hand_size in range(1, self.starting_hand_size):
+			smaller = self._first(rounds, found['set_size'], starting_hand_size)
+			if smaller is not None:
+				found = smaller
+				break
+		for set_size in range(1, self.set_size):
+			if len(tile_catalogue(set_size)) < len(self.player_class_names) * found['starting_hand_size']:
+				# not enough tiles to deal
+				continue
+			smaller = self._first(rounds, set_size, found['starting_hand_size'])
+			if smaller is not None:
+				found = smaller
+				break
+		return found
+
+	def _first(self, rounds, set_size, starting_hand_size):
+		'Return the first divergence in rounds 0 to "rounds" - 1 with the given sets, as for check, or None'
+		for round_number in range(rounds):
+			difference = self.divergence(round_number, set_size, starting_hand_size)
+			if difference is not None:
+				index, reference, candidate = difference
+				return {
+					'seed': self.seed,
+					'round': round_number,
+					'set_size': set_size,
+					'starting_hand_size': starting_hand_size,
+					'event': index,
+					'reference': reference,
+					'candidate': candidate,
+				}
+		return None
+
+	def timings(self, rounds):
+		'''
+		Return the seconds taken to play rounds 0 to 'rounds' - 1 by the reference and by the candidate
+		'''
+		seconds = []
+		for engine in self.reference, self.candidate:
+			runner = GameRunner(rounds, self.player_class_names, self.set_size, self.starting_hand_size, [],
+				seed=self.seed, engine=engine)
+			start = time.perf_counter()
+			runner.run()
+			seconds.append(time.perf_counter() - start)
+		return tuple(seconds)
+
+class DecisionCorpus(object):
+	'''
+	Positions at which players had to choose a play, recorded from real rounds, for
+	timing strategies on the very same decisions without playing rounds around them.
+
+	Each position is a dict holding all of the round that a strategy could look at:
+	set_size, starting_hand_size, required_root, turns, state, mover (a seat), hands (the
+	tile indices of each seat's hand, in order), boneyard (bitmask), board (a
+	[tile index, parent's position] pair for each node, root first, parents before
+	children), chickie (position of the chickenfoot in progress, or None), voids (bitmask
+	of pips per seat; see PublicKnowledge) and opportunities (tile indices, in order).
+	'''
+	def __init__(self, positions=()):
+		self.positions = list(positions)
+
+	def __len__(self):
+		return len(self.positions)
+
+	@classmethod
+	def capture(cls, rounds, player_class_names, set_size, starting_hand_size, seed=0, per_stratum=100):
+		'''
+		Play 'rounds' rounds of a run seeded by 'seed', keeping a uniform sample of up to
+		'per_stratum' of the decisions made in each state with each size of hand.
+		'''
+		runner = GameRunner(rounds, player_class_names, set_size, starting_hand_size, [], seed=seed)
+		rng = round_random(seed, rounds, 'corpus')
+		strata = collections.defaultdict(list)
+		seen = collections.Counter()
+		for round_number in range(rounds):
+			runner.players[:] = runner.seating
+			game = Game(round_number % (set_size + 1), set_size, starting_hand_size, runner.players,
+				seed=seed, round_number=round_number)
+			decisions = game.decisions()
+			try:
+				player, opportunities = next(decisions)
+				while True:
+					stratum = (game.state, len(player.hand))
+					seen[stratum] += 1
+					# reservoir sampling: every decision so far is as likely to be kept
+					slot = len(strata[stratum]) if len(strata[stratum]) < per_stratum else rng.randrange(seen[stratum])
+					if slot < per_stratum:
+						position = cls._describe(game, player, opportunities)
+						if slot == len(strata[stratum]):
+							strata[stratum].append(position)
+						else:
+							strata[stratum][slot] = position
+					player, opportunities = decisions.send(player.pick_tile(opportunities))
+			except StopIteration:
+				pass
+		return cls(position for stratum in sorted(strata) for position in strata[stratum])
+
+	@staticmethod
+	def _describe(game, player, opportunities):
+		'Return the position of "game", with "player" to choose from "opportunities"'
+		nodes = []
+		board = []
+		def walk(node, parent):
+			nodes.append(node)
+			board.append([node.tile.index, parent])
+			position = len(nodes) - 1
+			for child in node.children:
+				walk(child, position)
+		walk(game.root, -1)
+		return {
+			'set_size': game.set_size,
+			'starting_hand_size': game.starting_hand_size,
+			'required_root': game.required_root,
+			'turns': game.turns,
+			'state': game.state,
+			'mover': game.players.index(player),
+			'hands': [[tile.index for tile in seat.hand] for seat in game.players],
+			'boneyard': sum(1 << tile.index for tile in game.boneyard.tiles),
+			'board': board,
+			'chickie': nodes.index(game.current_chickie) if game.state == Game.State.CHICKIE else None,
+			'voids': [game.public.voids[seat] for seat in game.players],
+			'opportunities': [tile.index for tile in opportunities],
+		}
+
+	def game(self, number, player_class):
+		'''
+		Rebuild position 'number', with a 'player_class' (a Player class, or a callable that
+		takes a name and returns a Player) to move.  Returns the Game, the mover, and their
+		opportunities.  The other seats are taken by plain Players.
+		'''
+		position = self.positions[number]
+		tiles = tile_set(position['set_size'])
+		players = [(player_class if seat == position['mover'] else Player)('p%d' % seat)
+			for seat in range(len(position['hands']))]
+		# seeded, so that the players' random choices are the same every time
+		game = Game(position['required_root'], position['set_size'], position['starting_hand_size'], players,
+			seed=0, round_number=number)
+		for player, hand in zip(players, position['hands']):
+			player.hand = Hand(tiles[index] for index in hand)
+		game.boneyard.tiles = [tiles[index] for index in bits(position['boneyard'])]
+		nodes = []
+		for index, parent in position['board']:
+			nodes.append(Root(tiles[index]) if parent < 0 else nodes[parent].add_child(tiles[index]))
+		game.root = nodes[0]
+		game.state = position['state']
+		game.current_chickie = None if position['chickie'] is None else nodes[position['chickie']]
+		game.turns = position['turns']
+		public = game.public
+		for index, parent in position['board']:
+			public.unplayed &= ~(1 << index)
+		for player, voids in zip(players, position['voids']):
+			public.hand_sizes[player] = len(player.hand)
+			public.lacks(player, list(bits(voids)))
+		mover = players[position['mover']]
+		held = dict((tile.index, tile) for tile in mover.hand)
+		return game, mover, [held[index] for index in position['opportunities']]
+
+	def benchmark(self, player_class, repeat=1):
+		'''
+		Time the _pick_tile of a 'player_class' on every position, 'repeat' times over.
+		Returns a dict of the number of decisions, their total seconds, decisions per
+		second, and the 50th, 90th and 99th percentile and the longest of their latencies.
+		'''
+		timer = time.perf_counter
+		latencies = []
+		for number in range(len(self.positions)):
+			game, player, opportunities = self.game(number, player_class)
+			for i in range(repeat):
+				start = timer()
+				player._pick_tile(opportunities)
+				latencies.append(timer() - start)
+		latencies.sort()
+		seconds = sum(latencies)
+		percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+		return {
+			'decisions': len(latencies),
+			'seconds': seconds,
+			'per_second': len(latencies) / seconds if seconds else 0.0,
+			'p50': percentile(0.5),
+			'p90': percentile(0.9),
+			'p99': percentile(0.99),
+			'max': latencies[-1] if latencies else 0.0,
+		}
+
+	def save(self, path):
+		'Write the positions to "path", as gzipped JSON lines'
+		temp_path = path + '.tmp'
+		with gzip.open(temp_path, 'wt') as f:
+			for position in self.positions:
+				f.write(json.dumps(position, separators=(',', ':')) + '\n')
+		os.rename(temp_path, path)
+
+	@classmethod
+	def load(cls, path):
+		'Read positions written by save'
+		with gzip.open(path, 'rt') as f:
+			return cls(json.loads(line) for line in f)
+
+def interpreter_name():
+	'Return the name and version of the Python running us, e.g. "CPython 3.12.1"'
+	return '%s %s' % (platform.python_implementation(), platform.python_version())
+
+def benchmark_interpreters(interpreters, rounds, players, set_size, starting_hand_size, seed=0):
+	'''
+	Play the same seeded run under each of 'interpreters', commands such as "python3.12"
+	or "pypy3", one after the other.  Returns a (command, interpreter_name(), rounds/sec)
+	tuple for each, as reported by the run itself, so start-up isn't counted.
+	'''
+	results = []
+	for interpreter in interpreters:
+		command = [interpreter, os.path.abspath(__file__), str(rounds), '--seed', str(seed),
+			'--set-size', str(set_size), '--starting-hand-size', str(starting_hand_size)]
+		for class_name in players:
+			command += ['--player', class_name]
+		output = subprocess.check_output(command, universal_newlines=True)
+		summary = dict(line.split(':', 1) for line in output.splitlines() if ':' in line)
+		results.append((interpreter, summary['Interpreter'].strip(), float(summary['Rounds/sec'])))
+	return results
+
+def validate_job(request, max_rounds=1000000):
+	'''
+	Return the job (see run_shard) and number of rounds asked for by 'request', a dict
+	as sent to SimulationService.  Raises ValueError if there's anything wrong with it,
+	including asking for more than 'max_rounds' rounds.
+	'''
+	try:
+		players = [str(name) for name in request['players']]
+		job = {
+			'players': players,
+			'set_size': int(request.get('set_size', 9)),
+			'starting_hand_size': int(request.get('starting_hand_size', 7)),
+			'seed': int(request.get('seed', 0)),
+		}
+		rounds = int(request['rounds'])
+	except (KeyError, TypeError, ValueError) as e:
+		raise ValueError('Invalid request: %s' % e)
+	for name in players:
+		# Player itself has a _pick_tile, but only to be overridden
+		if getattr(globals().get(name), '_pick_tile', Player._pick_tile) is Player._pick_tile:
+			raise ValueError('Invalid player class: %s' % name)
+	if not players or rounds <= 0 or job['set_size'] <= 0 or job['starting_hand_size'] <= 0:
+		raise ValueError('Invalid request: players, rounds, set_size and starting_hand_size must be given, and positive')
+	if rounds > max_rounds:
+		raise ValueError('Invalid request: at most %d rounds may be asked for' % max_rounds)
+	if len(players) * job['starting_hand_size'] > len(tile_catalogue(job['set_size'])):
+		raise ValueError('Not enough tiles in a double-%d set for %d hands of %d' % (
+			job['set_size'], len(players), job['starting_hand_size']))
+	return job, rounds
+
+class SimulationService(object):
+	'''
+	Plays seeded runs on a pool of worker processes, kept warm between requests.
+
+	A run is played in blocks of block_rounds rounds.  Every round of a seeded run
+	is the same whoever asks for it, so blocks are shared: requests for the same job
+	wait on the same block in play, whether they ask for the same number of rounds
+	or not, and finished blocks are kept (up to cache_blocks of them, least recently
+	used first out) to answer later requests.
+	'''
+	def __init__(self, processes=None, block_rounds=500, cache_blocks=1 << 16):
+		self.block_rounds = block_rounds
+		self.cache_blocks = cache_blocks
+		self.pool = multiprocessing.Pool(processes)
+		self.hits = 0 # blocks already played, or in play, when asked for
+		self.misses = 0 # blocks sent to the pool
+		self._blocks = collections.OrderedDict() # (job, start, count): multiprocessing AsyncResult
+		self._lock = threading.Lock()
+
+	def _block(self, job, start, count):
+		'''
+		Return the AsyncResult of run_shard(job, start, count), starting it if need be
+		'''
+		key = (json.dumps(job, sort_keys=True), start, count)
+		with self._lock:
+			block = self._blocks.pop(key, None)
+			if block is None:
+				self.misses += 1
+				block = self.pool.apply_async(run_shard, (job, start, count))
+				if len(self._blocks) >= self.cache_blocks:
+					self._blocks.popitem(last=False)
+			else:
+				self.hits += 1
+			self._blocks[key] = block
+			return block
+
+	def _evict(self, job, start, count, block):
+		'Forget "block", the AsyncResult of run_shard(job, start, count), so that it may be played again'
+		key = (json.dumps(job, sort_keys=True), start, count)
+		with self._lock:
+			if self._blocks.get(key) is block:
+				del self._blocks[key]
+
+	def simulate(self, job, rounds):
+		'''
+		Generate the results so far of playing 'rounds' rounds of 'job' (see run_shard),
+		after each block: dicts of rounds_done, rounds, and the total, mean and stddev
+		of each seat's score.  The last has "done" set.
+
+		If a block fails, its exception is raised, and the block is forgotten rather
+		than kept to fail later requests too.
+		'''
+		blocks = [self._block(job, start, min(self.block_rounds, rounds - start))
+			for start in range(0, rounds, self.block_rounds)]
+		sums = [[0, 0] for player in job['players']]
+		rounds_done = 0
+		for start, block in zip(range(0, rounds, self.block_rounds), blocks):
+			# AsyncResult wakes only one of the threads waiting on it when it's ready, so
+			# the others look for themselves; the timeout also lets the wait be interrupted
+			while not block.ready():
+				block.wait(0.05)
+			if not block.successful():
+				self._evict(job, start, min(self.block_rounds, rounds - start), block)
+			result = block.get()
+			for seat_sums, score, square in zip(sums, result['scores'], result['squares']):
+				seat_sums[0] += score
+				seat_sums[1] += square
+			rounds_done += min(self.block_rounds, rounds - start)
+			seats = []
+			for total, total_squares in sums:
+				stats = RunningStats.from_sums(rounds_done, total, total_squares)
+				seats.append({'total': total, 'mean': stats.mean, 'stddev': stats.stddev})
+			yield {'rounds_done': rounds_done, 'rounds': rounds, 'seats': seats, 'done': rounds_done == rounds}
+
+	def close(self):
+		self.pool.terminate()
+		self.pool.join()
+
+class SimulationRequestHandler(http.server.BaseHTTPRequestHandler):
+	'''
+	Answers the HTTP requests of a SimulationServer:
+	* POST /simulate - with a JSON body of players, rounds, and optionally set_size,
+		starting_hand_size and seed.  The response is a stream of JSON lines, being the
+		results so far (see SimulationService.simulate), ending with the complete ones.
+		If the simulation fails, the response is a 500, or, if results have already been
+		sent, a last line of {"error": ..., "done": true}.
+	* GET /stats - JSON counts of blocks played and answered from the cache
+	'''
+	def _send_json(self, status, body):
+		content = json.dumps(body) + '\n'
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(content)))
+		self.end_headers()
+		self.wfile.write(content.encode('utf-8'))
+
+	def do_GET(self):
+		if self.path != '/stats':
+			self._send_json(404, {'error': 'Not found: %s' % self.path})
+			return
+		service = self.server.service
+		self._send_json(200, {'hits': service.hits, 'misses': service.misses})
+
+	def do_POST(self):
+		if self.path != '/simulate':
+			self._send_json(404, {'error': 'Not found: %s' % self.path})
+			return
+		try:
+			request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+			job, rounds = validate_job(request)
+		except ValueError as e:
+			self._send_json(400, {'error': str(e)})
+			return
+		partials = self.server.service.simulate(job, rounds)
+		try:
+			partial = next(partials)
+		except Exception as e:
+			self._send_json(500, {'error': 'Simulation failed: %s' % e})
+			return
+		# no Content-Length: the lines are written as they come, and the end of the response closes it
+		self.send_response(200)
+		self.send_header('Content-Type', 'application/x-ndjson')
+		self.end_headers()
+		while partial is not None:
+			self.wfile.write((json.dumps(partial) + '\n').encode('utf-8'))
+			self.wfile.flush()
+			try:
+				partial = next(partials, None)
+			except Exception as e:
+				# written next time round; the failed generator then has no more
+				partial = {'error': 'Simulation failed: %s' % e, 'done': True}
+
+	def log_message(self, format, *args):
+		# requests aren't worth a line on stderr each
+		pass
+
+class SimulationServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+	'''
+	An HTTP server, answering each request on a thread of its own, for a SimulationService
+	'''
+	daemon_threads = True
+
+	def __init__(self, address, service):
+		http.server.HTTPServer.__init__(self, address, SimulationRequestHandler)
+		self.service = service
+
+class ProgressMonitor(object):
+	'''
+	Reports the progress of a runner (a GameRunner or subclass) every 'interval' seconds, from a thread of its own.
+
+	The runner's counts are only read, now and then, so this costs the rounds nothing.
+	Each report gives the rounds played, the rate since the last report and a smoothed
+	rate (an exponentially weighted average), the time left at the smoothed rate, and
+	the leading player, being the one with the lowest score.  Runners with a
+	'worker_rounds' dict, of rounds played by each worker, get a rate for each.
+
+	Reports are written as a line to 'stream', or as JSON to the file at status_path.
+	'''
+	def __init__(self, runner, interval=10.0, stream=None, status_path=None, smoothing=0.3):
+		'''
+		* smoothing - weight of the latest rate in the smoothed rate, between 0 and 1
+		'''
+		self.runner = runner
+		self.interval = interval
+		self.stream = stream or sys.stderr
+		self.status_path = status_path
+		self.smoothing = smoothing
+		self.smoothed_rate = None
+		self._stopped = threading.Event()
+		self._thread = threading.Thread(target=self._loop)
+		self._thread.daemon = True
+		self._reset()
+
+	def _reset(self):
+		'take the runner as it is now as the start of the next interval'
+		self._start_time = self._last_time = time.time()
+		self._start_rounds = self._last_rounds = self.runner.rounds_done
+		self._last_workers = dict(getattr(self.runner, 'worker_rounds', {}))
+
+	def sample(self):
+		'''
+		Return a dict describing the progress of the runner since the last sample
+		'''
+		runner = self.runner
+		now = time.time()
+		rounds_done = runner.rounds_done
+		workers = dict(getattr(runner, 'worker_rounds', {}))
+		elapsed = max(now - self._last_time, 1e-9)
+		rate = (rounds_done - self._last_rounds) / elapsed
+		if self.smoothed_rate is None:
+			self.smoothed_rate = rate
+		else:
+			self.smoothed_rate += self.smoothing * (rate - self.smoothed_rate)
+		scores = sorted((score, player.name) for player, score in runner.aggregate_scores.items())
+		sample = {
+			'rounds_done': rounds_done,
+			'rounds': runner.rounds,
+			'elapsed': now - self._start_time,
+			'rate': rate,
+			'smoothed_rate': self.smoothed_rate,
+			'eta': (runner.rounds - rounds_done) / self.smoothed_rate if self.smoothed_rate else None,
+			'leader': scores[0][1] if scores else None,
+			'leader_score': scores[0][0] if scores else None,
+			'workers': dict(
+				(name, (count - self._last_workers.get(name, 0)) / elapsed) for name, count in workers.items()),
+		}
+		self._last_time = now
+		self._last_rounds = rounds_done
+		self._last_workers = workers
+		return sample
+
+	def report(self, sample):
+		'''
+		Write 'sample' to the status file, or as a line to the stream
+		'''
+		if self.status_path:
+			temp_path = self.status_path + '.tmp'
+			with open(temp_path, 'w') as f:
+				json.dump(sample, f, sort_keys=True)
+			os.rename(temp_path, self.status_path)
+			return
+		line = 'Progress: %d/%d rounds (%.1f%%), %.1f rounds/sec (smoothed %.1f), ETA %s, leading: %s (%s)' % (
+			sample['rounds_done'], sample['rounds'], 100.0 * sample['rounds_done'] / max(sample['rounds'], 1),
+			sample['rate'], sample['smoothed_rate'],
+			'unknown' if sample['eta'] is None else '%d:%02d:%02d' % (
+				sample['eta'] // 3600, sample['eta'] // 60 % 60, sample['eta'] % 60),
+			sample['leader'], sample['leader_score'],
+		)
+		for name, rate in sorted(sample['workers'].items()):
+			line += '\n    %s: %.1f rounds/sec' % (name, rate)
+		self.stream.write(line + '\n')
+		self.stream.flush()
+
+	def _loop(self):
+		while not self._stopped.wait(self.interval):
+			self.report(self.sample())
+
+	def start(self):
+		self._reset()
+		self._thread.start()
+
+	def stop(self):
+		'''
+		Stop reporting, after a last report
+		'''
+		self._stopped.set()
+		self._thread.join()
+		self.report(self.sample())
+
+class NpyShardWriter(object):
+	'''
+	Appends fixed-width records to a series of memory-mapped .npy files ("shards").
+
+	Each shard is preallocated, and doubled in size whenever it fills, until it
+	holds shard_rows records; then the next shard is started.  The .npy header is
+	rewritten with the true number of records whenever a shard is grown or closed,
+	so every shard loads with numpy.load(path, mmap_mode='r') as a structured array.
+	'''
+	# numpy type strings for struct format codes
+	DTYPES = {'B': '|u1', 'b': '|i1', 'H': '<u2', 'h': '<i2', 'I': '<u4', 'i': '<i4', 'Q': '<u8', 'q': '<i8'}
+
+	def __init__(self, pattern, fields, shard_rows=1 << 22, initial_rows=1 << 12):
+		'''
+		* pattern - path of each shard, with a %d for its number; e.g. 'positions-%05d.npy'
+		* fields - list of (name, struct format code, count) for each field of a record
+		'''
+		self.pattern = pattern
+		self.shard_rows = shard_rows
+		self.initial_rows = min(initial_rows, shard_rows)
+		self.record = struct.Struct('<' + ''.join('%d%s' % (count, code) for name, code, count in fields))
+		self.descr = [
+			(name, self.DTYPES[code]) if count == 1 else (name, self.DTYPES[code], (count,))
+			for name, code, count in fields
+		]
+		# room for the header with the longest possible shape, padded to 64 bytes as .npy prefers
+		self.header_size = (len(self._header(10 ** 20)) + 63) // 64 * 64
+		self.paths = []
+		self.rows = 0 # records written in the current shard
+		self.total_rows = 0
+		self._file = None
+		self._map = None
+		self._capacity = 0
+
+	def _header(self, rows):
+		'Return the .npy header for a shard of "rows" records, unpadded'
+		header = ("{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (self.descr, rows)).encode('latin-1')
+		return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header) + 1) + header + b'\n'
+
+	def _write_header(self):
+		header = self._header(self.rows)
+		padding = self.header_size - len(header)
+		# pad the dict with spaces before its closing newline, as .npy requires
+		header = header[:8] + struct.pack('<H', len(header) - 10 + padding) + header[10:-1] + b' ' * padding + b'\n'
+		self._map[:self.header_size] = header
+
+	def _resize(self, capacity):
+		'map the current shard with room for "capacity" records'
+		if self._map is not None:
+			self._map.close()
+		self._file.truncate(self.header_size + capacity * self.record.size)
+		self._map = mmap.mmap(self._file.fileno(), self.header_size + capacity * self.record.size)
+		self._capacity = capacity
+
+	def _start_shard(self):
+		self.close()
+		path = self.pattern % len(self.paths)
+		self.paths.append(path)
+		self._file = open(path, 'w+b')
+		self.rows = 0
+		self._resize(self.initial_rows)
+
+	def append(self, block, count):
+		'''
+		Append 'count' records, packed by self.record into the string 'block'.
+
+		A block is never split between shards, so a shard may run over shard_rows by
+		less than one block.
+		'''
+		if self._map is None or (self.rows >= self.shard_rows):
+			self._start_shard()
+		if self.rows + count > self._capacity:
+			capacity = self._capacity
+			while self.rows + count > capacity:
+				capacity *= 2
+			self._write_header()
+			self._resize(capacity)
+		offset = self.header_size + self.rows * self.record.size
+		self._map[offset:offset + len(block)] = block
+		self.rows += count
+		self.total_rows += count
+
+	def close(self):
+		'''
+		Finish the current shard: write its header and trim off unused space
+		'''
+		if self._map is None:
+			return
+		self._write_header()
+		self._map.close()
+		self._map = None
+		self._file.truncate(self.header_size + self.rows * self.record.size)
+		self._file.close()
+		self._file = None
+
+class TrainingDataReporter(object):
+	'''
+	Records every decision as a fixed-width record in .npy shards, for training strategies.
+
+	Each record has these fields:
+	* hand - bitmask of the mover's hand before the play, by tile_index, in 64-bit words
+	* ends - Game.end_counts before the play
+	* state - index of the Game.State in TrainingDataReporter.STATES
+	* boneyard - number of tiles left to draw
+	* opponents - hand sizes of the other players, in order of play after the mover
+	* move - tile_index of the tile played
+	* score - the mover's Player.score at the end of the round
+
+	Records are packed as they happen, and written to the shards a round at a time,
+	once the scores are known.
+	'''
+	STATES = (Game.State.ROOT, Game.State.OPEN, Game.State.CHICKIE)
+
+	def __init__(self, directory, shard_rows=1 << 22):
+		self.directory = directory
+		self.shard_rows = shard_rows
+		self.writer = None
+		# rounds in progress, by Game, so that rounds on other threads don't mix:
+		# [packed records, mover of each record, ends and state at the last turn_start]
+		self._rounds = {}
+		self._lock = threading.Lock()
+
+	def _open(self, game):
+		'start writing, now that we know the set size and number of players'
+		self.words = (len(tile_catalogue(game.set_size)) + 63) // 64
+		if not os.path.isdir(self.directory):
+			os.makedirs(self.directory)
+		self.writer = NpyShardWriter(
+			os.path.join(self.directory, 'positions-%05d.npy'),
+			[
+				('hand', 'Q', self.words),
+				('ends', 'B', game.set_size + 1),
+				('state', 'B', 1),
+				('boneyard', 'H', 1),
+				('opponents', 'B', len(game.players) - 1),
+				('move', 'H', 1),
+				('score', 'i', 1),
+			],
+			shard_rows=self.shard_rows,
+		)
+
+	def turn_start(self, player, state):
+		# the board doesn't change between here and the play, if there is one
+		game = player.game
+		with self._lock:
+			if self.writer is None:
+				self._open(game)
+			current = self._rounds.setdefault(game, [bytearray(), [], None])
+		current[2] = game.end_counts() + [self.STATES.index(state)]
+
+	def play(self, player, tile, parent):
+		game = player.game
+		records, movers, position = self._rounds[game]
+		hand = 1 << tile.index
+		for held in player.hand:
+			hand |= 1 << held.index
+		seat = game.players.index(player)
+		opponents = [len(other.hand) for other in game.players[seat + 1:] + game.players[:seat]]
+		records += self.writer.record.pack(*(
+			[(hand >> (64 * word)) & 0xFFFFFFFFFFFFFFFF for word in range(self.words)] +
+			position + [len(game.boneyard.tiles)] + opponents + [tile.index, 0]
+		))
+		movers.append(player)
+
+	def round_over(self, scores):
+		game = next(iter(scores)).game
+		records, movers, position = self._rounds.pop(game, (None, [], None))
+		if not movers:
+			return
+		size = self.writer.record.size
+		for num, player in enumerate(movers):
+			# the score is the last field of each record
+			struct.pack_into('<i', records, (num + 1) * size - 4, scores[player])
+		with self._lock:
+			self.writer.append(bytes(records), len(movers))
+
+	def close(self):
+		if self.writer is not None:
+			self.writer.close()
+
+	def root_found(self, player, tile):
+		pass
+
+	def play_order(self, players):
+		pass
+
+	def draw(self, player, tile):
+		pass
+
+	def root_not_found(self):
+		pass
+
+	def opportunities(self, player, tiles):
+		pass
+
+	def initial_hands(self, players):
+		pass
+
+class ResultsStore(object):
+	'''
+	A directory of per-round results, stored by column: one file of fixed-width values per column.
+
+	Write with ResultsWriter.  Reading memory-maps the column files, and goes through
+	them a chunk at a time, so the results needn't fit in memory.  These columns are
+	stored for every round:
+	* round - the round's number in the run
+	* required_root - Game.required_root
+	* turns - turns taken, over all players
+	* stalemate - 1 if the round ended with nobody able to play
+	* winner - seat with the lowest score; the first of them, if there's a tie
+	* score_N - score of the player in seat N, being the Nth player of GameRunner.seating
+	'''
+	# column name: array typecode
+	COLUMNS = (('round', 'I'), ('required_root', 'B'), ('turns', 'I'), ('stalemate', 'B'), ('winner', 'B'))
+	SCORE_TYPECODE = 'i'
+
+	def __init__(self, directory):
+		self.directory = directory
+		with open(os.path.join(directory, 'meta.json')) as f:
+			self.meta = json.load(f)
+		self.typecodes = dict(self.meta['columns'])
+		self._maps = {}
+
+	@classmethod
+	def columns(cls, players):
+		'Return the (name, typecode) of every column for results of "players"'
+		return list(cls.COLUMNS) + [('score_%d' % seat, cls.SCORE_TYPECODE) for seat in range(len(players))]
+
+	def path(self, name):
+		return os.path.join(self.directory, name + '.col')
+
+	def __len__(self):
+		'''
+		Return the number of complete rows: those written to every column
+		'''
+		return min(
+			os.path.getsize(self.path(name)) // array.array(typecode).itemsize for name, typecode in self.meta['columns'])
+
+	def chunks(self, name, chunk_rows=1 << 16):
+		'''
+		Generate the values of column 'name', as arrays of up to chunk_rows values.
+		'''
+		typecode = self.typecodes[name]
+		itemsize = array.array(typecode).itemsize
+		rows = len(self)
+		if not rows:
+			return
+		with open(self.path(name), 'rb') as f:
+			column = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			for start in range(0, rows, chunk_rows):
+				chunk = array.array(typecode)
+				chunk.frombytes(column[start * itemsize:min(start + chunk_rows, rows) * itemsize])
+				yield chunk
+		finally:
+			column.close()
+
+	def sum(self, name):
+		return sum(sum(chunk) for chunk in self.chunks(name))
+
+	def mean(self, name):
+		'''
+		Return the mean of column 'name', or None if there are no rows
+		'''
+		rows = len(self)
+		return float(self.sum(name)) / rows if rows else None
+
+	def counts(self, name):
+		'''
+		Return a dict of the number of rows with each value of column 'name'
+		'''
+		counts = collections.defaultdict(int)
+		for chunk in self.chunks(name):
+			for value in chunk:
+				counts[value] += 1
+		return dict(counts)
+
+	def group_means(self, name, key):
+		'''
+		Return a dict of the mean of column 'name' for each value of column 'key',
+		e.g. group_means('score_0', 'required_root')
+		'''
+		sums = collections.defaultdict(int)
+		counts = collections.defaultdict(int)
+		for values, keys in zip(self.chunks(name), self.chunks(key)):
+			for value, group in zip(values, keys):
+				sums[group] += value
+				counts[group] += 1
+		return dict((group, float(sums[group]) / counts[group]) for group in sums)
+
+class ResultsWriter(object):
+	'''
+	Appends the results of rounds to a ResultsStore, a chunk of rows at a time.
+
+	Each column is gathered into an array, and written out with one write once
+	chunk_rows rows have been gathered, on flush(), or on close().
+	'''
+	def __init__(self, directory, players, chunk_rows=1 << 16):
+		'''
+		Start a ResultsStore in 'directory', which is made if need be, for rounds played by 'players'.
+		A store already there is appended to.
+		'''
+		self.directory = directory
+		self.chunk_rows = chunk_rows
+		self.columns = ResultsStore.columns(players)
+		meta = {'columns': self.columns, 'players': [[player.name, player.__class__.__name__] for player in players]}
+		meta_path = os.path.join(directory, 'meta.json')
+		if os.path.exists(meta_path):
+			with open(meta_path) as f:
+				if json.load(f) != json.loads(json.dumps(meta)):
+					raise ValueError('Results in %s are of other players' % directory)
+		elif not os.path.isdir(directory):
+			os.makedirs(directory)
+		with open(meta_path, 'w') as f:
+			json.dump(meta, f)
+		self._files = [open(os.path.join(directory, name + '.col'), 'ab') for name, typecode in self.columns]
+		self._buffers = [array.array(typecode) for name, typecode in self.columns]
+		self._pending = 0
+
+	def append(self, game, seating):
+		'''
+		Add the results of the finished 'game', whose players sit in the order of 'seating'
+		'''
+		scores = [game.scores[player] for player in seating]
+		values = [game.round_number, game.required_root, game.turns, stalemate(game), scores.index(min(scores))] + scores
+		for buffer, value in zip(self._buffers, values):
+			buffer.append(value)
+		self._pending += 1
+		if self._pending >= self.chunk_rows:
+			self.flush()
+
+	def flush(self):
+		for f, buffer in zip(self._files, self._buffers):
+			buffer.tofile(f)
+			f.flush()
+			del buffer[:]
+		self._pending = 0
+
+	def truncate(self, rows):
+		'''
+		Drop all but the first 'rows' rows; e.g. those written after the checkpoint a run resumes from
+		'''
+		self.flush()
+		for f, buffer in zip(self._files, self._buffers):
+			f.truncate(rows * buffer.itemsize)
+
+	def rows(self):
+		'''
+		Return the number of rows written, once flushed
+		'''
+		self.flush()
+		return len(ResultsStore(self.directory))
+
+	def close(self):
+		self.flush()
+		for f in self._files:
+			f.close()
+
+class VecObservation(object):
+	'''
+	The positions of a batch of rounds awaiting a decision, in flat typed arrays (array.array).
+
+	Each array holds one row per round, of the width given; with NumPy, e.g.
+	numpy.frombuffer(observation.legal, dtype=numpy.uint8).reshape(num_games, num_tiles)
+	views it as a matrix without copying.
+
+	* hand - num_tiles bytes per round: 1 where the player to move holds the tile with that tile_index
+	* legal - num_tiles bytes per round: 1 where that tile is one of the player's opportunities
+	* ends - num_pips counts per round: how many open places to play show each number of pips
+	* state - one per round: the index of the Game.State in VecGame.STATES
+	* boneyard - one per round: the number of tiles left to draw
+	* seat - one per round: which seat, in the order of player_class_names, is to move
+	* done - one per round: 1 if a round finished during the last step; a new one has since begun
+	* scores - num_seats per round: the final scores by seat of the round that finished, if done
+	'''
+	def __init__(self, num_games, num_tiles, num_pips, num_seats):
+		self.num_games = num_games
+		self.num_tiles = num_tiles
+		self.num_pips = num_pips
+		self.num_seats = num_seats
+		self.hand = array.array('B', [0]) * (num_games * num_tiles)
+		self.legal = array.array('B', [0]) * (num_games * num_tiles)
+		self.ends = array.array('B', [0]) * (num_games * num_pips)
+		self.state = array.array('b', [0]) * num_games
+		self.boneyard = array.array('H', [0]) * num_games
+		self.seat = array.array('B', [0]) * num_games
+		self.done = array.array('B', [0]) * num_games
+		self.scores = array.array('i', [0]) * (num_games * num_seats)
+
+class VecGame(object):
+	'''
+	Steps a batch of independent rounds together, so a policy can make all of their decisions at once.
+
+	Decisions for the seats in 'policy_seats' are handed back from reset() and step()
+	as a VecObservation; the players in the other seats make their own choices in
+	between.  When a round is over, the next one starts straight away.
+	'''
+	STATES = (Game.State.ROOT, Game.State.OPEN, Game.State.CHICKIE)
+
+	def __init__(self, num_games, player_class_names, set_size, starting_hand_size, policy_seats=None):
+		'''
+		* player_class_names - as for GameRunner; the classes of policy seats don't matter
+		* policy_seats - indices into player_class_names of the seats the policy plays; default: all.
+			Raises ValueError if there are none, or any isn't a seat
+		'''
+		self.num_games = num_games
+		self.set_size = set_size
+		self.starting_hand_size = starting_hand_size
+		self.num_tiles = len(tile_catalogue(set_size))
+		self.num_seats = len(player_class_names)
+		self.policy_seats = set(range(self.num_seats) if policy_seats is None else policy_seats)
+		if not self.policy_seats or not self.policy_seats <= set(range(self.num_seats)):
+			# with no seat to decide for, reset() and step() would play rounds forever
+			raise ValueError('Invalid policy seats: %s; must be some of the %d seats, numbered from 0' % (
+				sorted(self.policy_seats), self.num_seats))
+		self._players = [
+			[(globals()[name] if isinstance(name, str) else name)('p%d' % num) for num, name in enumerate(player_class_names)]
+			for i in range(num_games)
+		]
+		self._seats = [dict((player, seat) for seat, player in enumerate(players)) for players in self._players]
+		self.rounds = [0] * num_games
+		self._games = [None] * num_games
+		self._decisions = [None] * num_games
+		self._pending = [None] * num_games
+		self.observation = VecObservation(num_games, self.num_tiles, set_size + 1, self.num_seats)
+
+	def reset(self):
+		'''
+		Start a round in every game, and return the first decisions
+		'''
+		for i in range(self.num_games):
+			self._start(i)
+			self._advance(i, None)
+		return self._observe()
+
+	def step(self, actions):
+		'''
+		Play actions[i], a tile_index, in game i, and return the next decisions.
+
+		Raises ValueError if an action isn't one of the opportunities in its game.
+		'''
+		self.observation.done[:] = array.array('B', [0]) * self.num_games
+		for i, action in enumerate(actions):
+			player, opportunities = self._pending[i]
+			for tile in opportunities:
+				if tile.index == action:
+					break
+			else:
+				raise ValueError('Game %d: tile %s is not an opportunity' % (i, action))
+			player.hand.remove(tile)
+			self._advance(i, tile)
+		return self._observe()
+
+	def _start(self, i):
+		'begin the next round in game i'
+		self._games[i] = Game(self.rounds[i] % (self.set_size + 1), self.set_size, self.starting_hand_size, self._players[i])
+		self._decisions[i] = self._games[i].decisions()
+		self.rounds[i] += 1
+
+	def _advance(self, i, tile):
+		'''
+		Send 'tile' to game i, and play on until a policy seat has a decision to make
+		'''
+		while True:
+			try:
+				if tile is None:
+					player, opportunities = next(self._decisions[i])
+				else:
+					player, opportunities = self._decisions[i].send(tile)
+			except StopIteration:
+				# record the finished round and start another
+				game = self._games[i]
+				observation = self.observation
+				observation.done[i] = 1
+				for player, score in game.scores.items():
+					observation.scores[i * self.num_seats + self._seats[i][player]] = score
+				self._start(i)
+				tile = None
+				continue
+			if self._seats[i][player] in self.policy_seats:
+				self._pending[i] = (player, opportunities)
+				return
+			tile = player.pick_tile(opportunities)
+
+	def _observe(self):
+		'fill in the observation from the pending decisions'
+		observation = self.observation
+		num_tiles, num_pips = self.num_tiles, self.set_size + 1
+		observation.hand[:] = array.array('B', [0]) * (self.num_games * num_tiles)
+		observation.legal[:] = array.array('B', [0]) * (self.num_games * num_tiles)
+		observation.ends[:] = array.array('B', [0]) * (self.num_games * num_pips)
+		for i, (player, opportunities) in enumerate(self._pending):
+			game = self._games[i]
+			for tile in player.hand:
+				observation.hand[i * num_tiles + tile.index] = 1
+			for tile in opportunities:
+				observation.legal[i * num_tiles + tile.index] = 1
+			observation.ends[i * num_pips:(i + 1) * num_pips] = array.array('B', game.end_counts())
+			observation.state[i] = self.STATES.index(game.state)
+			observation.boneyard[i] = len(game.boneyard.tiles)
+			observation.seat[i] = self._seats[i][player]
+		return observation
+
+def validate_positive_int(s, name, error_method):
+	'''
+	Returns the string s as an int.
+
+	If the int value of s is either invalid or less than 1, call error_method with a description.
+	This is most useful when provided the 'error' method of an optparse.OptionParser instance.
+	'''
+	# test converting s to an int
+	try: 
+		num = int(s)
+	except ValueError:
+		error_method('Invalid %s: %s; must be a number' % (name, s))
+	
+	# guarantee num > 0
+	if num <= 0:
+		error_method('Invalid %s: %s; must be greater than 0' % (name, num))
+
+	return num
+
+def validate_positive_float(s, name, error_method):
+	'''
+	Returns the string s as a float.
+
+	As validate_positive_int, but for numbers that needn't be whole.
+	'''
+	try:
+		num = float(s)
+	except ValueError:
+		error_method('Invalid %s: %s; must be a number' % (name, s))
+
+	if num <= 0:
+		error_method('Invalid %s: %s; must be greater than 0' % (name, num))
+
+	return num
+
+def validate_non_negative_int(s, name, error_method):
+	'''
+	Returns the string s as an int, as validate_positive_int does, but allowing 0.
+	'''
+	try:
+		num = int(s)
+	except ValueError:
+		error_method('Invalid %s: %s; must be a number' % (name, s))
+
+	if num < 0:
+		error_method('Invalid %s: %s; must not be negative' % (name, num))
+
+	return num
+
+def load_engine(name):
+	'''
+	Return the engine class named 'name': a subclass of Game in this module, or
+	"MODULE:CLASS", to be imported.  Raises ValueError if there's no such class, or
+	if one in this module isn't a Game.
+	'''
+	if ':' in name:
+		module_name, class_name = name.split(':', 1)
+		try:
+			engine = getattr(importlib.import_module(module_name), class_name)
+		except (ImportError, AttributeError) as e:
+			raise ValueError('Invalid engine class: %s (%s)' % (name, e))
+		if not isinstance(engine, type):
+			raise ValueError('Invalid engine class: %s' % name)
+		return engine
+	engine = globals().get(name)
+	if not (isinstance(engine, type) and issubclass(engine, Game)):
+		raise ValueError('Invalid engine class: %s; must be a Game, or MODULE:CLASS' % name)
+	return engine
+
+def validate_player_classes(class_names, error_method):
+	'''
+	Call error_method with a description if any of class_names isn't the name of a Player class.
+	'''
+	for class_name in class_names:
+		# we'll assume that if the class has '_pick_tile', then it's a Player derivative
+		if not hasattr(globals().get(class_name), '_pick_tile'):
+			error_method('Invalid player class: %s' % class_name)
+
+def validate_address(s, name, error_method):
+	'''
+	Returns the string s, being "HOST:PORT", as a (host, port) pair.
+
+	Calls error_method with a description if s isn't of that form.
+	'''
+	host, separator, port = s.rpartition(':')
+	if not separator or not host or not port.isdigit():
+		error_method('Invalid %s: %s; must be HOST:PORT' % (name, s))
+	return (host, int(port))
+
+def parse_args():
+	'''
+	Evaluates the invoking command line and returns (opts, num_rounds), wherein 'opts'
+	is in the style of optparse.OptionParser.
+
+
+	Exits via OptionParser.error if the command line is invalid (e.g. bad options or args).
+	'''
+	parser = optparse.OptionParser(
+		usage='%prog N\n       %prog --build-tablebase PATH',
+		description='Simulates running N number of rounds of the dominoes game, "Chicken foot," and prints a result summary',
+	)
 	parser.add_option('-v', '--verbose', action='store_true', dest='verbose', default=False)
 	parser.add_option('-p', '--player', action='append', dest='players', default=[],
 		help='Class names from which to create Player instances; can be repeated to provide multiple players. '
@@ -653,6 +4422,106 @@ def parse_args():
 		help='Domino set size, given as the "double X" set size; e.g. "9" for a "double nine" set.  Default: 9')
 	parser.add_option('--starting-hand-size', action='store', dest='starting_hand_size', default=7,
 		help='Number of tiles that each player begins with in their hand.  Default: 7')
+	parser.add_option('--bot', action='append', dest='bots', default=[], metavar='ADDRESS',
+		help='Add a RemotePlayer whose choices are made by an out-of-process bot; can be repeated. '
+				'ADDRESS is either tcp://HOST:PORT, or a shell command that starts the bot on a pipe.')
+	parser.add_option('--bot-timeout', action='store', dest='bot_timeout', default=1.0,
+		help='Seconds to wait for a bot\'s decision before making a random one instead.  Default: 1')
+	parser.add_option('--as-bot', action='store', dest='as_bot', default=None, metavar='CLASS',
+		help='Instead of simulating, act as a bot on stdin and stdout, making the choices of the given Player class.')
+	parser.add_option('--concurrency', action='store', dest='concurrency', default=1,
+		help='Number of rounds to play at once, on separate threads sharing nothing but the totals; '
+				'on a free-threaded build of Python, they play in parallel.  Default: 1')
+	parser.add_option('--build-tablebase', action='store', dest='build_tablebase', default=None, metavar='PATH',
+		help='Instead of simulating, solve the two-player endgames of the set given by --set-size (at most 5) '
+				'and write them to PATH.  N is not required.')
+	parser.add_option('--tablebase-max-hand', action='store', dest='tablebase_max_hand', default=2,
+		help='Largest hand included in a tablebase built by --build-tablebase.  Default: 2')
+	parser.add_option('--tablebase', action='store', dest='tablebase', default=None, metavar='PATH',
+		help='Tablebase file, written by --build-tablebase, for TablebasePlayer instances to use.')
+	parser.add_option('--decision-cache', action='store', dest='decision_cache', default=None, metavar='SIZE',
+		help='Remember up to SIZE decisions of each deterministic strategy (e.g. MaxValuePlayer), '
+				'to make again without working them out when the same position comes up.')
+	parser.add_option('--time-decisions', action='store_true', dest='time_decisions', default=False,
+		help='Report the CPU time and latencies of the decisions of each player class.')
+	parser.add_option('--decision-time-limit', action='store', dest='decision_time_limit', default=None,
+		metavar='SECONDS',
+		help='Give a player that takes longer than SECONDS over a decision the choice of --decision-fallback '
+				'instead.  Implies --time-decisions.')
+	parser.add_option('--decision-fallback', action='store', dest='decision_fallback', default='RandomPlayer',
+		metavar='CLASS', help='Player class whose choice is made for a player out of time; it\'s given no game '
+				'state.  Default: RandomPlayer')
+	parser.add_option('--stratify', action='store', dest='stratify', default=None, metavar='ALLOCATION',
+		help='Allocate the rounds among the required roots "even"ly, or by "neyman" allocation after some pilot '
+				'rounds, and report each player\'s mean score estimated from the roots, with its standard error.')
+	parser.add_option('--pilot-rounds', action='store', dest='pilot_rounds', default=None, metavar='K',
+		help='Rounds per root played before a --stratify neyman allocation.  Default: a tenth of an even share')
+	parser.add_option('--seed', action='store', dest='seed', default=None,
+		help='Seed for the random number generator, to make a run repeatable.  '
+				'Each round is seeded by this and its number, so any round can be replayed with --replay-round.')
+	parser.add_option('--replay-round', action='store', dest='replay_round', default=None, metavar='K',
+		help='Play only round K (counting from 0) of the run given by --seed.  N is not required.')
+	parser.add_option('--checkpoint', action='store', dest='checkpoint', default=None, metavar='PATH',
+		help='Save the state of the run to PATH periodically, so it can be continued with --resume.')
+	parser.add_option('--checkpoint-every', action='store', dest='checkpoint_every', default=10000, metavar='N',
+		help='Number of rounds between checkpoints.  Default: 10000')
+	parser.add_option('--resume', action='store_true', dest='resume', default=False,
+		help='Continue the run saved to the --checkpoint file, up to a total of N rounds.')
+	parser.add_option('--serve', action='store', dest='serve', default=None, metavar='HOST:PORT',
+		help='Instead of simulating, answer requests for simulations over HTTP on HOST:PORT, '
+				'with --processes worker processes.  N is not required.')
+	parser.add_option('--results', action='store', dest='results', default=None, metavar='DIR',
+		help='Store the outcome of every round (scores by seat, winner, turns, ...) in columns of fixed-width values in DIR.')
+	parser.add_option('--sweep', action='store', dest='sweep', default=None, metavar='SPEC',
+		help='Instead of a single simulation, play every point of the parameter sweep described by '
+				'the JSON file SPEC, and print a CSV table of the results.  N is not required.')
+	parser.add_option('--sweep-output', action='store', dest='sweep_output', default=None, metavar='PATH',
+		help='Write the results table of --sweep to PATH, rather than stdout.')
+	parser.add_option('--processes', action='store', dest='processes', default=None, metavar='K',
+		help='Number of worker processes for --sweep and --serve.  Default: the number of CPUs.  '
+				'Given for a simulation, its rounds are played on K worker processes, seeded by --seed.')
+	parser.add_option('--progress', action='store', dest='progress', default=None, metavar='SECONDS',
+		help='Report progress (rounds played, rounds/sec, ETA, the leading player) every SECONDS seconds, to stderr.')
+	parser.add_option('--status-file', action='store', dest='status_file', default=None, metavar='PATH',
+		help='Write progress reports to PATH, as JSON, instead of stderr.  Default interval: 10 seconds.')
+	parser.add_option('--metrics', action='store', dest='metrics', default=None, metavar='PATH',
+		help='Write counters and histograms of the rounds played to PATH, in the Prometheus text format.')
+	parser.add_option('--metrics-interval', action='store', dest='metrics_interval', default=15.0, metavar='SECONDS',
+		help='Seconds between updates of the --metrics file.  Default: 15')
+	parser.add_option('--trace-every', action='store', dest='trace_every', default=None, metavar='N',
+		help='Report only every Nth round (e.g. to -v or --export-training); other tracing options add more rounds.')
+	parser.add_option('--trace-probability', action='store', dest='trace_probability', default=None, metavar='P',
+		help='Report each round with probability P.')
+	parser.add_option('--trace-stalemates', action='store_true', dest='trace_stalemates', default=False,
+		help='Report the rounds that end with nobody able to play.  Requires --seed.')
+	parser.add_option('--trace-score-above', action='store', dest='trace_score_above', default=None, metavar='X',
+		help='Report the rounds in which a player scores more than X.  Requires --seed.')
+	parser.add_option('--coordinate', action='store', dest='coordinate', default=None, metavar='HOST:PORT',
+		help='Instead of playing the rounds here, listen on HOST:PORT and split them among workers started with --worker.')
+	parser.add_option('--local-workers', action='store', dest='local_workers', default=0, metavar='K',
+		help='Coordinate as for --coordinate, and start K workers on this machine.  '
+				'Without --coordinate, listens on an unused port of 127.0.0.1.  Default: 0')
+	parser.add_option('--shard-seconds', action='store', dest='shard_seconds', default=10.0,
+		help='When coordinating, size shards to take each worker about this many seconds.  Default: 10')
+	parser.add_option('--worker', action='store', dest='worker', default=None, metavar='HOST:PORT',
+		help='Instead of simulating, play the rounds assigned by the coordinator at HOST:PORT.  N is not required.')
+	parser.add_option('--export-training', action='store', dest='export_training', default=None, metavar='DIR',
+		help='Record every decision made in the simulation to .npy files in DIR, for training strategies.')
+	parser.add_option('--record-corpus', action='store', dest='record_corpus', default=None, metavar='PATH',
+		help='Instead of simulating, play N rounds (seeded by --seed) and write a sample of the decisions made in '
+				'them to PATH, for --replay-corpus.')
+	parser.add_option('--corpus-per-stratum', action='store', dest='corpus_per_stratum', default=100, metavar='K',
+		help='Most decisions kept by --record-corpus for each game state and hand size.  Default: 100')
+	parser.add_option('--replay-corpus', action='store', dest='replay_corpus', default=None, metavar='PATH',
+		help='Instead of simulating, time the decisions of each --player class on the positions recorded in PATH '
+				'by --record-corpus.  N is not required.')
+	parser.add_option('--compare-engine', action='store', dest='compare_engine', default=None, metavar='CLASS',
+		help='Instead of simulating, play N rounds (seeded by --seed) with Game and with CLASS, another engine, '
+				'report the first round they play differently, and time them both.  CLASS is a subclass of Game '
+				'defined here, or MODULE:CLASS to import one from elsewhere.')
+	parser.add_option('--benchmark', action='append', dest='benchmarks', default=[], metavar='INTERPRETER',
+		help='Instead of simulating here, play the same seeded N rounds under INTERPRETER (e.g. python3.12, pypy3) '
+				'and report its rounds/sec; can be repeated to compare several.')
 
 	opts, args = parser.parse_args()
 	
@@ -660,26 +4529,136 @@ def parse_args():
 	# whatever is provided by the user on the command line.
 	# see http://bugs.python.org/issue5088
 	# we'll manually assign a default
-	if not opts.players:
+	if not opts.players and not opts.bots:
 		opts.players = ['MaxValuePlayer', 'RandomPlayer']
 	
-	if len(args) != 1:
-		parser.error('Requires a number of a rounds to simulate.')
-	
-	num_rounds = validate_positive_int(args[0], 'number of rounds', parser.error)
+	if opts.as_bot:
+		# no simulation, so no rounds
+		opts.players = [opts.as_bot]
+		num_rounds = None
+	elif opts.serve:
+		# requests say what to play
+		opts.serve = validate_address(opts.serve, 'service address', parser.error)
+		if opts.processes is not None:
+			opts.processes = validate_positive_int(opts.processes, 'number of processes', parser.error)
+		return (opts, None)
+	elif opts.replay_corpus:
+		# the corpus gives the positions
+		validate_player_classes(opts.players, parser.error)
+		return (opts, None)
+	elif opts.sweep:
+		# the spec gives the rounds, and everything else
+		if opts.processes is not None:
+			opts.processes = validate_positive_int(opts.processes, 'number of processes', parser.error)
+		return (opts, None)
+	elif opts.replay_round is not None:
+		# just the one round
+		opts.replay_round = validate_non_negative_int(opts.replay_round, 'round to replay', parser.error)
+		if opts.seed is None:
+			parser.error('--replay-round requires --seed')
+		num_rounds = opts.replay_round + 1
+	elif opts.worker:
+		# the coordinator says what to play
+		opts.worker = validate_address(opts.worker, 'worker address', parser.error)
+		return (opts, None)
+	elif opts.build_tablebase:
+		# no simulation, so no rounds
+		opts.set_size = validate_positive_int(opts.set_size, 'set size', parser.error)
+		if opts.set_size > 5:
+			parser.error('Invalid set size: %d; tablebases are limited to double-5 sets' % opts.set_size)
+		opts.tablebase_max_hand = validate_positive_int(opts.tablebase_max_hand, 'tablebase max hand', parser.error)
+		return (opts, None)
+	else:
+		if len(args) != 1:
+			parser.error('Requires a number of a rounds to simulate.')
+		num_rounds = validate_positive_int(args[0], 'number of rounds', parser.error)
 	
-	# validate player class names
-	for class_name in opts.players:
-		if class_name not in globals():
-			parser.error('Invalid player class: %s' % class_name)
-		player_class = globals()[class_name]
-		# we'll assume that if the class has '_pick_tile', then it's a Player derivative
-		if not hasattr(player_class, '_pick_tile'):
-			parser.error('Invalid player class: %s' % class_name)
+	validate_player_classes(opts.players, parser.error)
+
+	if opts.compare_engine is not None:
+		try:
+			opts.compare_engine_class = load_engine(opts.compare_engine)
+		except ValueError as e:
+			parser.error(str(e))
+	validate_player_classes([opts.decision_fallback], parser.error)
 
 	# validate numeric args
 	opts.set_size = validate_positive_int(opts.set_size, 'set size', parser.error)
 	opts.starting_hand_size = validate_positive_int(opts.starting_hand_size, 'starting hand size', parser.error)
+	opts.bot_timeout = validate_positive_float(opts.bot_timeout, 'bot timeout', parser.error)
+	opts.concurrency = validate_positive_int(opts.concurrency, 'concurrency', parser.error)
+	opts.checkpoint_every = validate_positive_int(opts.checkpoint_every, 'checkpoint interval', parser.error)
+	if opts.seed is not None:
+		try:
+			opts.seed = int(opts.seed)
+		except ValueError:
+			parser.error('Invalid seed: %s; must be a number' % opts.seed)
+	if opts.resume and not opts.checkpoint:
+		parser.error('--resume requires --checkpoint')
+	if opts.checkpoint and opts.concurrency > 1:
+		# concurrent rounds share the random number generator in no particular order
+		parser.error('--checkpoint can\'t be used with --concurrency')
+	if opts.processes is not None:
+		opts.processes = validate_positive_int(opts.processes, 'number of processes', parser.error)
+	opts.local_workers = validate_non_negative_int(opts.local_workers, 'number of local workers', parser.error)
+	opts.shard_seconds = validate_positive_float(opts.shard_seconds, 'shard seconds', parser.error)
+	if opts.coordinate:
+		opts.coordinate = validate_address(opts.coordinate, 'coordinator address', parser.error)
+	elif opts.local_workers:
+		opts.coordinate = ('127.0.0.1', 0)
+	if opts.replay_round is not None and (opts.concurrency > 1 or opts.coordinate or opts.processes):
+		# only a plain GameRunner starts from the round asked for
+		parser.error('--replay-round can\'t be combined with --concurrency, --coordinate, --local-workers or --processes')
+	if opts.progress is not None:
+		opts.progress = validate_positive_float(opts.progress, 'progress interval', parser.error)
+	elif opts.status_file:
+		opts.progress = 10.0
+	opts.metrics_interval = validate_positive_float(opts.metrics_interval, 'metrics interval', parser.error)
+	opts.corpus_per_stratum = validate_positive_int(opts.corpus_per_stratum, 'decisions per stratum', parser.error)
+	if opts.decision_cache is not None:
+		opts.decision_cache = validate_positive_int(opts.decision_cache, 'decision cache size', parser.error)
+	if opts.decision_time_limit is not None:
+		opts.decision_time_limit = validate_positive_float(opts.decision_time_limit, 'decision time limit', parser.error)
+		opts.time_decisions = True
+	if opts.time_decisions and (opts.coordinate or opts.processes):
+		# the workers' players are in other processes
+		parser.error('--time-decisions can\'t be used with --coordinate, --local-workers or --processes')
+	if opts.trace_every is not None:
+		opts.trace_every = validate_positive_int(opts.trace_every, 'trace interval', parser.error)
+	if opts.trace_probability is not None:
+		opts.trace_probability = validate_positive_float(opts.trace_probability, 'trace probability', parser.error)
+		if opts.trace_probability > 1:
+			parser.error('Invalid trace probability: %s; must be at most 1' % opts.trace_probability)
+	if opts.trace_score_above is not None:
+		opts.trace_score_above = validate_non_negative_int(opts.trace_score_above, 'trace score', parser.error)
+	if (opts.trace_stalemates or opts.trace_score_above is not None) and opts.seed is None:
+		# the rounds are replayed for the reporters once they're known to match
+		parser.error('--trace-stalemates and --trace-score-above require --seed')
+	# reporters, trace policies and decision caches only see the rounds played in this process
+	in_process = (opts.verbose or opts.metrics or opts.trace_every is not None or opts.trace_probability is not None
+		or opts.trace_stalemates or opts.trace_score_above is not None or opts.decision_cache)
+	if opts.coordinate and (opts.bots or opts.concurrency > 1 or opts.checkpoint or opts.export_training or opts.results
+			or in_process):
+		# workers play on their own, with nothing but the names of the players
+		parser.error('Coordinating can\'t be combined with --bot, --concurrency, --checkpoint, --export-training, '
+			'--results, --verbose, --metrics, --trace-* or --decision-cache')
+	if opts.stratify is not None:
+		if opts.stratify not in (StratifiedRunner.EVEN, StratifiedRunner.NEYMAN):
+			parser.error('Invalid allocation: %s; must be "even" or "neyman"' % opts.stratify)
+		if opts.coordinate or opts.processes or opts.concurrency > 1 or opts.checkpoint or opts.replay_round is not None:
+			# the runner picks the rounds to play, in one thread
+			parser.error('--stratify can\'t be combined with --coordinate, --processes, --concurrency, --checkpoint '
+				'or --replay-round')
+	if opts.pilot_rounds is not None:
+		opts.pilot_rounds = validate_positive_int(opts.pilot_rounds, 'pilot rounds', parser.error)
+	if opts.processes and (opts.coordinate or opts.bots or opts.concurrency > 1 or opts.checkpoint or opts.export_training
+			or opts.results or in_process):
+		# as when coordinating, the workers play every round
+		parser.error('--processes can\'t be combined with --coordinate, --bot, --concurrency, --checkpoint, '
+			'--export-training, --results, --verbose, --metrics, --trace-* or --decision-cache')
+	if opts.benchmarks and opts.bots:
+		# the interpreters are compared on a run of their own
+		parser.error('--benchmark can\'t be combined with --bot')
 
 	return (opts, num_rounds)
 
@@ -691,22 +4670,261 @@ def main():
 	'''
 	opts, num_rounds = parse_args()
 
+	if opts.build_tablebase:
+		start_time = time.time()
+		count = EndgameTablebase.build(opts.build_tablebase, opts.set_size, opts.tablebase_max_hand)
+		print('Positions:    %d' % count)
+		print('Time elapsed: %.3f secs' % (time.time() - start_time))
+		return
+
+	if opts.worker:
+		run_worker(opts.worker)
+		return
+
+	if opts.serve:
+		service = SimulationService(opts.processes)
+		server = SimulationServer(opts.serve, service)
+		sys.stderr.write('Serving on %s:%d\n' % server.server_address[:2])
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			pass
+		finally:
+			server.server_close()
+			service.close()
+		return
+
+	if opts.sweep:
+		with open(opts.sweep) as f:
+			sweep = Sweep(json.load(f), opts.processes)
+		start_time = time.time()
+		sweep.run()
+		if opts.sweep_output:
+			with open(opts.sweep_output, 'w', newline='') as f:
+				sweep.write_table(f)
+		else:
+			sweep.write_table(sys.stdout)
+		sys.stderr.write('Points: %d in %.3f secs\n' % (len(sweep.points), time.time() - start_time))
+		return
+
+	if opts.as_bot:
+		serve_bot(globals()[opts.as_bot]('bot'), sys.stdin, sys.stdout)
+		return
+
+	if opts.replay_corpus:
+		corpus = DecisionCorpus.load(opts.replay_corpus)
+		print('Positions:    %d' % len(corpus))
+		print('')
+		print('Decisions (latencies in usec):')
+		for class_name in opts.players:
+			result = corpus.benchmark(globals()[class_name])
+			print('%35s % 10.1f/sec  p50 %.1f  p90 %.1f  p99 %.1f  max %.1f' % (class_name, result['per_second'],
+				result['p50'] * 1e6, result['p90'] * 1e6, result['p99'] * 1e6, result['max'] * 1e6))
+		return
+
+	if opts.record_corpus:
+		start_time = time.time()
+		corpus = DecisionCorpus.capture(num_rounds, opts.players, opts.set_size, opts.starting_hand_size,
+			seed=opts.seed or 0, per_stratum=opts.corpus_per_stratum)
+		corpus.save(opts.record_corpus)
+		print('Positions:    %d' % len(corpus))
+		print('Time elapsed: %.3f secs' % (time.time() - start_time))
+		return
+
+	if opts.compare_engine:
+		comparison = EngineComparison(opts.compare_engine_class, opts.players, opts.set_size,
+			opts.starting_hand_size, seed=opts.seed or 0)
+		divergence = comparison.check(num_rounds)
+		reference_seconds, candidate_seconds = comparison.timings(num_rounds)
+		print('Rounds:       %d' % num_rounds)
+		if divergence is None:
+			print('Equivalent:   yes')
+		else:
+			print('Equivalent:   no; first differs in round %(round)d of seed %(seed)d, '
+				'with set size %(set_size)d and hand size %(starting_hand_size)d, at event %(event)d:' % divergence)
+			print('%35s %r' % ('Game', divergence['reference']))
+			print('%35s %r' % (opts.compare_engine, divergence['candidate']))
+		print('')
+		print('Time elapsed:')
+		print('%35s % 10.3f secs' % ('Game', reference_seconds))
+		print('%35s % 10.3f secs  (%.2fx)' % (opts.compare_engine, candidate_seconds, reference_seconds / candidate_seconds))
+		return
+
+	if opts.benchmarks:
+		results = benchmark_interpreters(opts.benchmarks, num_rounds, opts.players, opts.set_size,
+			opts.starting_hand_size, seed=opts.seed or 0)
+		print('Rounds:       %d' % num_rounds)
+		print('')
+		print('Rounds/sec:')
+		for interpreter, name, rate in results:
+			print('%35s % 10.3f  (%s)' % (interpreter, rate, name))
+		return
+
+	if opts.tablebase:
+		TablebasePlayer.tablebase = EndgameTablebase(opts.tablebase)
+
+	# one cache per class, shared by all its players
+	decision_caches = {}
+	if opts.decision_cache:
+		for class_name in set(opts.players):
+			player_class = globals()[class_name]
+			if player_class.cacheable:
+				player_class.decision_cache = decision_caches[class_name] = DecisionCache(opts.decision_cache)
+
+	# one timer per class, too
+	decision_timers = {}
+	if opts.time_decisions:
+		for class_name in set(opts.players):
+			globals()[class_name].decision_timer = decision_timers[class_name] = DecisionTimer(
+				opts.decision_time_limit, globals()[opts.decision_fallback])
+
 	# figure out what we'll report to
-	reporters = ['LoggingReporter'] if opts.verbose else []
+	reporters = []
+	if opts.verbose:
+		logging_reporter = BufferedLoggingReporter()
+		reporters.append(lambda: logging_reporter)
+	if opts.export_training:
+		exporter = TrainingDataReporter(opts.export_training)
+		reporters.append(lambda: exporter)
+	if opts.metrics:
+		metrics = MetricsReporter(opts.metrics, opts.metrics_interval)
+		reporters.append(lambda: metrics)
+
+	# bots are shared by every game, so that their requests can be batched
+	connections = [BotConnection.open(address) for address in opts.bots]
+	players = opts.players + [
+		functools.partial(RemotePlayer, connection=connection, timeout=opts.bot_timeout) for connection in connections]
+
+	trace_policies = []
+	if opts.trace_every is not None:
+		trace_policies.append(EveryNthRound(opts.trace_every))
+	if opts.trace_probability is not None:
+		trace_policies.append(RandomRounds(opts.trace_probability, opts.seed or 0))
+	if opts.trace_stalemates:
+		trace_policies.append(MatchingRounds(stalemate))
+	if opts.trace_score_above is not None:
+		trace_policies.append(MatchingRounds(score_above(opts.trace_score_above)))
 
 	# build the runner, start a timer, and away we go
-	runner = GameRunner(num_rounds, opts.players, opts.set_size, opts.starting_hand_size, reporters)
+	workers = []
+	if opts.coordinate:
+		if opts.seed is None:
+			opts.seed = random.randrange(1 << 32)
+		runner = ShardCoordinator(num_rounds, opts.players, opts.set_size, opts.starting_hand_size, opts.seed,
+			address=opts.coordinate, shard_seconds=opts.shard_seconds)
+		workers = [
+			subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', '%s:%d' % runner.address])
+			for num in range(opts.local_workers)
+		]
+	elif opts.processes:
+		if opts.seed is None:
+			opts.seed = random.randrange(1 << 32)
+		runner = ProcessGameRunner(num_rounds, opts.players, opts.set_size, opts.starting_hand_size, opts.seed,
+			processes=opts.processes)
+	elif opts.stratify:
+		runner = StratifiedRunner(num_rounds, players, opts.set_size, opts.starting_hand_size, reporters,
+			allocation=opts.stratify, pilot_rounds=opts.pilot_rounds, seed=opts.seed,
+			trace_policies=trace_policies or None, results_path=opts.results)
+	elif opts.concurrency > 1:
+		runner = ConcurrentGameRunner(num_rounds, players, opts.set_size, opts.starting_hand_size, reporters,
+			opts.concurrency, seed=opts.seed, trace_policies=trace_policies or None, results_path=opts.results)
+	else:
+		runner = GameRunner(num_rounds, players, opts.set_size, opts.starting_hand_size, reporters,
+			checkpoint_path=opts.checkpoint, checkpoint_interval=opts.checkpoint_every, seed=opts.seed,
+			trace_policies=trace_policies or None, results_path=opts.results)
+		if opts.resume:
+			runner.resume()
+		elif opts.replay_round is not None:
+			runner.rounds_done = opts.replay_round
+	if opts.progress:
+		monitor = ProgressMonitor(runner, opts.progress, status_path=opts.status_file)
+		monitor.start()
+	start_rounds = runner.rounds_done
 	start_time = time.time()
 	runner.run()
 	end_time = time.time()
+	if opts.progress:
+		monitor.stop()
+	runner.close()
+
+	for connection in connections:
+		connection.close()
+	for worker in workers:
+		worker.wait()
+	if opts.verbose:
+		logging_reporter.close()
+	if opts.export_training:
+		exporter.close()
+	if opts.metrics:
+		metrics.close()
+
+	if opts.replay_round is not None:
+		print('Replayed:     round %d of seed %d' % (opts.replay_round, opts.seed))
+	else:
+		print('Rounds:       %d' % runner.rounds)
+	print('Interpreter:  %s' % interpreter_name())
+	print('Time elapsed: %.3f secs' % (end_time - start_time))
+	print('Rounds/sec:   %.3f' % (float(runner.rounds_done - start_rounds) / (end_time - start_time)))
+	print('')
+	print('Aggregate scores:')
+	for player, score in runner.aggregate_scores.items():
+		stats = runner.stats[player]
+		print('%35s % 10d  (mean %.3f, stddev %.3f per round)' % (player, score, stats.mean, stats.stddev))
+
+	if opts.stratify:
+		print('')
+		print('Stratified estimates (mean score per round):')
+		estimates = runner.estimates()
+		for player in runner.seating:
+			mean, variance = estimates[player]
+			print('%35s % 10.3f  (standard error %.3f)' % (player, mean, variance ** 0.5))
+		print('')
+		print('By required root:')
+		for root, stats in enumerate(runner.strata_stats):
+			print('%35s % 10d rounds, means %s' % (root, runner.played[root],
+				', '.join('%s %.3f' % (player.name, stats[player].mean) for player in runner.seating)))
+
+	if decision_caches:
+		print('')
+		print('Decision caches:')
+		for class_name, cache in sorted(decision_caches.items()):
+			print('%35s % 10d hits, % 10d misses, % 10d remembered' % (class_name, cache.hits, cache.misses, len(cache)))
+
+	if decision_timers:
+		print('')
+		print('Decisions:')
+		for class_name, timer in sorted(decision_timers.items()):
+			print('%35s % 10d decisions, % 10.3f CPU secs, % 10d timeouts' % (
+				class_name, timer.latencies.count, timer.cpu_seconds, timer.timeouts))
+			print('%35s %s' % ('', timer.describe_latencies()))
+
+	if connections:
+		print('')
+		print('Bots:')
+		for address, connection in zip(opts.bots, connections):
+			print('%35s % 10d requests in % 10d batches' % (address, connection.requests, connection.batches))
+
+	if opts.results:
+		print('')
+		print('Results:      %d rounds in %s' % (len(ResultsStore(opts.results)), opts.results))
+
+	if trace_policies:
+		print('')
+		print('Traced:       %d rounds' % runner.traced)
+
+	if opts.processes:
+		print('')
+		print('Seed:         %d' % opts.seed)
+
+	if opts.coordinate:
+		print('')
+		print('Seed:         %d' % opts.seed)
+		print('Shards:       %d (%d reassigned)' % (runner.shards, runner.retries))
 
-	print 'Rounds:       %d' % runner.rounds
-	print 'Time elapsed: %.3f secs' % (end_time - start_time)
-	print 'Rounds/sec:   %.3f' % (float(runner.rounds) / (end_time - start_time))
-	print ''
-	print 'Aggregate scores:'
-	for player, score in runner.aggregate_scores.iteritems():
-		print '%35s % 10d' % (player, score)
+	if opts.export_training:
+		print('')
+		print('Training data:')
+		print('%35s % 10d positions' % (opts.export_training, exporter.writer.total_rows if exporter.writer else 0))
 
 if __name__ == '__main__':
 	main()
\ No newline at end of file
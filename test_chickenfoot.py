@@ -1,16 +1,31 @@
 '''
 Unit tests for chickenfoot.py
 
-Run this with nose: $ nosetests
+Run this with pytest: $ python -m pytest
 
-If you want to run a single test, try: nosetests test_chickenfoot:ClassName.method_name
+If you want to run a single test, try: python -m pytest test_chickenfoot.py::ClassName::method_name
 '''
 
 # std lib imports
 import collections
+import copy
+import functools
+import http.client
+import io
+import json
 import itertools
 import optparse
+import os
+import pickle
 import random
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import types
 import unittest
 
@@ -56,10 +71,33 @@ class FactorialCombinationsTest(unittest.TestCase):
 		factorial_combinations: produces tuples as expected
 		'''
 		actual = list(chickenfoot.factorial_combinations(1))
-		self.assertEquals([(0, 0), (0, 1), (1, 1)], actual)
+		self.assertEqual([(0, 0), (0, 1), (1, 1)], actual)
 
 		actual = list(chickenfoot.factorial_combinations(2))
-		self.assertEquals([(0, 0), (0, 1), (1, 1), (0, 2), (1, 2), (2, 2)], actual)
+		self.assertEqual([(0, 0), (0, 1), (1, 1), (0, 2), (1, 2), (2, 2)], actual)
+
+	def test_tile_index(self):
+		'''
+		tile_index: numbers tiles in the order of factorial_combinations, ignoring the order of ends
+		'''
+		for index, (a, b) in enumerate(chickenfoot.factorial_combinations(4)):
+			self.assertEqual(index, chickenfoot.tile_index(a, b))
+			self.assertEqual(index, chickenfoot.tile_index(b, a))
+		self.assertEqual(list(chickenfoot.factorial_combinations(3)), chickenfoot.tile_catalogue(3))
+
+	def test_tile_set(self):
+		'tile_set: returns the same Tiles every time, in the order of tile_index'
+		tiles = chickenfoot.tile_set(4)
+		self.assertTrue(tiles is chickenfoot.tile_set(4))
+		self.assertEqual(chickenfoot.tile_catalogue(4), [(tile.a, tile.b) for tile in tiles])
+		self.assertEqual(list(tiles), chickenfoot.Boneyard(4).tiles)
+
+	def test_bits(self):
+		'''
+		bits: yields the indices of set bits, lowest first
+		'''
+		self.assertEqual([], list(chickenfoot.bits(0)))
+		self.assertEqual([0, 2, 5], list(chickenfoot.bits(0x25)))
 
 class NodeTest(unittest.TestCase):
 	def test_leaves(self):
@@ -71,16 +109,16 @@ class NodeTest(unittest.TestCase):
 		root = chickenfoot.Root(tile)
 
 		# no children; root tile should be the only leaf
-		self.assertEquals([root], [i for i in root.leaves])
+		self.assertEqual([root], [i for i in root.leaves])
 
 		# we'll build a first row of tiles (9, 1) and (9, 2)
 		# call this "Row A"
 		childA1 = root.add_child(chickenfoot.Tile(9, 1))
-		self.assertEquals([childA1], [i for i in root.leaves])
+		self.assertEqual([childA1], [i for i in root.leaves])
 
 		# add another child
 		childA2 = root.add_child(chickenfoot.Tile(9, 2))
-		self.assertEquals([childA1, childA2], [i for i in root.leaves])
+		self.assertEqual([childA1, childA2], [i for i in root.leaves])
 
 		# add (1, 0) to childA1, and add (2, 3) to childA2
 		# call this "row B"
@@ -88,7 +126,7 @@ class NodeTest(unittest.TestCase):
 		childB2 = childA2.add_child(chickenfoot.Tile(2, 3))
 		
 		# only childrenB nodes should be leaves
-		self.assertEquals([childB1, childB2], [i for i in root.leaves])
+		self.assertEqual([childB1, childB2], [i for i in root.leaves])
 
 	def test_bottom(self):
 		'''
@@ -96,10 +134,10 @@ class NodeTest(unittest.TestCase):
 		'''
 		tile = chickenfoot.Tile(1, 2)
 		root = chickenfoot.Root(tile)
-		self.assertEquals(2, root.bottom)
+		self.assertEqual(2, root.bottom)
 
 		root.orientation = chickenfoot.Orientation.INVERTED
-		self.assertEquals(1, root.bottom)
+		self.assertEqual(1, root.bottom)
 
 	def test_add_child(self):
 		'''
@@ -109,7 +147,7 @@ class NodeTest(unittest.TestCase):
 
 		# add four children
 		children = [root.add_child(chickenfoot.Tile(6, i)) for i in range(4)]
-		self.assertEquals(children, root.children)
+		self.assertEqual(children, root.children)
 
 		# attempting to add a fifth child raises NodeFullException
 		self.assertRaises(chickenfoot.NodeFullException, root.add_child, chickenfoot.Tile(5, 6))
@@ -127,7 +165,7 @@ class NodeTest(unittest.TestCase):
 		root = chickenfoot.Root(tile)
 		
 		# asking for an attachment place for the root should be possible
-		self.assertEquals(root, root.find_attach_position(chickenfoot.Tile(1, 6)))
+		self.assertEqual(root, root.find_attach_position(chickenfoot.Tile(1, 6)))
 		
 		# add two children: (1, 6) and (2, 6)
 		children = [root.add_child(chickenfoot.Tile(i, 6)) for i in (1, 2)]
@@ -151,8 +189,8 @@ class GameTest(unittest.TestCase):
 		reporter = MockReporter()
 		game = chickenfoot.Game(6, 6, 4, [p1], reporters=[reporter])
 		game._setup_player_hands()
-		self.assertEquals(4, len(p1.hand))
-		self.assertEquals([p1], reporter.players)
+		self.assertEqual(4, len(p1.hand))
+		self.assertEqual([p1], reporter.players)
 
 	def test_root_tile_turn_found(self):
 		'''
@@ -172,11 +210,11 @@ class GameTest(unittest.TestCase):
 
 		# assert that the expected root tile got picked
 		root_tile = game.root.tile
-		self.assertEquals((9, 9), game.root.tile.ends)
+		self.assertEqual((9, 9), game.root.tile.ends)
 
 		# assert hand sizes
-		self.assertEquals(3, len(p1.hand))
-		self.assertEquals(2, len(p2.hand))
+		self.assertEqual(3, len(p1.hand))
+		self.assertEqual(2, len(p2.hand))
 
 	def test_root_tile_turn_not_found(self):
 		'''
@@ -194,11 +232,11 @@ class GameTest(unittest.TestCase):
 		game._root_tile_turn()
 
 		# assert that the expected root tile did not get added
-		self.assertEquals(None, game.root)
+		self.assertEqual(None, game.root)
 
 		# assert hand sizes
-		self.assertEquals(4, len(p1.hand))
-		self.assertEquals(4, len(p2.hand))
+		self.assertEqual(4, len(p1.hand))
+		self.assertEqual(4, len(p2.hand))
 
 	def test_root_tile_turn_boneyard_exhausted(self):
 		'''
@@ -225,20 +263,20 @@ class GameTest(unittest.TestCase):
 
 		# run one root tile turn, both players should have drawn
 		game._root_tile_turn()
-		self.assertEquals([(0, 0)], [tile.ends for tile in p1.hand])
-		self.assertEquals([(1, 0)], [tile.ends for tile in p2.hand])
+		self.assertEqual([(0, 0)], [tile.ends for tile in p1.hand])
+		self.assertEqual([(1, 0)], [tile.ends for tile in p2.hand])
 		self.assertFalse(game.root)
 
 		# run another root tile turn; p1 should have drawn the root tile; p2, nothing
 		game._root_tile_turn()
-		self.assertEquals([(0, 0), (1, 1)], [tile.ends for tile in p1.hand])
-		self.assertEquals([(1, 0)], [tile.ends for tile in p2.hand])
+		self.assertEqual([(0, 0), (1, 1)], [tile.ends for tile in p1.hand])
+		self.assertEqual([(1, 0)], [tile.ends for tile in p2.hand])
 		self.assertFalse(game.root)
 
 		# run another root tile turn; p1 should play the root
 		game._root_tile_turn()
-		self.assertEquals([(0, 0)], [tile.ends for tile in p1.hand])
-		self.assertEquals([(1, 0)], [tile.ends for tile in p2.hand])
+		self.assertEqual([(0, 0)], [tile.ends for tile in p1.hand])
+		self.assertEqual([(1, 0)], [tile.ends for tile in p2.hand])
 		self.assertTrue(game.root)
 
 	def test_handle_play_root_to_open(self):
@@ -257,18 +295,18 @@ class GameTest(unittest.TestCase):
 			game._handle_play(chickenfoot.Tile(1, 9), game.root)
 
 		# we should still be in 'ROOT' state
-		self.assertEquals(chickenfoot.Game.State.ROOT, game.state)
+		self.assertEqual(chickenfoot.Game.State.ROOT, game.state)
 
 		# the root should now have three children
-		self.assertEquals(3, len(game.root.children))
+		self.assertEqual(3, len(game.root.children))
 
 		# add a fourth tile
 		game._handle_play(chickenfoot.Tile(1, 9), game.root)
 
 		# game should have switched to 'OPEN' state
-		self.assertEquals(None, game.current_chickie)
-		self.assertEquals(chickenfoot.Game.State.OPEN, game.state)
-		self.assertEquals(4, len(game.root.children))
+		self.assertEqual(None, game.current_chickie)
+		self.assertEqual(chickenfoot.Game.State.OPEN, game.state)
+		self.assertEqual(4, len(game.root.children))
 
 	def test_handle_play_open_to_chickie(self):
 		'''
@@ -287,9 +325,9 @@ class GameTest(unittest.TestCase):
 		game._handle_play(chickenfoot.Tile(1, 1), game.root.children[0])
 
 		# assert that the state switched and the new tile is attached
-		self.assertEquals(game.root.children[0].children[0], game.current_chickie)
-		self.assertEquals(chickenfoot.Game.State.CHICKIE, game.state)
-		self.assertEquals(1, len(game.root.children[0].children))
+		self.assertEqual(game.root.children[0].children[0], game.current_chickie)
+		self.assertEqual(chickenfoot.Game.State.CHICKIE, game.state)
+		self.assertEqual(1, len(game.root.children[0].children))
 
 	def test_handle_play_open_to_open(self):
 		'''
@@ -308,9 +346,9 @@ class GameTest(unittest.TestCase):
 		game._handle_play(chickenfoot.Tile(1, 2), game.root.children[0])
 
 		# assert that the state switched and the new tile is attached
-		self.assertEquals(None, game.current_chickie)
-		self.assertEquals(chickenfoot.Game.State.OPEN, game.state)
-		self.assertEquals(1, len(game.root.children[0].children))
+		self.assertEqual(None, game.current_chickie)
+		self.assertEqual(chickenfoot.Game.State.OPEN, game.state)
+		self.assertEqual(1, len(game.root.children[0].children))
 
 	def test_handle_play_chickie_to_open(self):
 		'''
@@ -336,17 +374,17 @@ class GameTest(unittest.TestCase):
 			game._handle_play(chickenfoot.Tile(1, 2), chickie_node)
 
 		# assert that the state is still chickie, and there are two children
-		self.assertEquals(chickenfoot.Game.State.CHICKIE, game.state)
-		self.assertEquals(chickie_node, game.current_chickie)
-		self.assertEquals(2, len(chickie_node.children))
+		self.assertEqual(chickenfoot.Game.State.CHICKIE, game.state)
+		self.assertEqual(chickie_node, game.current_chickie)
+		self.assertEqual(2, len(chickie_node.children))
 
 		# add a third tile
 		game._handle_play(chickenfoot.Tile(1, 3), chickie_node)
 
 		# assert that the chickenfoot is closed
-		self.assertEquals(chickenfoot.Game.State.OPEN, game.state)
-		self.assertEquals(None, game.current_chickie)
-		self.assertEquals(3, len(chickie_node.children))		
+		self.assertEqual(chickenfoot.Game.State.OPEN, game.state)
+		self.assertEqual(None, game.current_chickie)
+		self.assertEqual(3, len(chickie_node.children))		
 
 	def test_round_over_empty_hand(self):
 		'''
@@ -408,13 +446,13 @@ class GameTest(unittest.TestCase):
 		player.hand = [chickenfoot.Tile(1, 1), chickenfoot.Tile(2, 2), chickenfoot.Tile(9, 1), chickenfoot.Tile(2, 9)]
 
 		# two of the tiles should be opportunities
-		self.assertEquals(player.hand[2:], game._opportunities(player))
+		self.assertEqual(player.hand[2:], game._opportunities(player))
 
 		# change the player's hand to have all invalid tiles
 		player.hand = [chickenfoot.Tile(1, 1)]
 
 		# the player should have no opportunities now
-		self.assertEquals([], game._opportunities(player))
+		self.assertEqual([], game._opportunities(player))
 
 	def test_opportunities_chickie(self):
 		'''
@@ -440,7 +478,7 @@ class GameTest(unittest.TestCase):
 		player.hand = [chickenfoot.Tile(i, i) for i in range(4)]
 
 		# only the (1, 1) tile should be an opportunity
-		self.assertEquals([player.hand[1]], game._opportunities(player))
+		self.assertEqual([player.hand[1]], game._opportunities(player))
 
 	def test_opportunities_root(self):
 		'''
@@ -458,7 +496,7 @@ class GameTest(unittest.TestCase):
 		player.hand = [chickenfoot.Tile(9, i) for i in range(3)] + [chickenfoot.Tile(i, i) for i in range(3)]
 
 		# the (9, x) tiles are immediately opportunities
-		self.assertEquals(player.hand[:3], game._opportunities(player))
+		self.assertEqual(player.hand[:3], game._opportunities(player))
 
 		# add the (9, x) tiles to the board; the player now has only the double tiles
 		for i in range(3): 
@@ -467,7 +505,7 @@ class GameTest(unittest.TestCase):
 		# there is one spot remaining in the root arm, but this player doesn't have any 9s
 		# we shouldn't be allowed to attach to any of the leaf ends, even though that would 
 		# be allowed in normal play
-		self.assertEquals([], game._opportunities(player))
+		self.assertEqual([], game._opportunities(player))
 
 	def test_opportunities_bottom_only(self):
 		'Game._opportunities: only considers the bottom of leaf tiles for attachment potential'
@@ -482,11 +520,11 @@ class GameTest(unittest.TestCase):
 
 		# give the player (0, 5); they should have no opportunities
 		player.hand = [chickenfoot.Tile(0, 5)]
-		self.assertEquals([], game._opportunities(player))
+		self.assertEqual([], game._opportunities(player))
 
 		# give the player (4, 1), it should be an opportunity
 		player.hand = [chickenfoot.Tile(4, 1)]
-		self.assertEquals(1, len(game._opportunities(player)))
+		self.assertEqual(1, len(game._opportunities(player)))
 
 	def test_run_root_tile_turn(self):
 		'''
@@ -515,7 +553,7 @@ class GameTest(unittest.TestCase):
 			game.run()
 
 		# check that _root_tile_turn got called the expected number of times
-		self.assertEquals(3, game._root_tile_turn_call_count)
+		self.assertEqual(3, game._root_tile_turn_call_count)
 
 	def _mock_game_methods(self, game, hands):
 		'Overwrite Game.draw and Game._setup_player_hands'
@@ -540,7 +578,7 @@ class GameTest(unittest.TestCase):
 				(9, 4) - finishes root arms
 				(1, 0) - one open play
 			'''
-			for player, hand in itertools.izip(self.players, hands):
+			for player, hand in zip(self.players, hands):
 				player.hand = hand
 		
 		# replace destination attributes
@@ -561,20 +599,20 @@ class GameTest(unittest.TestCase):
 
 		# now assert that the first player has an empty hand, and that the tree 
 		# was built as expected
-		self.assertEquals([], game.players[0].hand)
-		self.assertEquals((9, 9), game.root.tile.ends)
+		self.assertEqual([], game.players[0].hand)
+		self.assertEqual((9, 9), game.root.tile.ends)
 		# root should have 4 children, in any order
-		self.assertEquals(set([(9, 1), (9, 2), (9, 3), (9, 4)]), set([child_node.tile.ends for child_node in game.root.children]))
+		self.assertEqual(set([(9, 1), (9, 2), (9, 3), (9, 4)]), set([child_node.tile.ends for child_node in game.root.children]))
 
 		# find the (9, 1) tile
 		for child in game.root.children:
 			if child.tile.ends == (9, 1):
 				# first child of the root should have 1 sub-child
-				self.assertEquals((1, 0), child.children[0].tile.ends)
+				self.assertEqual((1, 0), child.children[0].tile.ends)
 				break
 		
 		# score dict should have been created
-		self.assertEquals({game.players[0]: 0}, game.scores)
+		self.assertEqual({game.players[0]: 0}, game.scores)
 
 	def test_run_two_player(self):
 		'''
@@ -594,20 +632,20 @@ class GameTest(unittest.TestCase):
 
 		# now assert that the first player has an empty hand, and that the tree 
 		# was built as expected
-		self.assertEquals([], game.players[0].hand)
-		self.assertEquals((9, 9), game.root.tile.ends)
+		self.assertEqual([], game.players[0].hand)
+		self.assertEqual((9, 9), game.root.tile.ends)
 		# root should have 4 children, in any order
-		self.assertEquals(set([(9, 1), (9, 2), (9, 3), (9, 4)]), set([child_node.tile.ends for child_node in game.root.children]))
+		self.assertEqual(set([(9, 1), (9, 2), (9, 3), (9, 4)]), set([child_node.tile.ends for child_node in game.root.children]))
 		
 		# find the (9, 1) tile
 		for child in game.root.children:
 			if child.tile.ends == (9, 1):
 				# first child of the root should have 1 sub-child
-				self.assertEquals((1, 0), child.children[0].tile.ends)
+				self.assertEqual((1, 0), child.children[0].tile.ends)
 				break
 		
 		# score dict should have been created
-		self.assertEquals({'p1': 4, 'p2': 0}, dict((player.name, score) for player, score in game.scores.iteritems()))
+		self.assertEqual({'p1': 4, 'p2': 0}, dict((player.name, score) for player, score in game.scores.items()))
 
 	def test_run_chickie(self):
 		'''
@@ -626,24 +664,24 @@ class GameTest(unittest.TestCase):
 
 		# now assert that the first player has an empty hand, and that the tree 
 		# was built as expected
-		self.assertEquals([], game.players[0].hand)
-		self.assertEquals((9, 9), game.root.tile.ends)
+		self.assertEqual([], game.players[0].hand)
+		self.assertEqual((9, 9), game.root.tile.ends)
 		# root should have 4 children, in any order
-		self.assertEquals(set([(9, 1), (9, 2), (9, 3), (9, 4)]), set([child_node.tile.ends for child_node in game.root.children]))
+		self.assertEqual(set([(9, 1), (9, 2), (9, 3), (9, 4)]), set([child_node.tile.ends for child_node in game.root.children]))
 		
 		# find the (9, 4) tile
 		for child in game.root.children:
 			if child.tile.ends == (9, 4):
 				# should have played (4, 4) under (9, 4)
 				chickie_node = child.children[0]
-				self.assertEquals((4, 4), chickie_node.tile.ends)
+				self.assertEqual((4, 4), chickie_node.tile.ends)
 
 				# chickie should have 3 child nodes
-				self.assertEquals(set([(4, 3), (4, 2), (4, 1)]), set([sub_child.tile.ends for sub_child in chickie_node.children]))
+				self.assertEqual(set([(4, 3), (4, 2), (4, 1)]), set([sub_child.tile.ends for sub_child in chickie_node.children]))
 				break
 		
 		# score dict should have been created
-		self.assertEquals({'p1': 0}, dict((player.name, score) for player, score in game.scores.iteritems()))
+		self.assertEqual({'p1': 0}, dict((player.name, score) for player, score in game.scores.items()))
 
 	def test_run_draw(self):
 		'''
@@ -665,8 +703,32 @@ class GameTest(unittest.TestCase):
 		# run the game and assert the calls and tiles
 		game.run()
 
-		self.assertEquals([], game.boneyard.tiles)
-		self.assertEquals(set([(5, 5), (6, 2), (7, 3), (8, 4)]), set([leaf.tile.ends for leaf in game.root.leaves]))
+		self.assertEqual([], game.boneyard.tiles)
+		self.assertEqual(set([(5, 5), (6, 2), (7, 3), (8, 4)]), set([leaf.tile.ends for leaf in game.root.leaves]))
+
+	def test_public_knowledge(self):
+		'Game.public: keeps track of the unplayed tiles, the size of each hand, and what each player lacks'
+		voids = []
+		executing_test = self
+		class KnowledgeChecker(chickenfoot.ReporterCollection):
+			def _dispatch(self, method_name, args, kwargs):
+				if method_name != 'turn_start':
+					return
+				game = args[0].game
+				public = game.public
+				board = sum(1 << tile.index for tile in game.boneyard.tiles)
+				for player in game.players:
+					board |= player.hand.mask
+					executing_test.assertEqual(len(player.hand), public.hand_sizes[player])
+					# nobody holds a tile they've shown they lack
+					executing_test.assertEqual(0, player.hand.mask & public.excluded[player])
+					executing_test.assertEqual(public.unplayed & ~player.hand.mask, public.unseen(player))
+				executing_test.assertEqual(board, public.unplayed)
+				voids.extend(public.voids.values())
+
+		checker = KnowledgeChecker([])
+		chickenfoot.GameRunner(20, ['MaxValuePlayer', 'RandomPlayer', 'RandomPlayer'], 6, 5, [lambda: checker], seed=5).run()
+		self.assertTrue(any(voids))
 
 class TileTest(unittest.TestCase):
 	def test_ends(self):
@@ -674,7 +736,7 @@ class TileTest(unittest.TestCase):
 		Tile.ends: provides the pips for 'a' and 'b'
 		'''
 		tile = chickenfoot.Tile(1, 2)
-		self.assertEquals((1, 2), tile.ends)
+		self.assertEqual((1, 2), tile.ends)
 
 	def test_is_double(self):
 		'''
@@ -687,8 +749,8 @@ class TileTest(unittest.TestCase):
 		'''
 		Tile.value: returns the sum of pips, unless it's a double blank
 		'''
-		self.assertEquals(6, chickenfoot.Tile(3, 3).value)
-		self.assertEquals(chickenfoot.DOUBLE_BLANK_SCORE, chickenfoot.Tile(0, 0).value)
+		self.assertEqual(6, chickenfoot.Tile(3, 3).value)
+		self.assertEqual(chickenfoot.DOUBLE_BLANK_SCORE, chickenfoot.Tile(0, 0).value)
 
 class PlayerTest(unittest.TestCase):
 	'Test Player, RandomPlayer, and MaxValuePlayer'
@@ -699,37 +761,91 @@ class PlayerTest(unittest.TestCase):
 		player = chickenfoot.Player('p1')
 		tile = chickenfoot.Tile(1, 2)
 		player.hand = [tile]
-		self.assertEquals(tile, player.fetch_tile(1, 2))
+		self.assertEqual(tile, player.fetch_tile(1, 2))
 
 		# player's hand should be empty
-		self.assertEquals([], player.hand)
+		self.assertEqual([], player.hand)
 
 		# restore the tile to their hand, and try asking for the opposite order of ends
 		player.hand = [tile]
-		self.assertEquals(tile, player.fetch_tile(2, 1))
+		self.assertEqual(tile, player.fetch_tile(2, 1))
 
 		# asking for a different tile should return None
 		player.hand = [tile]
-		self.assertEquals(None, player.fetch_tile(2, 2))
+		self.assertEqual(None, player.fetch_tile(2, 2))
 
 
 	def test_pick_tile(self):
 		'Player.pick_tile: removes the tile chosen by _pick_tile'
 		player = chickenfoot.Player('p1')
 		# give the player a hand of known values
-		player.hand = [1, 2, 3]
+		tiles = [chickenfoot.Tile(0, 1), chickenfoot.Tile(0, 2), chickenfoot.Tile(0, 3)]
+		player.hand = list(tiles)
 		# mock out the choosing method
-		player._pick_tile = types.MethodType(lambda self, opportunities: 3, player)
+		player._pick_tile = types.MethodType(lambda self, opportunities: tiles[2], player)
 
 		# allow the player to pick from any of their tiles
-		self.assertEquals(3, player.pick_tile(player.hand))
+		self.assertEqual(tiles[2], player.pick_tile(player.hand))
 		# ensure that the chosen option got removed
-		self.assertEquals([1, 2], player.hand)
+		self.assertEqual(tiles[:2], player.hand)
+
+	def test_hand(self):
+		'Hand: keeps its aggregates up to date as tiles are added, fetched and picked'
+		player = chickenfoot.Player('p1')
+		for a, b in [(3, 4), (0, 0), (2, 5), (3, 3), (1, 6)]:
+			player.add_tile(chickenfoot.Tile(a, b))
+		hand = player.hand
+		self.assertEqual(50 + 7 + 7 + 7 + 6, player.score)
+		self.assertEqual(2, hand.doubles)
+		self.assertEqual({0: 1, 1: 1, 2: 1, 3: 2, 4: 1, 5: 1, 6: 1}, dict(hand.pip_counts))
+		# equal values in order of arrival
+		self.assertEqual([(0, 0), (3, 4), (2, 5), (1, 6), (3, 3)], [tile.ends for tile in hand.by_value()])
+
+		player.fetch_tile(0, 0)
+		player._pick_tile = types.MethodType(lambda self, opportunities: opportunities[0], player)
+		player.pick_tile([hand[0]])
+		self.assertEqual([(2, 5), (3, 3), (1, 6)], [tile.ends for tile in hand])
+		self.assertEqual(7 + 6 + 7, player.score)
+		self.assertEqual(1, hand.doubles)
+		self.assertEqual(0, hand.pip_counts[4])
+		self.assertEqual(1, hand.pip_counts[3])
+		self.assertEqual((2, 5), hand.highest().ends)
+		self.assertEqual([(2, 5), (1, 6), (3, 3)], [tile.ends for tile in hand.by_value()])
+
+		# assigning a list makes a Hand
+		player.hand = [chickenfoot.Tile(1, 2)]
+		self.assertEqual(3, player.score)
+		player.hand.pop()
+		self.assertEqual((0, None), (player.score, player.hand.highest()))
+
+	def test_hand_copy(self):
+		'Hand: copies and pickles with the same tiles and aggregates, and only changes through its own methods'
+		tiles = [chickenfoot.Tile(a, b) for a, b in [(3, 4), (0, 0), (2, 5), (6, 1)]]
+		hand = chickenfoot.Hand(tiles)
+		for other in copy.copy(hand), copy.deepcopy(hand), pickle.loads(pickle.dumps(hand)):
+			self.assertEqual([tile.ends for tile in hand], [tile.ends for tile in other])
+			self.assertEqual((hand.value, hand.doubles, hand.pip_counts, hand.mask),
+				(other.value, other.doubles, other.pip_counts, other.mask))
+			self.assertEqual([tile.ends for tile in hand.by_value()], [tile.ends for tile in other.by_value()])
+		duplicate = copy.copy(hand)
+		duplicate.pop()
+		self.assertEqual(4, len(hand))
+		self.assertEqual(tiles[:3], duplicate)
+
+		# the same tile twice
+		hand.append(tiles[0])
+		hand.remove(tiles[0])
+		hand.remove(tiles[0])
+		self.assertEqual(tiles[1:], hand)
+		self.assertEqual(50 + 7 + 7, hand.value)
+		self.assertEqual(0, hand.mask & 1 << tiles[0].index)
+		for mutator in 'insert', 'clear', 'sort', '__setitem__', '__delitem__', '__iadd__':
+			self.assertFalse(hasattr(hand, mutator))
 
 	def test_random_player(self):
 		'RandomPlayer._pick_tile: chooses no one opportunity, out of a hundred given, more than 5 out of 20 tries'
 		# build an ordered list 0-99
-		opportunities = range(100)
+		opportunities = list(range(100))
 		player = chickenfoot.RandomPlayer('your mom')
 
 		# tally occurrences across 20 choices
@@ -754,7 +870,78 @@ class PlayerTest(unittest.TestCase):
 
 		for i in range(20):
 			random.shuffle(opportunities)
-			self.assertEquals(99, player._pick_tile(opportunities).value)
+			self.assertEqual(99, player._pick_tile(opportunities).value)
+
+	def test_decision_cache(self):
+		'DecisionCache: remembers the most recently used decisions, counting hits and misses'
+		cache = chickenfoot.DecisionCache(2)
+		cache.put('a', 0)
+		cache.put('b', 1)
+		self.assertEqual(0, cache.get('a'))
+		cache.put('c', 2)
+		# 'b' was the least recently used
+		self.assertEqual(None, cache.get('b'))
+		self.assertEqual((0, 2), (cache.get('a'), cache.get('c')))
+		self.assertEqual((3, 1, 2), (cache.hits, cache.misses, len(cache)))
+
+	def test_cached_decisions(self):
+		'Player.pick_tile: makes the same choices with a DecisionCache, for cacheable strategies only'
+		players = ['MaxValuePlayer', 'MaxValuePlayer', 'SolverPlayer']
+		uncached = chickenfoot.GameRunner(12, players, 4, 4, [], seed=8)
+		uncached.run()
+
+		cache = chickenfoot.DecisionCache()
+		self.addCleanup(delattr, chickenfoot.MaxValuePlayer, 'decision_cache')
+		chickenfoot.MaxValuePlayer.decision_cache = cache
+		cached = chickenfoot.GameRunner(12, players, 4, 4, [], seed=8)
+		cached.run()
+		self.assertEqual(
+			[uncached.aggregate_scores[player] for player in uncached.seating],
+			[cached.aggregate_scores[player] for player in cached.seating])
+		self.assertTrue(cache.hits > 0)
+		# SolverPlayer inherits the cache, but looks further than decision_key
+		self.assertEqual(set([chickenfoot.MaxValuePlayer]), set(key[0] for key in cache._decisions))
+
+	def test_decision_timer(self):
+		'DecisionTimer: times decisions, and makes the fallback\'s choice for players out of time'
+		class SlowPlayer(chickenfoot.Player):
+			'Takes the last opportunity, too slowly'
+			def _pick_tile(self, opportunities):
+				time.sleep(0.01)
+				return opportunities[-1]
+		class GivingUpPlayer(chickenfoot.Player):
+			'Runs out of time at once'
+			def _pick_tile(self, opportunities):
+				assert self.deadline is not None
+				raise chickenfoot.DecisionTimeout
+		def hand(player):
+			player.hand = [chickenfoot.Tile(1, 2), chickenfoot.Tile(6, 6), chickenfoot.Tile(3, 3)]
+			return player, list(player.hand)
+
+		timer = chickenfoot.DecisionTimer()
+		player, opportunities = hand(SlowPlayer('slow'))
+		player.decision_timer = timer
+		self.assertEqual(opportunities[2], player.pick_tile(opportunities))
+		self.assertEqual((1, 0), (timer.latencies.count, timer.timeouts))
+		self.assertTrue(timer.latencies.sum >= 0.01)
+
+		timer = chickenfoot.DecisionTimer(0.001, chickenfoot.MaxValuePlayer)
+		for player_class in SlowPlayer, GivingUpPlayer:
+			player, opportunities = hand(player_class('p'))
+			player.decision_timer = timer
+			self.assertEqual(opportunities[1], player.pick_tile(opportunities))
+			self.assertEqual([opportunities[0], opportunities[2]], list(player.hand))
+			self.assertEqual(None, player.deadline)
+		self.assertEqual((2, 2), (timer.latencies.count, timer.timeouts))
+
+		# the fallback is a player of its own, choosing with the random numbers of the one out of time
+		timer = chickenfoot.DecisionTimer(0.001, chickenfoot.RemotePlayer)
+		self.assertTrue(isinstance(timer.fallback, chickenfoot.RemotePlayer))
+		player, opportunities = hand(GivingUpPlayer('p'))
+		player.decision_timer = timer
+		player.random = random.Random(5)
+		self.assertEqual(random.Random(5).choice(opportunities), player.pick_tile(opportunities))
+		self.assertEqual((1, 1), (timer.timeouts, timer.fallback.fallbacks))
 
 class GameRunnerTest(unittest.TestCase):
 	def test_run(self):
@@ -767,13 +954,15 @@ class GameRunnerTest(unittest.TestCase):
 			# track how many instances are created
 			instance_count = 0
 
-			def __init__(self, required_root, set_size, starting_hand_size, players, reporters):
+			def __init__(self, required_root, set_size, starting_hand_size, players, reporters, seed, round_number, rng):
 				'assert that args provided are as expected'
+				executing_test.assertEqual(None, seed)
+				executing_test.assertEqual(random, rng)
 				# todo: assert required_root - how?
-				executing_test.assertEquals(2, set_size)
-				executing_test.assertEquals(3, starting_hand_size)
+				executing_test.assertEqual(2, set_size)
+				executing_test.assertEqual(3, starting_hand_size)
 				# player properties
-				executing_test.assertEquals(
+				executing_test.assertEqual(
 					[
 						chickenfoot.MaxValuePlayer, 
 						chickenfoot.RandomPlayer, 
@@ -782,9 +971,9 @@ class GameRunnerTest(unittest.TestCase):
 					], 
 					[i.__class__ for i in players]
 				)
-				executing_test.assertEquals(['p0', 'p1', 'p2', 'p3'], [i.name for i in players])
+				executing_test.assertEqual(['p0', 'p1', 'p2', 'p3'], [i.name for i in players])
 				# reporters
-				executing_test.assertEquals([chickenfoot.LoggingReporter], [i.__class__ for i in reporters])
+				executing_test.assertEqual([chickenfoot.LoggingReporter], [i.__class__ for i in reporters])
 
 				# must copy in players for interaction with GameRunner.aggregate_scores
 				self.players = players
@@ -800,7 +989,7 @@ class GameRunnerTest(unittest.TestCase):
 			runner.run()
 		
 		# one game should have been created per round
-		self.assertEquals(10, MockGame.instance_count)
+		self.assertEqual(10, MockGame.instance_count)
 		# aggregate scores should be 10 * each round, which is (p1: 0, p2: 5, p3: 10, p4: 15)
 		expected = {
 			'p0': 0,
@@ -808,7 +997,200 @@ class GameRunnerTest(unittest.TestCase):
 			'p2': 100,
 			'p3': 150,
 		}
-		self.assertEquals(expected, dict([(player.name, score) for player, score in runner.aggregate_scores.iteritems()]))
+		self.assertEqual(expected, dict([(player.name, score) for player, score in runner.aggregate_scores.items()]))
+
+	def test_running_stats(self):
+		'RunningStats: agrees with the two-pass mean and sample variance'
+		values = [3, 0, 17, 8, 8, 41, 2]
+		stats = chickenfoot.RunningStats()
+		self.assertEqual(0.0, stats.variance)
+		for value in values:
+			stats.add(value)
+		mean = float(sum(values)) / len(values)
+		self.assertEqual(len(values), stats.count)
+		self.assertAlmostEqual(mean, stats.mean)
+		self.assertAlmostEqual(sum((value - mean) ** 2 for value in values) / (len(values) - 1), stats.variance)
+
+	def test_replay(self):
+		'GameRunner.run: with a seed, any round can be played alone, with the same result as in the whole run'
+		runner = chickenfoot.GameRunner(8, ['MaxValuePlayer', 'RandomPlayer', 'SolverPlayer'], 4, 4, [], seed=12)
+		per_round = []
+		original_record = runner._record
+		def record(game):
+			per_round.append(sorted((player.name, score) for player, score in game.scores.items()))
+			original_record(game)
+		runner._record = record
+		runner.run()
+
+		for round_number in (6, 0, 3):
+			replay = chickenfoot.GameRunner(round_number + 1, ['MaxValuePlayer', 'RandomPlayer', 'SolverPlayer'], 4, 4, [], seed=12)
+			replay.rounds_done = round_number
+			# the global generator plays no part
+			random.seed(round_number)
+			replay.run()
+			self.assertEqual(per_round[round_number],
+				sorted((player.name, score) for player, score in replay.aggregate_scores.items()))
+
+		concurrent = chickenfoot.ConcurrentGameRunner(8, ['MaxValuePlayer', 'RandomPlayer', 'SolverPlayer'], 4, 4, [], 3, seed=12)
+		concurrent.run()
+		self.assertEqual(
+			sorted((player.name, score) for player, score in runner.aggregate_scores.items()),
+			sorted((player.name, score) for player, score in concurrent.aggregate_scores.items()))
+
+	def test_concurrent_isolation(self):
+		'ConcurrentGameRunner.run: gives each thread its own players and random numbers'
+		players = {}
+		class PlayerRecorder(chickenfoot.ReporterCollection):
+			def _dispatch(self, method_name, args, kwargs):
+				if method_name == 'initial_hands':
+					players.setdefault(threading.current_thread(), set()).update(
+						(player, player.random) for player in args[0])
+
+		random.seed(3)
+		state = random.getstate()
+		recorder = PlayerRecorder([])
+		runner = chickenfoot.ConcurrentGameRunner(40, ['MaxValuePlayer', 'RandomPlayer'], 5, 4, [lambda: recorder], 4)
+		runner.run()
+		# the global generator plays no part
+		self.assertEqual(state, random.getstate())
+		self.assertEqual(40, runner.rounds_done)
+		seen = [player for thread_players in players.values() for player in thread_players]
+		self.assertEqual(len(seen), len(set(player for player, rng in seen)))
+		self.assertEqual(len(players), len(set(rng for player, rng in seen)))
+		self.assertTrue(all(rng is not random for player, rng in seen))
+
+		# and every LoggingReporter shares the one handler
+		reporters = [chickenfoot.LoggingReporter() for i in range(3)]
+		self.assertEqual(1, len(reporters[0].logger.handlers))
+
+	def test_trace_policies(self):
+		'GameRunner.run: reports only the rounds chosen by its trace policies, replaying those chosen by outcome'
+		class RoundRecorder(chickenfoot.ReporterCollection):
+			def __init__(self):
+				self.rounds = []
+
+			def _dispatch(self, method_name, args, kwargs):
+				if method_name == 'round_over':
+					self.rounds.append(sorted((player.name, score) for player, score in args[0].items()))
+
+		players = ['MaxValuePlayer', 'RandomPlayer']
+		self.assertRaises(ValueError, chickenfoot.GameRunner, 5, players, 4, 4, [],
+			trace_policies=[chickenfoot.MatchingRounds(chickenfoot.stalemate)])
+
+		everything = RoundRecorder()
+		runner = chickenfoot.GameRunner(30, players, 4, 4, [lambda: everything], seed=8)
+		runner.run()
+		self.assertEqual(30, runner.traced)
+
+		recorder = RoundRecorder()
+		policies = [chickenfoot.EveryNthRound(10, 3), chickenfoot.MatchingRounds(chickenfoot.score_above(40))]
+		sampled = chickenfoot.GameRunner(30, players, 4, 4, [lambda: recorder], seed=8, trace_policies=policies)
+		sampled.run()
+		expected = [scores for num, scores in enumerate(everything.rounds)
+			if num % 10 == 3 or max(score for name, score in scores) > 40]
+		self.assertTrue(0 < len(expected) < 30)
+		self.assertEqual(expected, recorder.rounds)
+		self.assertEqual(len(expected), sampled.traced)
+		self.assertEqual(
+			sorted((player.name, score) for player, score in runner.aggregate_scores.items()),
+			sorted((player.name, score) for player, score in sampled.aggregate_scores.items()))
+
+	def test_random_rounds(self):
+		'RandomRounds.trace: chooses the same rounds every time, in about the right proportion'
+		policy = chickenfoot.RandomRounds(0.25, seed=1)
+		chosen = [num for num in range(2000) if policy.trace(num)]
+		self.assertEqual(chosen, [num for num in range(2000) if chickenfoot.RandomRounds(0.25, seed=1).trace(num)])
+		self.assertTrue(400 < len(chosen) < 600)
+		# it chooses before the round, so never plays one again
+		self.assertEqual((False, False), (policy.replays, policy.retrace(0, None)))
+
+	def test_resume(self):
+		'GameRunner.resume: continues an interrupted run to the same results as an uninterrupted one'
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		path = os.path.join(directory, 'run.checkpoint')
+		players = ['MaxValuePlayer', 'RandomPlayer', 'RandomPlayer']
+		summary = lambda runner: (
+			runner.rounds_done,
+			sorted((player.name, score) for player, score in runner.aggregate_scores.items()),
+			sorted((player.name, stats.count, stats.mean, stats.m2) for player, stats in runner.stats.items()),
+			random.random(),
+		)
+
+		random.seed(3)
+		uninterrupted = chickenfoot.GameRunner(12, players, 4, 4, [])
+		uninterrupted.run()
+		expected = summary(uninterrupted)
+
+		class Preempted(Exception):
+			pass
+		class Preempter(chickenfoot.ReporterCollection):
+			'interrupts the run in the ninth round'
+			rounds = 0
+			def _dispatch(self, method_name, args, kwargs):
+				if method_name == 'round_over':
+					Preempter.rounds += 1
+					if Preempter.rounds == 9:
+						raise Preempted()
+
+		random.seed(3)
+		interrupted = chickenfoot.GameRunner(12, players, 4, 4, [lambda: Preempter([])],
+			checkpoint_path=path, checkpoint_interval=4)
+		self.assertRaises(Preempted, interrupted.run)
+		self.assertEqual(['run.checkpoint'], os.listdir(directory))
+
+		random.seed(4)
+		resumed = chickenfoot.GameRunner(12, players, 4, 4, [], checkpoint_path=path)
+		resumed.resume()
+		self.assertEqual(8, resumed.rounds_done)
+		resumed.run()
+		self.assertEqual(expected, summary(resumed))
+
+		# a checkpoint of some other run is refused
+		other = chickenfoot.GameRunner(12, players, 5, 4, [], checkpoint_path=path)
+		self.assertRaises(ValueError, other.resume)
+
+	def test_resume_seed(self):
+		'GameRunner.resume: refuses the checkpoint of a run with another seed, or none'
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		path = os.path.join(directory, 'run.checkpoint')
+		players = ['MaxValuePlayer', 'RandomPlayer']
+		chickenfoot.GameRunner(4, players, 4, 4, [], checkpoint_path=path, seed=1).run()
+		for seed in 99, None:
+			other = chickenfoot.GameRunner(8, players, 4, 4, [], checkpoint_path=path, seed=seed)
+			self.assertRaises(ValueError, other.resume)
+		same = chickenfoot.GameRunner(8, players, 4, 4, [], checkpoint_path=path, seed=1)
+		same.resume()
+		self.assertEqual(4, same.rounds_done)
+
+	def test_stratified(self):
+		'StratifiedRunner.run: allocates rounds among the roots, and estimates means from them'
+		players = ['MaxValuePlayer', 'RandomPlayer', 'RandomPlayer']
+		even = chickenfoot.StratifiedRunner(30, players, 4, 4, [], seed=5)
+		even.run()
+		self.assertEqual(30, even.rounds_done)
+		self.assertEqual([6] * 5, even.played)
+		# the rounds of an even allocation are those of a GameRunner run
+		expected = chickenfoot.GameRunner(30, players, 4, 4, [], seed=5)
+		expected.run()
+		self.assertEqual(
+			[expected.aggregate_scores[player] for player in expected.seating],
+			[even.aggregate_scores[player] for player in even.seating])
+		for player in even.seating:
+			mean, variance = even.estimates()[player]
+			# with equal strata, the stratified mean is the plain mean
+			self.assertAlmostEqual(even.stats[player].mean, mean)
+			self.assertAlmostEqual(sum(stats[player].variance / 25.0 / 6 for stats in even.strata_stats), variance)
+			self.assertEqual(30, sum(stats[player].count for (root, first), stats in even.cell_stats.items()))
+
+		neyman = chickenfoot.StratifiedRunner(40, players, 4, 4, [], allocation=chickenfoot.StratifiedRunner.NEYMAN,
+			pilot_rounds=3, seed=5)
+		neyman.run()
+		self.assertEqual(40, sum(neyman.played))
+		self.assertTrue(min(neyman.played) >= 3)
+		self.assertEqual([5, 0, 2], neyman.allocate(7, [2, 0, 1]))
+		self.assertEqual([2, 2], neyman.allocate(4, [0, 0]))
 
 class ParseArgsTest(unittest.TestCase):
 	class MockExit(Exception):
@@ -824,6 +1206,7 @@ class ParseArgsTest(unittest.TestCase):
 			'Store opts and args so they can be returned by parse_args'
 			self.opts = opts
 			self.args = args
+			self.defaults = {}
 		
 		def __call__(self, *args, **kwargs):
 			'''
@@ -837,11 +1220,14 @@ class ParseArgsTest(unittest.TestCase):
 			return self
 
 		def add_option(self, *args, **kwargs):
-			'no-op'
-			pass
+			'Remember the default for each option, to fill in anything the test left out'
+			self.defaults[kwargs['dest']] = kwargs.get('default')
 
 		def parse_args(self):
 			'Return whatever we were primed to return'
+			for dest, default in self.defaults.items():
+				if not hasattr(self.opts, dest):
+					setattr(self.opts, dest, default)
 			return (self.opts, self.args)
 
 		def error(self, message):
@@ -867,7 +1253,7 @@ class ParseArgsTest(unittest.TestCase):
 					self.test_case.fail('Unexpected call to OptionParser.error with message: %s' % exc_val.args[0])
 				
 				# assert that the error message is what we expect
-				self.test_case.assertEquals(self.expected_error, exc_val.args[0])
+				self.test_case.assertEqual(self.expected_error, exc_val.args[0])
 
 				# everything is hunky dory, suppress this exception
 				return True
@@ -884,7 +1270,7 @@ class ParseArgsTest(unittest.TestCase):
 			'set attributes named after the keys in "attrs", with corresponding values'
 			if 'players' not in attrs:
 				attrs['players'] = []
-			for attrname, attrval in attrs.iteritems():
+			for attrname, attrval in attrs.items():
 				setattr(self, attrname, attrval)
 
 	def _execute(self, opt_attrs, args, expected_error=None):
@@ -932,9 +1318,120 @@ class ParseArgsTest(unittest.TestCase):
 		
 		# valid case
 		actual, args = self._execute(default_opts, ['1'])
-		self.assertEquals(['MaxValuePlayer', 'RandomPlayer'], actual.players)
-		self.assertEquals(9, actual.set_size)
-		self.assertEquals(7, actual.starting_hand_size)
+		self.assertEqual(['MaxValuePlayer', 'RandomPlayer'], actual.players)
+		self.assertEqual(9, actual.set_size)
+		self.assertEqual(7, actual.starting_hand_size)
+
+	def test_build_tablebase(self):
+		'parse_args: does not require a number of rounds when building a tablebase, but limits the set size'
+		actual, num_rounds = self._execute({'build_tablebase': 'tb', 'set_size': '4', 'tablebase_max_hand': '3'}, [])
+		self.assertEqual(None, num_rounds)
+		self.assertEqual(4, actual.set_size)
+		self.assertEqual(3, actual.tablebase_max_hand)
+
+		self._execute({'build_tablebase': 'tb', 'set_size': '6'}, [],
+			expected_error='Invalid set size: 6; tablebases are limited to double-5 sets')
+
+	def test_checkpoint(self):
+		'parse_args: validates the seed and checkpoint options'
+		actual, num_rounds = self._execute({'seed': '0', 'checkpoint': 'run', 'checkpoint_every': '5', 'resume': True}, ['1'])
+		self.assertEqual(0, actual.seed)
+		self.assertEqual(5, actual.checkpoint_every)
+
+		self._execute({'seed': 'a'}, ['1'], expected_error='Invalid seed: a; must be a number')
+		self._execute({'resume': True}, ['1'], expected_error='--resume requires --checkpoint')
+		self._execute({'checkpoint': 'run', 'concurrency': '2'}, ['1'],
+			expected_error='--checkpoint can\'t be used with --concurrency')
+
+	def test_coordinate(self):
+		'parse_args: validates the coordinator and worker addresses'
+		actual, num_rounds = self._execute({'worker': 'localhost:8123'}, [])
+		self.assertEqual(None, num_rounds)
+		self.assertEqual(('localhost', 8123), actual.worker)
+		self._execute({'worker': 'localhost'}, [], expected_error='Invalid worker address: localhost; must be HOST:PORT')
+
+		actual, num_rounds = self._execute({'local_workers': '2'}, ['1'])
+		self.assertEqual(('127.0.0.1', 0), actual.coordinate)
+		self._execute({'coordinate': ':80'}, ['1'], expected_error='Invalid coordinator address: :80; must be HOST:PORT')
+		for other in {'concurrency': '2'}, {'verbose': True}, {'metrics': 'metrics.prom'}, {'trace_every': '10'}, \
+				{'decision_cache': '100'}:
+			options = dict(coordinate='host:80', **other)
+			self._execute(options, ['1'], expected_error='Coordinating can\'t be combined with --bot, --concurrency, '
+				'--checkpoint, --export-training, --results, --verbose, --metrics, --trace-* or --decision-cache')
+
+	def test_processes(self):
+		'parse_args: plays a run on worker processes, with nothing that must see its rounds in this process'
+		actual, num_rounds = self._execute({'processes': '3'}, ['10'])
+		self.assertEqual((3, 10), (actual.processes, num_rounds))
+		for other in {'results': 'results'}, {'verbose': True}, {'metrics': 'metrics.prom'}, \
+				{'trace_stalemates': True, 'seed': '1'}, {'decision_cache': '100'}:
+			options = dict(processes='3', **other)
+			self._execute(options, ['10'], expected_error='--processes can\'t be combined with --coordinate, --bot, '
+				'--concurrency, --checkpoint, --export-training, --results, --verbose, --metrics, --trace-* or '
+				'--decision-cache')
+		self._execute({'processes': '3', 'time_decisions': True}, ['10'],
+			expected_error='--time-decisions can\'t be used with --coordinate, --local-workers or --processes')
+
+	def test_decision_fallback(self):
+		'parse_args: takes any player class as a fallback'
+		actual, num_rounds = self._execute({'decision_fallback': 'SolverPlayer', 'decision_time_limit': '0.5'}, ['1'])
+		self.assertEqual((0.5, True), (actual.decision_time_limit, actual.time_decisions))
+		self._execute({'decision_fallback': 'Tile'}, ['1'], expected_error='Invalid player class: Tile')
+
+	def test_compare_engine(self):
+		'parse_args: takes Game classes by name, or any class by import path'
+		actual, num_rounds = self._execute({'compare_engine': 'Game'}, ['10'])
+		self.assertEqual(chickenfoot.Game, actual.compare_engine_class)
+		actual, num_rounds = self._execute({'compare_engine': 'chickenfoot:Game'}, ['10'])
+		self.assertEqual(chickenfoot.Game, actual.compare_engine_class)
+		for name in 'Tile', 'VecGame', 'Nothing':
+			self._execute({'compare_engine': name}, ['10'],
+				expected_error='Invalid engine class: %s; must be a Game, or MODULE:CLASS' % name)
+		self._execute({'compare_engine': 'chickenfoot:NoSuchEngine'}, ['10'],
+			expected_error='Invalid engine class: chickenfoot:NoSuchEngine '
+				'(module \'chickenfoot\' has no attribute \'NoSuchEngine\')')
+
+	def test_replay_corpus(self):
+		'parse_args: does not require a number of rounds to replay a corpus, but checks the players'
+		actual, num_rounds = self._execute({'replay_corpus': 'corpus.gz', 'players': ['MaxValuePlayer']}, [])
+		self.assertEqual(None, num_rounds)
+		self._execute({'replay_corpus': 'corpus.gz', 'players': ['Bogus']}, [],
+			expected_error='Invalid player class: Bogus')
+
+	def test_replay_round(self):
+		'parse_args: plays one round when replaying, which requires a seed'
+		actual, num_rounds = self._execute({'seed': '3', 'replay_round': '0'}, [])
+		self.assertEqual(1, num_rounds)
+		self._execute({'replay_round': '4'}, [], expected_error='--replay-round requires --seed')
+		self._execute({'seed': '3', 'replay_round': '-4'}, [],
+			expected_error='Invalid round to replay: -4; must not be negative')
+		for other in {'concurrency': '2'}, {'local_workers': '1'}, {'processes': '2'}:
+			options = dict(seed='3', replay_round='5', **other)
+			self._execute(options, [], expected_error='--replay-round can\'t be combined with --concurrency, '
+				'--coordinate, --local-workers or --processes')
+
+	def test_trace(self):
+		'parse_args: validates the tracing options'
+		actual, num_rounds = self._execute({'trace_every': '10', 'trace_probability': '0.5'}, ['1'])
+		self.assertEqual((10, 0.5), (actual.trace_every, actual.trace_probability))
+		self._execute({'trace_probability': '2'}, ['1'], expected_error='Invalid trace probability: 2.0; must be at most 1')
+		self._execute({'trace_stalemates': True}, ['1'], expected_error='--trace-stalemates and --trace-score-above require --seed')
+
+	def test_stratify(self):
+		'parse_args: validates the stratified allocation'
+		actual, num_rounds = self._execute({'stratify': 'neyman', 'pilot_rounds': '4'}, ['100'])
+		self.assertEqual(('neyman', 4), (actual.stratify, actual.pilot_rounds))
+		self._execute({'stratify': 'proportional'}, ['100'],
+			expected_error='Invalid allocation: proportional; must be "even" or "neyman"')
+		self._execute({'stratify': 'even', 'concurrency': '2'}, ['100'],
+			expected_error='--stratify can\'t be combined with --coordinate, --processes, --concurrency, --checkpoint '
+				'or --replay-round')
+
+	def test_sweep(self):
+		'parse_args: does not require a number of rounds for a sweep'
+		actual, num_rounds = self._execute({'sweep': 'spec.json', 'processes': '3'}, [])
+		self.assertEqual(None, num_rounds)
+		self.assertEqual(3, actual.processes)
 
 class BoneyardTest(unittest.TestCase):
 	def test_draw(self):
@@ -944,4 +1441,1086 @@ class BoneyardTest(unittest.TestCase):
 			self.assertTrue(boneyard.draw())
 
 		# fourth draw should return None
-		self.assertEquals(None, boneyard.draw())
\ No newline at end of file
+		self.assertEqual(None, boneyard.draw())
+
+class CounterRandomTest(unittest.TestCase):
+	def test_streams(self):
+		'round_random: gives repeatable streams, different for each seed, round and purpose'
+		draw = lambda rng: [rng.random() for i in range(5)] + [rng.getrandbits(100), rng.choice(range(1000))]
+		first = draw(chickenfoot.round_random(1, 2, 'boneyard'))
+		self.assertEqual(first, draw(chickenfoot.round_random(1, 2, 'boneyard')))
+		for other in [(2, 2, 'boneyard'), (1, 3, 'boneyard'), (1, 2, 'seating')]:
+			self.assertNotEqual(first, draw(chickenfoot.round_random(*other)))
+		for value in first[:5]:
+			self.assertTrue(0.0 <= value < 1.0)
+		self.assertTrue(0 <= first[5] < 1 << 100)
+
+	def test_state(self):
+		'CounterRandom.setstate: resumes the stream where getstate left it'
+		rng = chickenfoot.CounterRandom(99)
+		rng.random()
+		state = rng.getstate()
+		expected = [rng.random() for i in range(3)]
+		rng.setstate(state)
+		self.assertEqual(expected, [rng.random() for i in range(3)])
+
+class EndgameTest(unittest.TestCase):
+	'Test EndgamePosition, ZobristHasher, EndgameSolver, and SolverPlayer'
+
+	def _hand(self, *tiles):
+		'build a hand bitmask from (a, b) pairs'
+		return sum(1 << chickenfoot.tile_index(a, b) for a, b in tiles)
+
+	def _minimax(self, position, seat):
+		'plain minimax, without pruning or memoization, for checking the solver'
+		if position.is_terminal():
+			scores = position.scores()
+			return sum(scores) - len(scores) * scores[seat]
+		moves = position.moves()
+		if not moves:
+			return self._minimax(position.pass_turn(), seat)
+		values = [self._minimax(position.play(move), seat) for move in moves]
+		return max(values) if position.mover == seat else min(values)
+
+	def test_play_root_to_open(self):
+		'EndgamePosition.play: fills the arms of the root, then opens play'
+		catalogue = chickenfoot.tile_catalogue(3)
+		position = chickenfoot.EndgamePosition(
+			catalogue, (self._hand((3, 0), (3, 2)), self._hand((1, 3), (0, 0))), 0,
+			chickenfoot.Game.State.ROOT, (), pivot=3)
+		self.assertEqual([chickenfoot.tile_index(0, 3), chickenfoot.tile_index(2, 3)], position.moves())
+
+		position = position.play(chickenfoot.tile_index(0, 3))
+		position = position.play(chickenfoot.tile_index(1, 3))
+		self.assertEqual(chickenfoot.Game.State.ROOT, position.state)
+		self.assertEqual((0, 1), position.ends)
+		self.assertEqual(0, position.mover)
+
+		# force the root arms full
+		position = chickenfoot.EndgamePosition(catalogue, position.hands, 0, position.state, (0, 1, 2), 3)
+		position = position.play(chickenfoot.tile_index(2, 3))
+		self.assertEqual(chickenfoot.Game.State.OPEN, position.state)
+		self.assertEqual((0, 1, 2, 2), position.ends)
+		self.assertEqual(None, position.pivot)
+
+	def test_play_open_and_chickie(self):
+		'EndgamePosition.play: attaches to the first matching leaf, and builds chickenfoots in place'
+		catalogue = chickenfoot.tile_catalogue(4)
+		hands = (self._hand((1, 2), (2, 2), (2, 3)), self._hand((2, 4), (0, 2)))
+		position = chickenfoot.EndgamePosition(catalogue, hands, 0, chickenfoot.Game.State.OPEN, (4, 1, 2, 3))
+
+		# (1, 2) matches both the 1 and the 2; the 1 comes first
+		after = position.play(chickenfoot.tile_index(1, 2))
+		self.assertEqual((4, 2, 2, 3), after.ends)
+
+		# (2, 2) starts a chickenfoot where the first 2 was
+		position = position.play(chickenfoot.tile_index(2, 2))
+		self.assertEqual(chickenfoot.Game.State.CHICKIE, position.state)
+		self.assertEqual((4, 1, 3), position.ends)
+		self.assertEqual((2, 2), (position.pivot, position.slot))
+		self.assertEqual([chickenfoot.tile_index(0, 2), chickenfoot.tile_index(2, 4)], position.moves())
+
+		for tile in [(2, 4), (2, 3), (0, 2)]:
+			position = position.play(chickenfoot.tile_index(*tile))
+		self.assertEqual(chickenfoot.Game.State.OPEN, position.state)
+		self.assertEqual((4, 1, 4, 3, 0, 3), position.ends)
+
+	def test_from_game(self):
+		'EndgamePosition.from_game: describes a game in progress, including a chickenfoot'
+		p1 = chickenfoot.Player('p1')
+		p2 = chickenfoot.Player('p2')
+		p1.hand = [chickenfoot.Tile(0, 4)]
+		p2.hand = [chickenfoot.Tile(4, 1), chickenfoot.Tile(2, 3)]
+		game = chickenfoot.Game(9, 9, 7, [p1, p2])
+		game.root = chickenfoot.Root(chickenfoot.Tile(9, 9))
+		game.state = chickenfoot.Game.State.ROOT
+		for a, b in [(9, 1), (9, 4), (9, 2), (9, 3), (4, 4), (4, 5)]:
+			game._handle_play(chickenfoot.Tile(a, b), game.root.find_attach_position(chickenfoot.Tile(a, b)) if game.state == chickenfoot.Game.State.OPEN else (game.current_chickie or game.root))
+
+		position = chickenfoot.EndgamePosition.from_game(game, p2)
+		self.assertEqual(chickenfoot.Game.State.CHICKIE, position.state)
+		self.assertEqual(1, position.mover)
+		self.assertEqual((1, 2, 3), position.ends)
+		self.assertEqual((4, 1, (5,)), (position.pivot, position.slot, position.pending))
+		self.assertEqual((self._hand((0, 4)), self._hand((1, 4), (2, 3))), position.hands)
+
+	def test_zobrist(self):
+		'ZobristHasher: combines the hands and board hashes, and distinguishes the mover'
+		hasher = chickenfoot.ZobristHasher(3, 2)
+		position = chickenfoot.EndgamePosition(
+			chickenfoot.tile_catalogue(3), (self._hand((0, 1)), self._hand((1, 2))), 0,
+			chickenfoot.Game.State.OPEN, (1, 2, 3, 3))
+		self.assertEqual(hasher.hash(position), hasher.hands_hash(position) ^ hasher.board_hash(position))
+		self.assertNotEqual(hasher.hash(position), hasher.hash(position.pass_turn()))
+
+		# the same board reached by different plays hashes the same
+		played = position.play(chickenfoot.tile_index(0, 1))
+		self.assertEqual(
+			hasher.hands_hash(position) ^ hasher.hand_keys[0][chickenfoot.tile_index(0, 1)],
+			hasher.hands_hash(played))
+
+	def test_solver_matches_minimax(self):
+		'EndgameSolver.solve: agrees with plain minimax on random small endgames'
+		rng = random.Random(7)
+		catalogue = chickenfoot.tile_catalogue(3)
+		for trial in range(30):
+			tiles = list(range(len(catalogue)))
+			rng.shuffle(tiles)
+			hands = (sum(1 << i for i in tiles[:4]), sum(1 << i for i in tiles[4:8]))
+			ends = tuple(rng.randint(0, 3) for i in range(4))
+			position = chickenfoot.EndgamePosition(catalogue, hands, 0, chickenfoot.Game.State.OPEN, ends)
+			if position.is_terminal():
+				continue
+			solver = chickenfoot.EndgameSolver(chickenfoot.ZobristHasher(3, 2), 0)
+			value, move = solver.solve(position)
+			self.assertEqual(self._minimax(position, 0), value)
+			if move is not None:
+				self.assertEqual(value, self._minimax(position.play(move), 0))
+
+	def test_solver_node_limit(self):
+		'EndgameSolver.solve: raises SearchLimitExceeded past max_nodes'
+		catalogue = chickenfoot.tile_catalogue(3)
+		position = chickenfoot.EndgamePosition(
+			catalogue, (self._hand((0, 1), (1, 2), (2, 3)), self._hand((0, 2), (1, 3), (0, 3))), 0,
+			chickenfoot.Game.State.OPEN, (0, 1, 2, 3))
+		solver = chickenfoot.EndgameSolver(chickenfoot.ZobristHasher(3, 2), 0, max_nodes=3)
+		self.assertRaises(chickenfoot.SearchLimitExceeded, solver.solve, position)
+
+	def test_solver_player(self):
+		'SolverPlayer._pick_tile: plays by value with a boneyard, and the optimal tile once it is empty'
+		player = chickenfoot.SolverPlayer('p1')
+		other = chickenfoot.Player('p2')
+		game = chickenfoot.Game(3, 3, 7, [player, other])
+		game.root = chickenfoot.Root(chickenfoot.Tile(3, 3))
+		game.state = chickenfoot.Game.State.ROOT
+		for a in range(3):
+			game._handle_play(chickenfoot.Tile(a, 3), game.root)
+		player.hand = [chickenfoot.Tile(a, b) for a, b in [(1, 3), (0, 0), (1, 1), (2, 2)]]
+		other.hand = [chickenfoot.Tile(a, b) for a, b in [(0, 1), (0, 2), (1, 2)]]
+		opportunities = game._opportunities(player)
+
+		# with tiles left in the boneyard, this is MaxValuePlayer
+		self.assertEqual((1, 3), player._pick_tile(opportunities).ends)
+
+		# with an empty boneyard, the choice must be worth the minimax value
+		game.boneyard.tiles = []
+		choice = player._pick_tile(opportunities)
+		position = chickenfoot.EndgamePosition.from_game(game, player)
+		self.assertEqual(self._minimax(position, 0), self._minimax(position.play(choice.index), 0))
+
+	def test_solver_player_round(self):
+		'SolverPlayer: finishes rounds against other players, including deals it cannot see'
+		random.seed(3)
+		for players in [['SolverPlayer', 'MaxValuePlayer'], ['SolverPlayer', 'RandomPlayer', 'MaxValuePlayer']]:
+			players = [getattr(chickenfoot, name)('p%d' % num) for num, name in enumerate(players)]
+			for required_root in range(4):
+				game = chickenfoot.Game(required_root, 4, 3, players)
+				game.run()
+				self.assertEqual(set(players), set(game.scores))
+
+class EndgameTablebaseTest(unittest.TestCase):
+	'Test EndgameTablebase and TablebasePlayer'
+
+	@classmethod
+	def setUpClass(cls):
+		# building takes a while, and nothing changes the table
+		cls.directory = tempfile.mkdtemp()
+		cls.path = os.path.join(cls.directory, 'double-3.tb')
+		cls.count = chickenfoot.EndgameTablebase.build(cls.path, 3, max_hand=2)
+		cls.tablebase = chickenfoot.EndgameTablebase(cls.path)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.tablebase.close()
+		shutil.rmtree(cls.directory)
+
+	def tearDown(self):
+		chickenfoot.TablebasePlayer.tablebase = None
+
+	def _negamax(self, keys, position, memo):
+		'solve a reduced position by plain recursion'
+		if position not in memo:
+			children = keys.successors(position)
+			if not position[0] or not position[1] or not (children or keys.successors(keys.passed(position))):
+				memo[position] = keys.margin(position)
+			elif children:
+				memo[position] = max(-self._negamax(keys, child, memo) for child in children)
+			else:
+				memo[position] = -self._negamax(keys, keys.passed(position), memo)
+		return memo[position]
+
+	def test_build(self):
+		'EndgameTablebase.build: stores the negamax value of every position it enumerates'
+		self.assertEqual(self.count, len(self.tablebase))
+		self.assertEqual((3, 2), (self.tablebase.set_size, self.tablebase.max_hand))
+
+		keys = chickenfoot._TablebaseKeys(3)
+		memo = {}
+		checked = enumerated = 0
+		for total in range(5):
+			for position in keys.positions(total, 2):
+				enumerated += 1
+				value = self.tablebase.lookup(keys.key(*position))
+				if value is not None:
+					self.assertEqual(self._negamax(keys, position, memo), value)
+					checked += 1
+		self.assertEqual(self.count, checked)
+		# some positions play differently depending on where Game attaches a tile
+		self.assertLess(checked, enumerated)
+
+	def test_agrees_with_solver(self):
+		'EndgameTablebase.evaluate: agrees with EndgameSolver however the open ends are ordered'
+		keys = chickenfoot._TablebaseKeys(3)
+		catalogue = chickenfoot.tile_catalogue(3)
+		rng = random.Random(3)
+		checked = 0
+		for total in range(5):
+			for mover, other, state, pivot, pending, counts in keys.positions(total, 2):
+				# the solver is slow next to a lookup, so only try a sample
+				if rng.randrange(8):
+					continue
+				ends = [pip for pip, count in enumerate(counts) for i in range(count)]
+				rng.shuffle(ends)
+				if state == chickenfoot.Game.State.ROOT:
+					position = chickenfoot.EndgamePosition(catalogue, (mover, other), 0, state, tuple(ends), pivot)
+				elif state == chickenfoot.Game.State.OPEN:
+					position = chickenfoot.EndgamePosition(catalogue, (mover, other), 0, state, tuple(ends))
+				else:
+					position = chickenfoot.EndgamePosition(
+						catalogue, (mover, other), 0, state, tuple(ends[pending:]),
+						pivot, rng.randint(0, len(ends) - pending), tuple(ends[:pending]))
+				solver = chickenfoot.EndgameSolver(chickenfoot.ZobristHasher(3, 2), 0)
+				values = self.tablebase.evaluate(position)
+				if values is not None:
+					self.assertEqual(solver.evaluate(position), values)
+					checked += 1
+				# evaluate plays each tile where Game would, so it can do without the position itself
+				value = self.tablebase.value(position)
+				if value is not None:
+					self.assertEqual(solver.solve(position)[0], value)
+		self.assertTrue(checked)
+
+	def test_value(self):
+		'EndgameTablebase.value: looks up EndgamePositions, and returns None for ones it does not hold'
+		catalogue = chickenfoot.tile_catalogue(3)
+		hand = lambda a, b: 1 << chickenfoot.tile_index(a, b)
+		# three doubles are on the board, so there are 4 + 2 * 2 open ends; the mover goes out with (1, 2)
+		position = chickenfoot.EndgamePosition(
+			catalogue, (hand(1, 2), hand(3, 3)), 0, chickenfoot.Game.State.OPEN, (0, 1, 1, 2, 2, 3, 3, 3))
+		self.assertEqual(6, self.tablebase.value(position))
+		self.assertEqual({chickenfoot.tile_index(1, 2): 6}, self.tablebase.evaluate(position))
+
+		# hands larger than max_hand aren't in the table
+		position.hands = (hand(1, 2) | hand(0, 1) | hand(0, 2), hand(3, 3))
+		self.assertEqual(None, self.tablebase.value(position))
+		self.assertEqual(None, self.tablebase.evaluate(position))
+
+	def test_not_a_tablebase(self):
+		'EndgameTablebase: refuses to open other files'
+		path = os.path.join(self.directory, 'junk')
+		with open(path, 'wb') as f:
+			f.write(b'x' * 100)
+		self.assertRaises(ValueError, chickenfoot.EndgameTablebase, path)
+
+	def test_tablebase_player(self):
+		'TablebasePlayer._pick_tile: plays by value without a tablebase or outside it, and by the tablebase inside it'
+		class MockTablebase(object):
+			'returns canned values, or None when it knows nothing'
+			values = None
+			def evaluate(self, position):
+				return self.values
+
+		player = chickenfoot.TablebasePlayer('p1')
+		other = chickenfoot.Player('p2')
+		game = chickenfoot.Game(3, 3, 7, [player, other])
+		game.root = chickenfoot.Root(chickenfoot.Tile(3, 3))
+		game.state = chickenfoot.Game.State.ROOT
+		player.hand = [chickenfoot.Tile(1, 3), chickenfoot.Tile(0, 3)]
+		other.hand = [chickenfoot.Tile(0, 1)]
+		game.boneyard.tiles = []
+		self.assertEqual((1, 3), player._pick_tile(player.hand).ends)
+
+		chickenfoot.TablebasePlayer.tablebase = MockTablebase()
+		self.assertEqual((1, 3), player._pick_tile(player.hand).ends)
+
+		chickenfoot.TablebasePlayer.tablebase.values = {chickenfoot.tile_index(1, 3): -5, chickenfoot.tile_index(0, 3): 2}
+		self.assertEqual((0, 3), player._pick_tile(player.hand).ends)
+
+		# there's more to learn while the boneyard has tiles
+		game.boneyard.tiles = [chickenfoot.Tile(0, 0)]
+		self.assertEqual((1, 3), player._pick_tile(player.hand).ends)
+
+class RemotePlayerTest(unittest.TestCase):
+	'Test BotConnection, RemotePlayer, serve_bot, and ConcurrentGameRunner'
+
+	def _connect(self, bot):
+		'''
+		Return a BotConnection to a bot running on a thread in this process.
+
+		'bot' is called with a file to read requests from, and one to write answers to.
+		'''
+		to_bot_read, to_bot_write = os.pipe()
+		from_bot_read, from_bot_write = os.pipe()
+		thread = threading.Thread(target=bot, args=(os.fdopen(to_bot_read, 'r'), os.fdopen(from_bot_write, 'w', 1)))
+		thread.daemon = True
+		thread.start()
+		return chickenfoot.BotConnection(os.fdopen(from_bot_read, 'r'), os.fdopen(to_bot_write, 'w'))
+
+	def test_batching(self):
+		'BotConnection.decide: requests made while the bot is busy are sent together'
+		lines = []
+		release = threading.Event()
+		def bot(infile, outfile):
+			'hold the first batch until released, and answer each request with its id'
+			for line in iter(infile.readline, ''):
+				requests = json.loads(line)['requests']
+				lines.append(len(requests))
+				release.wait(5)
+				outfile.write(json.dumps({'decisions': [{'id': r['id'], 'play': r['id']} for r in requests]}) + '\n')
+
+		connection = self._connect(bot)
+		# count the requests actually queued for the writer; they're only waiting in decide before that
+		queued = []
+		put = connection._queue.put
+		def counting_put(request):
+			put(request)
+			queued.append(request)
+		connection._queue.put = counting_put
+		answers = {}
+		def ask(num):
+			answers[num] = connection.decide({'n': num}, timeout=5)
+		threads = [threading.Thread(target=ask, args=(num,)) for num in range(6)]
+		threads[0].start()
+		while not lines:
+			time.sleep(0.01)
+		for thread in threads[1:]:
+			thread.start()
+		while len(queued) < 6:
+			time.sleep(0.01)
+		release.set()
+		for thread in threads:
+			thread.join()
+
+		# one request in the first batch, the other five in the second
+		self.assertEqual([1, 5], lines)
+		self.assertEqual((2, 6), (connection.batches, connection.requests))
+		self.assertEqual(list(range(6)), sorted(answers.values()))
+
+	def test_timeout_and_hang_up(self):
+		'BotConnection.decide: returns None when the bot is too slow, or gone'
+		def bot(infile, outfile):
+			'answer nothing, then hang up'
+			infile.readline()
+			infile.readline()
+			outfile.close()
+
+		connection = self._connect(bot)
+		self.assertEqual(None, connection.decide({}, timeout=0.05))
+		self.assertEqual(None, connection.decide({}, timeout=5))
+		self.assertTrue(connection.closed)
+		self.assertEqual(None, connection.decide({}, timeout=5))
+
+	def test_remote_player(self):
+		'RemotePlayer._pick_tile: plays the bot\'s choice, and falls back on a random one when it is invalid'
+		class MockConnection(object):
+			def __init__(self, play):
+				self.play = play
+			def decide(self, request, timeout):
+				self.request = request
+				return self.play
+
+		opportunities = [chickenfoot.Tile(1, 2), chickenfoot.Tile(2, 3)]
+		player = chickenfoot.RemotePlayer('p1', MockConnection(1))
+		player.hand = list(opportunities)
+		self.assertEqual((2, 3), player._pick_tile(opportunities).ends)
+		self.assertEqual({'player': 'p1', 'hand': [(1, 2), (2, 3)], 'opportunities': [(1, 2), (2, 3)]}, player.connection.request)
+		self.assertEqual(0, player.fallbacks)
+
+		for play in [None, 2, -1, 'x']:
+			player.connection.play = play
+			self.assertTrue(player._pick_tile(opportunities) in opportunities)
+		self.assertEqual(4, player.fallbacks)
+
+	def test_serve_bot(self):
+		'serve_bot: answers each line of requests with the player\'s choices'
+		requests = [
+			{'requests': [{'id': 4, 'hand': [[1, 2], [5, 6]], 'opportunities': [[1, 2], [5, 6]]}]},
+			{'requests': [{'id': 5, 'hand': [[3, 3]], 'opportunities': [[3, 3]]}, {'id': 6, 'hand': [[0, 1], [9, 9]], 'opportunities': [[9, 9], [0, 1]]}]},
+		]
+		infile = io.StringIO(''.join(json.dumps(request) + '\n' for request in requests))
+		outfile = io.StringIO()
+		chickenfoot.serve_bot(chickenfoot.MaxValuePlayer('bot'), infile, outfile)
+		self.assertEqual(
+			[{'decisions': [{'id': 4, 'play': 1}]}, {'decisions': [{'id': 5, 'play': 0}, {'id': 6, 'play': 0}]}],
+			[json.loads(line) for line in outfile.getvalue().splitlines()])
+
+	def test_concurrent_runner(self):
+		'ConcurrentGameRunner.run: plays every round against a real bot process, totalling scores by seat'
+		command = '"%s" "%s" --as-bot MaxValuePlayer' % (sys.executable, chickenfoot.__file__.replace('.pyc', '.py'))
+		connection = chickenfoot.BotConnection.open(command)
+		try:
+			players = ['RandomPlayer', functools.partial(chickenfoot.RemotePlayer, connection=connection, timeout=10)]
+			runner = chickenfoot.ConcurrentGameRunner(20, players, 6, 5, [], 4)
+			runner.run()
+		finally:
+			connection.close()
+
+		self.assertEqual(['p0', 'p1'], sorted(player.name for player in runner.aggregate_scores))
+		self.assertTrue(sum(runner.aggregate_scores.values()) > 0)
+		self.assertTrue(connection.requests > 0)
+		self.assertTrue(connection.batches <= connection.requests)
+		self.assertEqual(0, runner.players[1].fallbacks)
+
+class VecGameTest(unittest.TestCase):
+	'Test VecGame and VecObservation'
+
+	def _first_legal(self, observation, i):
+		'return the lowest legal tile index in game i'
+		row = observation.legal[i * observation.num_tiles:(i + 1) * observation.num_tiles]
+		return list(row).index(1)
+
+	def test_reset(self):
+		'VecGame.reset: describes a pending decision in every game'
+		random.seed(0)
+		vec = chickenfoot.VecGame(3, ['Player', 'MaxValuePlayer'], 6, 5, policy_seats=[0])
+		observation = vec.reset()
+		self.assertEqual((3, 28, 7, 2), (observation.num_games, observation.num_tiles, observation.num_pips, observation.num_seats))
+		for i in range(3):
+			player, opportunities = vec._pending[i]
+			game = vec._games[i]
+			tiles = observation.num_tiles
+			self.assertEqual(0, observation.seat[i])
+			self.assertEqual(sorted(tile.index for tile in player.hand),
+				[j for j in range(tiles) if observation.hand[i * tiles + j]])
+			self.assertEqual(sorted(tile.index for tile in opportunities),
+				[j for j in range(tiles) if observation.legal[i * tiles + j]])
+			self.assertEqual(vec.STATES.index(game.state), observation.state[i])
+			self.assertEqual(len(game.boneyard.tiles), observation.boneyard[i])
+			self.assertTrue(sum(observation.ends[i * 7:(i + 1) * 7]) > 0)
+
+	def test_step(self):
+		'VecGame.step: plays the chosen tiles, rejects illegal ones, and starts new rounds as old ones finish'
+		random.seed(1)
+		vec = chickenfoot.VecGame(4, ['Player', 'Player'], 4, 4)
+		observation = vec.reset()
+
+		illegal = [j for j in range(observation.num_tiles) if not observation.legal[j]][0]
+		self.assertRaises(ValueError, vec.step, [illegal] + [self._first_legal(observation, i) for i in range(1, 4)])
+
+		finished = 0
+		for turn in range(200):
+			action = self._first_legal(observation, 0)
+			observation = vec.step([action] + [self._first_legal(observation, i) for i in range(1, 4)])
+			for i in range(4):
+				if observation.done[i]:
+					finished += 1
+					scores = observation.scores[i * 2:i * 2 + 2]
+					self.assertTrue(min(scores) >= 0)
+		self.assertTrue(finished > 0)
+		self.assertEqual(finished, sum(vec.rounds) - 4)
+
+	def test_policy_seats(self):
+		'VecGame: refuses to play without a seat for the policy, or with seats that are not there'
+		for policy_seats in [], [2], [0, -1]:
+			self.assertRaises(ValueError, chickenfoot.VecGame, 2, ['Player', 'Player'], 4, 4, policy_seats)
+		self.assertEqual(set([1]), chickenfoot.VecGame(2, ['RandomPlayer', 'Player'], 4, 4, [1]).policy_seats)
+
+class TrainingDataReporterTest(unittest.TestCase):
+	'Test NpyShardWriter and TrainingDataReporter'
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def _load(self, path):
+		'parse an .npy file as numpy would; return (header dict, data)'
+		with open(path, 'rb') as f:
+			data = f.read()
+		self.assertEqual(b'\x93NUMPY\x01\x00', data[:8])
+		header_len = struct.unpack('<H', data[8:10])[0]
+		self.assertEqual(0, (10 + header_len) % 64)
+		self.assertEqual(b'\n', data[10 + header_len - 1:10 + header_len])
+		return eval(data[10:10 + header_len]), data[10 + header_len:]
+
+	def test_shards(self):
+		'NpyShardWriter: grows shards, starts new ones at shard_rows, and writes valid headers'
+		writer = chickenfoot.NpyShardWriter(os.path.join(self.directory, 's%d.npy'),
+			[('a', 'H', 1), ('b', 'B', 3)], shard_rows=5, initial_rows=2)
+		for num in range(4):
+			block = b''.join(writer.record.pack(num * 10 + i, 1, 2, 3) for i in range(3))
+			writer.append(block, 3)
+		writer.close()
+		self.assertEqual(12, writer.total_rows)
+		self.assertEqual([os.path.join(self.directory, 's%d.npy' % num) for num in range(2)], writer.paths)
+		values = []
+		for path in writer.paths:
+			header, data = self._load(path)
+			self.assertEqual([('a', '<u2'), ('b', '|u1', (3,))], header['descr'])
+			self.assertEqual((6,), header['shape'])
+			self.assertEqual(6 * writer.record.size, len(data))
+			values += [writer.record.unpack_from(data, i * writer.record.size)[0] for i in range(6)]
+		self.assertEqual([0, 1, 2, 10, 11, 12, 20, 21, 22, 30, 31, 32], values)
+
+	def test_export(self):
+		'TrainingDataReporter: records every play, with the final score of its mover'
+		random.seed(2)
+		exporter = chickenfoot.TrainingDataReporter(self.directory)
+		plays = []
+		class PlayRecorder(chickenfoot.ReporterCollection):
+			def _dispatch(self, method_name, args, kwargs):
+				if method_name == 'play':
+					plays.append(args)
+		runner = chickenfoot.GameRunner(3, ['MaxValuePlayer', 'RandomPlayer', 'RandomPlayer'], 6, 5,
+			[lambda: exporter, lambda: PlayRecorder([])])
+		runner.run()
+		exporter.close()
+
+		header, data = self._load(exporter.writer.paths[0])
+		self.assertEqual(['hand', 'ends', 'state', 'boneyard', 'opponents', 'move', 'score'],
+			[field[0] for field in header['descr']])
+		size = exporter.writer.record.size
+		records = [exporter.writer.record.unpack_from(data, i * size) for i in range(len(data) // size)]
+		self.assertEqual(len(plays), len(records))
+		tiles = chickenfoot.tile_catalogue(6)
+		for record in records:
+			hand, ends, state, boneyard, opponents, move, score = (record[0], record[1:8], record[8],
+				record[9], record[10:12], record[12], record[13])
+			# the tile played was in the hand, and could be played on one of the ends
+			self.assertTrue(hand & (1 << move))
+			self.assertTrue(any(ends[pip] for pip in tiles[move]))
+			self.assertTrue(state < 3)
+			self.assertTrue(0 <= boneyard <= 28 - 15)
+			self.assertTrue(score >= 0)
+
+class ShardCoordinatorTest(unittest.TestCase):
+	'Test ShardRunner, run_worker, ShardCoordinator and ProcessGameRunner'
+	players = ['MaxValuePlayer', 'RandomPlayer', 'RandomPlayer']
+
+	def _expected(self, rounds, seed):
+		'scores by seat of the same rounds, played in one process'
+		runner = chickenfoot.GameRunner(rounds, self.players, 5, 4, [], seed=seed)
+		runner.run()
+		return runner, [runner.aggregate_scores[player] for player in runner.seating]
+
+	def test_shard_runner(self):
+		'ShardRunner.run: plays rounds exactly as a seeded GameRunner does, however they are split'
+		expected, scores = self._expected(20, 9)
+		results = []
+		for start, count in [(0, 7), (7, 1), (8, 12)]:
+			runner = chickenfoot.ShardRunner(start, count, self.players, 5, 4, 9)
+			runner.run()
+			results.append(runner.result())
+		self.assertEqual(scores, [sum(column) for column in zip(*[result['scores'] for result in results])])
+		stats = chickenfoot.RunningStats.from_sums(20, scores[0], sum(result['squares'][0] for result in results))
+		self.assertAlmostEqual(expected.stats[expected.seating[0]].mean, stats.mean)
+		self.assertAlmostEqual(expected.stats[expected.seating[0]].variance, stats.variance)
+
+	def test_process_game_runner(self):
+		'ProcessGameRunner.run: merges the scores workers write to shared memory, as a GameRunner would total them'
+		expected, scores = self._expected(45, 6)
+		runner = chickenfoot.ProcessGameRunner(45, self.players, 5, 4, 6, processes=2, block_rounds=4)
+		runner.run()
+		self.assertEqual(45, runner.rounds_done)
+		self.assertEqual(scores, [runner.aggregate_scores[player] for player in runner.seating])
+		for player, expected_player in zip(runner.seating, expected.seating):
+			self.assertEqual(45, sum(runner.score_counts[player].values()))
+			self.assertEqual(runner.aggregate_scores[player],
+				sum(score * count for score, count in runner.score_counts[player].items()))
+			self.assertAlmostEqual(expected.stats[expected_player].mean, runner.stats[player].mean)
+			self.assertAlmostEqual(expected.stats[expected_player].variance, runner.stats[player].variance)
+
+	def test_lost_shard(self):
+		'ShardCoordinator.run: reassigns the shard of a worker that disconnects, and totals by seat'
+		expected, scores = self._expected(30, 4)
+		coordinator = chickenfoot.ShardCoordinator(30, self.players, 5, 4, 4, shard_seconds=0.05, first_shard=6)
+
+		def quitter():
+			'take a shard, then hang up'
+			sock = socket.create_connection(coordinator.address)
+			sock.makefile('rb').readline()
+			sock.close()
+			# only now does the real worker start
+			worker.start()
+		worker = threading.Thread(target=chickenfoot.run_worker, args=(coordinator.address,))
+		threading.Thread(target=quitter).start()
+		coordinator.run()
+		worker.join()
+
+		self.assertEqual(30, coordinator.rounds_done)
+		self.assertEqual(1, coordinator.retries)
+		self.assertEqual(scores, [coordinator.aggregate_scores[player] for player in coordinator.players])
+		self.assertEqual(['p0', 'p1', 'p2'], [player.name for player in coordinator.players])
+
+	def test_local_workers(self):
+		'ShardCoordinator.run: merges the shards of several worker processes'
+		expected, scores = self._expected(40, 11)
+		coordinator = chickenfoot.ShardCoordinator(40, self.players, 5, 4, 11, shard_seconds=0.001, first_shard=3)
+		script = chickenfoot.__file__.replace('.pyc', '.py')
+		workers = [
+			subprocess.Popen([sys.executable, script, '--worker', '%s:%d' % coordinator.address])
+			for num in range(3)
+		]
+		coordinator.run()
+		for worker in workers:
+			self.assertEqual(0, worker.wait())
+		self.assertEqual(scores, [coordinator.aggregate_scores[player] for player in coordinator.players])
+		self.assertTrue(coordinator.shards >= 40 // 3)
+
+class BufferedLoggingReporterTest(unittest.TestCase):
+	'Test RingBuffer and BufferedLoggingReporter'
+
+	def test_ring_buffer(self):
+		'RingBuffer: takes items in order and in batches, and holds back put while full'
+		buffer = chickenfoot.RingBuffer(3)
+		for i in range(3):
+			buffer.put(i)
+		self.assertEqual([0, 1], buffer.take(2))
+		buffer.put(3)
+		buffer.put(4)
+
+		putter = threading.Thread(target=buffer.put, args=(5,))
+		putter.start()
+		time.sleep(0.05)
+		self.assertTrue(putter.is_alive())
+		self.assertEqual([2, 3, 4], buffer.take(10))
+		putter.join()
+		buffer.close()
+		self.assertEqual([5], buffer.take(10))
+		self.assertEqual([], buffer.take(10))
+
+	def test_same_output(self):
+		'BufferedLoggingReporter: writes what LoggingReporter logs, leaving out levels below its own'
+		class MockLogger(object):
+			def __init__(self):
+				self.lines = []
+
+			def log(self, level, message, *args):
+				self.lines.append((level, message % args))
+
+		logging_reporter = chickenfoot.LoggingReporter()
+		logging_reporter.logger = MockLogger()
+		streams = [io.StringIO(), io.StringIO()]
+		buffered = [chickenfoot.BufferedLoggingReporter(streams[0], batch_size=7, capacity=2),
+			chickenfoot.BufferedLoggingReporter(streams[1], level=chickenfoot.logging.INFO)]
+		reporters = [lambda: logging_reporter, lambda: buffered[0], lambda: buffered[1]]
+		chickenfoot.GameRunner(3, ['MaxValuePlayer', 'RandomPlayer'], 6, 5, reporters, seed=2).run()
+		for reporter in buffered:
+			reporter.close()
+
+		expected = [line for level, line in logging_reporter.logger.lines]
+		self.assertTrue(any(line.startswith('Player hands: ') for line in expected))
+		self.assertEqual(''.join(line + '\n' for line in expected), streams[0].getvalue())
+		info = [line for level, line in logging_reporter.logger.lines if level >= chickenfoot.logging.INFO]
+		self.assertTrue(len(info) < len(expected))
+		self.assertEqual(''.join(line + '\n' for line in info), streams[1].getvalue())
+
+class MetricsReporterTest(unittest.TestCase):
+	'Test Histogram and MetricsReporter'
+
+	def test_histogram(self):
+		'Histogram.exposition: counts observations cumulatively, by upper bound'
+		histogram = chickenfoot.Histogram((1, 5))
+		for value in (0, 1, 2, 5, 9):
+			histogram.observe(value)
+		self.assertEqual([
+			'# HELP h Things',
+			'# TYPE h histogram',
+			'h_bucket{le="1"} 2',
+			'h_bucket{le="5"} 4',
+			'h_bucket{le="+Inf"} 5',
+			'h_sum 17',
+			'h_count 5',
+		], histogram.exposition('h', 'Things'))
+
+	def test_metrics(self):
+		'MetricsReporter: counts the events of every round, and writes them out'
+		counts = collections.defaultdict(int)
+		class EventCounter(chickenfoot.ReporterCollection):
+			def _dispatch(self, method_name, args, kwargs):
+				counts[method_name] += 1
+				if method_name == 'round_over':
+					counts['stalemates'] += chickenfoot.stalemate(next(iter(args[0])).game)
+
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		path = os.path.join(directory, 'metrics.prom')
+		metrics = chickenfoot.MetricsReporter(path, interval=0)
+		runner = chickenfoot.GameRunner(20, ['MaxValuePlayer', 'RandomPlayer', 'RandomPlayer'], 6, 5,
+			[lambda: metrics, lambda: EventCounter([])], seed=5)
+		runner.run()
+
+		self.assertEqual(20, metrics.counters['rounds'])
+		self.assertEqual(counts['turn_start'], metrics.counters['turns'])
+		self.assertEqual(counts['play'], metrics.counters['plays'])
+		self.assertEqual(counts['root_not_found'], metrics.counters['root_passes'])
+		self.assertEqual(counts['stalemates'], metrics.counters['stalemates'])
+		self.assertTrue(0 < metrics.counters['draws'] <= counts['draw'])
+		self.assertTrue(0 < metrics.counters['chickenfoots'] < metrics.counters['plays'])
+		self.assertEqual(60, metrics.hand_size_at_end.count)
+		self.assertEqual(counts['turn_start'], metrics.turns_per_round.sum)
+
+		# written after every round, with an interval of 0
+		with open(path) as f:
+			lines = f.read().splitlines()
+		self.assertTrue('chickenfoot_rounds_total 20' in lines)
+		self.assertTrue('chickenfoot_turns_per_round_count 20' in lines)
+		self.assertEqual(['metrics.prom'], os.listdir(directory))
+
+class ProgressMonitorTest(unittest.TestCase):
+	'Test ProgressMonitor'
+
+	class MockRunner(object):
+		def __init__(self):
+			self.rounds = 1000
+			self.rounds_done = 100
+			self.aggregate_scores = {chickenfoot.Player('p0'): 50, chickenfoot.Player('p1'): 20}
+			self.worker_rounds = {'a': 60, 'b': 40}
+
+	def test_sample(self):
+		'ProgressMonitor.sample: works out rates, the ETA and the leader from the runner\'s counts'
+		runner = self.MockRunner()
+		now = [1000.0]
+		with MockContext(time, 'time', lambda: now[0]):
+			monitor = chickenfoot.ProgressMonitor(runner, smoothing=0.5)
+			now[0] += 2
+			runner.rounds_done = 300
+			runner.worker_rounds = {'a': 160, 'b': 140}
+			first = monitor.sample()
+			now[0] += 2
+			runner.rounds_done = 700
+			runner.worker_rounds = {'a': 400, 'b': 300}
+			second = monitor.sample()
+
+		self.assertEqual((100.0, 100.0), (first['rate'], first['smoothed_rate']))
+		self.assertEqual({'a': 50.0, 'b': 50.0}, first['workers'])
+		self.assertEqual((200.0, 150.0), (second['rate'], second['smoothed_rate']))
+		self.assertEqual({'a': 120.0, 'b': 80.0}, second['workers'])
+		self.assertEqual(2.0, second['eta'])
+		self.assertEqual(4.0, second['elapsed'])
+		self.assertEqual(('p1', 20), (second['leader'], second['leader_score']))
+
+	def test_report(self):
+		'ProgressMonitor.report: writes a line to the stream, or JSON to the status file'
+		stream = io.StringIO()
+		monitor = chickenfoot.ProgressMonitor(self.MockRunner(), stream=stream)
+		sample = {'rounds_done': 250, 'rounds': 1000, 'elapsed': 10.0, 'rate': 25.0, 'smoothed_rate': 0.25,
+			'eta': 3000.0, 'leader': 'p1', 'leader_score': 20, 'workers': {'a': 0.25}}
+		monitor.report(sample)
+		self.assertEqual(
+			'Progress: 250/1000 rounds (25.0%), 25.0 rounds/sec (smoothed 0.2), ETA 0:50:00, leading: p1 (20)\n'
+			'    a: 0.2 rounds/sec\n', stream.getvalue())
+
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		monitor.status_path = os.path.join(directory, 'status.json')
+		monitor.report(sample)
+		with open(monitor.status_path) as f:
+			self.assertEqual(sample, json.load(f))
+
+	def test_run(self):
+		'ProgressMonitor.start: reports periodically while a runner runs, and once more on stop'
+		stream = io.StringIO()
+		runner = chickenfoot.ConcurrentGameRunner(30, ['MaxValuePlayer', 'RandomPlayer'], 6, 5, [], 2, seed=1)
+		monitor = chickenfoot.ProgressMonitor(runner, interval=0.01, stream=stream)
+		monitor.start()
+		runner.run()
+		monitor.stop()
+		lines = stream.getvalue().splitlines()
+		self.assertTrue(lines[-3].startswith('Progress: 30/30 rounds (100.0%)'))
+		self.assertEqual(['    thread 0: ', '    thread 1: '], [line[:14] for line in lines[-2:]])
+
+class SweepTest(unittest.TestCase):
+	'Test sweep_points and Sweep'
+	spec = {
+		'set_size': [4, 6],
+		'starting_hand_size': [2, 4],
+		'players': [['MaxValuePlayer', 'RandomPlayer'], ['RandomPlayer', 'RandomPlayer', 'MaxValuePlayer']],
+		'rounds': 6,
+		'seed': 2,
+	}
+
+	def test_points(self):
+		'sweep_points: makes a point of every combination, and rejects impossible ones'
+		points = chickenfoot.sweep_points(self.spec)
+		self.assertEqual(8, len(points))
+		self.assertEqual(list(range(8)), [point['index'] for point in points])
+		self.assertEqual({'index': 7, 'set_size': 6, 'starting_hand_size': 4, 'players': self.spec['players'][1],
+			'rounds': 6, 'seed': 2}, points[7])
+		self.assertTrue(chickenfoot.expected_cost(points[7]) > chickenfoot.expected_cost(points[0]))
+
+		spec = dict(self.spec, starting_hand_size=[4, 6])
+		self.assertRaises(ValueError, chickenfoot.sweep_points, spec)
+		spec = dict(self.spec)
+		del spec['rounds']
+		self.assertRaises(ValueError, chickenfoot.sweep_points, spec)
+
+	def test_run(self):
+		'Sweep.run: gets the same results in worker processes as in this one'
+		tables = []
+		for processes in (1, 2):
+			sweep = chickenfoot.Sweep(self.spec, processes)
+			sweep.run()
+			table = io.StringIO()
+			sweep.write_table(table)
+			tables.append([row.split(',')[:-1] for row in table.getvalue().splitlines()])
+		self.assertEqual(tables[0], tables[1])
+		self.assertEqual(list(chickenfoot.Sweep.COLUMNS[:-1]), tables[0][0])
+		self.assertEqual(1 + 2 * 4 + 3 * 4, len(tables[0]))
+		self.assertEqual(['4', '2', '2', 'MaxValuePlayer+RandomPlayer', '0', 'MaxValuePlayer', '6'], tables[0][1][:7])
+
+class ResultsStoreTest(unittest.TestCase):
+	'Test ResultsWriter and ResultsStore'
+
+	def setUp(self):
+		self.directory = os.path.join(tempfile.mkdtemp(), 'results')
+		self.addCleanup(shutil.rmtree, os.path.dirname(self.directory))
+
+	def test_store(self):
+		'ResultsStore: holds the outcome of every round, for aggregating a chunk at a time'
+		rounds = []
+		class RoundRecorder(chickenfoot.ReporterCollection):
+			def _dispatch(self, method_name, args, kwargs):
+				if method_name == 'round_over':
+					game = next(iter(args[0])).game
+					scores = [args[0][player] for player in sorted(game.players, key=lambda player: player.name)]
+					rounds.append((game.round_number, game.required_root, game.turns, int(chickenfoot.stalemate(game)),
+						scores.index(min(scores))) + tuple(scores))
+
+		players = ['MaxValuePlayer', 'RandomPlayer', 'RandomPlayer']
+		runner = chickenfoot.GameRunner(25, players, 5, 4, [lambda: RoundRecorder([])], seed=3, results_path=self.directory)
+		runner.results.chunk_rows = 7
+		runner.run()
+		store = chickenfoot.ResultsStore(self.directory)
+		self.assertEqual(21, len(store))
+		runner.close()
+		self.assertEqual(25, len(store))
+
+		names = [name for name, typecode in store.meta['columns']]
+		self.assertEqual(['round', 'required_root', 'turns', 'stalemate', 'winner', 'score_0', 'score_1', 'score_2'], names)
+		columns = dict((name, [value for chunk in store.chunks(name, 4) for value in chunk]) for name in names)
+		self.assertEqual(rounds, list(zip(*[columns[name] for name in names])))
+		self.assertEqual([4] * 6 + [1], [len(chunk) for chunk in store.chunks('turns', 4)])
+
+		self.assertEqual(sum(row[2] for row in rounds), store.sum('turns'))
+		self.assertAlmostEqual(sum(row[5] for row in rounds) / 25.0, store.mean('score_0'))
+		self.assertEqual(collections.Counter(row[4] for row in rounds), store.counts('winner'))
+		by_root = collections.defaultdict(list)
+		for row in rounds:
+			by_root[row[1]].append(row[6])
+		expected = dict((root, float(sum(scores)) / len(scores)) for root, scores in by_root.items())
+		self.assertEqual(expected, store.group_means('score_1', 'required_root'))
+
+		self.assertRaises(ValueError, chickenfoot.ResultsWriter, self.directory, runner.players[:2])
+
+	def test_resume(self):
+		'GameRunner.resume: drops the results of rounds played after the checkpoint'
+		class Preempted(Exception):
+			pass
+		class Preempter(chickenfoot.ReporterCollection):
+			'interrupts the run in the eighth round'
+			def _dispatch(self, method_name, args, kwargs):
+				if method_name == 'round_over' and next(iter(args[0])).game.round_number == 7:
+					raise Preempted()
+
+		players = ['MaxValuePlayer', 'RandomPlayer']
+		checkpoint = self.directory + '.checkpoint'
+		interrupted = chickenfoot.GameRunner(12, players, 5, 4, [lambda: Preempter([])], seed=4,
+			checkpoint_path=checkpoint, checkpoint_interval=5, results_path=self.directory)
+		self.assertRaises(Preempted, interrupted.run)
+		interrupted.results.flush()
+		self.assertEqual(7, len(chickenfoot.ResultsStore(self.directory)))
+
+		resumed = chickenfoot.GameRunner(12, players, 5, 4, [], seed=4, checkpoint_path=checkpoint, results_path=self.directory)
+		resumed.resume()
+		resumed.run()
+		resumed.close()
+		store = chickenfoot.ResultsStore(self.directory)
+		self.assertEqual(list(range(12)), [value for chunk in store.chunks('round') for value in chunk])
+
+	def test_concurrent(self):
+		'ConcurrentGameRunner: records every round in the results, in whatever order they finish'
+		runner = chickenfoot.ConcurrentGameRunner(16, ['MaxValuePlayer', 'RandomPlayer'], 5, 4, [], 3, seed=2,
+			results_path=self.directory)
+		runner.run()
+		runner.close()
+		store = chickenfoot.ResultsStore(self.directory)
+		self.assertEqual(list(range(16)), sorted(value for chunk in store.chunks('round') for value in chunk))
+		self.assertEqual(sum(runner.aggregate_scores.values()), store.sum('score_0') + store.sum('score_1'))
+
+class BenchmarkTest(unittest.TestCase):
+	def test_benchmark_interpreters(self):
+		'benchmark_interpreters: reports the rounds/sec of a run under each interpreter'
+		results = chickenfoot.benchmark_interpreters([sys.executable, sys.executable], 20,
+			['RandomPlayer', 'MaxValuePlayer'], 6, 5, seed=4)
+		self.assertEqual([sys.executable, sys.executable], [interpreter for interpreter, name, rate in results])
+		for interpreter, name, rate in results:
+			self.assertEqual(chickenfoot.interpreter_name(), name)
+			self.assertTrue(rate > 0)
+
+class EngineComparisonTest(unittest.TestCase):
+	players = ['RandomPlayer', 'MaxValuePlayer', 'RandomPlayer']
+
+	def test_equivalent(self):
+		'check: finds no divergence between Game and an engine that plays the same way'
+		class SameGame(chickenfoot.Game):
+			pass
+		comparison = chickenfoot.EngineComparison(SameGame, self.players, 6, 5, seed=2)
+		self.assertEqual(None, comparison.check(10))
+		events = comparison.trace(SameGame, 3)
+		self.assertEqual('initial_hands', events[0][0])
+		self.assertEqual('round_over', events[-1][0])
+		self.assertEqual(2, len(comparison.timings(3)))
+
+	def test_divergence(self):
+		'check: reports the first event that differs, shrunk to the smallest hand and set'
+		class ReversedGame(chickenfoot.Game):
+			'offers opportunities in the reverse order, which changes random choices'
+			def _opportunities(self, player):
+				return list(reversed(super(ReversedGame, self)._opportunities(player)))
+		comparison = chickenfoot.EngineComparison(ReversedGame, self.players, 6, 5, seed=2)
+		found = comparison.check(10)
+		self.assertEqual(2, found['seed'])
+		self.assertTrue(found['starting_hand_size'] <= 5 and found['set_size'] <= 6)
+		self.assertNotEqual(found['reference'], found['candidate'])
+		self.assertEqual((found['event'], found['reference'], found['candidate']),
+			comparison.divergence(found['round'], found['set_size'], found['starting_hand_size']))
+
+class DecisionCorpusTest(unittest.TestCase):
+	def setUp(self):
+		self.corpus = chickenfoot.DecisionCorpus.capture(30, ['RandomPlayer', 'MaxValuePlayer', 'RandomPlayer'],
+			6, 5, seed=3, per_stratum=5)
+
+	def test_capture(self):
+		'capture: keeps up to per_stratum decisions of each state and hand size'
+		strata = collections.Counter((position['state'], len(position['hands'][position['mover']]))
+			for position in self.corpus.positions)
+		self.assertTrue(max(strata.values()) <= 5)
+		State = chickenfoot.Game.State
+		self.assertEqual(set([State.ROOT, State.OPEN, State.CHICKIE]), set(state for state, size in strata))
+		again = chickenfoot.DecisionCorpus.capture(30, ['RandomPlayer', 'MaxValuePlayer', 'RandomPlayer'],
+			6, 5, seed=3, per_stratum=5)
+		self.assertEqual(self.corpus.positions, again.positions)
+
+	def test_save_load(self):
+		'save/load: positions survive the round trip'
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		path = os.path.join(directory, 'corpus.jsonl.gz')
+		self.corpus.save(path)
+		self.assertEqual(self.corpus.positions, chickenfoot.DecisionCorpus.load(path).positions)
+
+	def test_game(self):
+		'game: the rebuilt position offers the mover the recorded opportunities'
+		for number, position in enumerate(self.corpus.positions):
+			game, mover, opportunities = self.corpus.game(number, chickenfoot.MaxValuePlayer)
+			self.assertTrue(isinstance(mover, chickenfoot.MaxValuePlayer))
+			self.assertEqual(position['state'], game.state)
+			self.assertEqual(opportunities, game._opportunities(mover))
+			self.assertEqual(position, chickenfoot.DecisionCorpus._describe(game, mover, opportunities))
+
+	def test_benchmark(self):
+		'benchmark: times every position, repeat times over'
+		result = self.corpus.benchmark(chickenfoot.MaxValuePlayer, repeat=2)
+		self.assertEqual(2 * len(self.corpus), result['decisions'])
+		self.assertTrue(result['p50'] <= result['p90'] <= result['p99'] <= result['max'])
+
+class SimulationServiceTest(unittest.TestCase):
+	'Test validate_job, SimulationService and SimulationServer'
+
+	def setUp(self):
+		self.service = chickenfoot.SimulationService(2, block_rounds=4)
+		self.server = chickenfoot.SimulationServer(('127.0.0.1', 0), self.service)
+		thread = threading.Thread(target=self.server.serve_forever)
+		thread.start()
+		def shut_down():
+			self.server.shutdown()
+			thread.join()
+			self.server.server_close()
+			self.service.close()
+		self.addCleanup(shut_down)
+
+	def _request(self, method, path, body=None):
+		'return the status and body lines of a request to the server'
+		connection = http.client.HTTPConnection(*self.server.server_address[:2])
+		connection.request(method, path, body if body is None else json.dumps(body))
+		response = connection.getresponse()
+		lines = [json.loads(line) for line in response.read().splitlines()]
+		connection.close()
+		return response.status, lines
+
+	def test_validate_job(self):
+		'validate_job: fills in defaults, and rejects unknown players and impossible games'
+		job, rounds = chickenfoot.validate_job({'players': ['RandomPlayer', 'MaxValuePlayer'], 'rounds': '3'})
+		self.assertEqual(({'players': ['RandomPlayer', 'MaxValuePlayer'], 'set_size': 9, 'starting_hand_size': 7, 'seed': 0}, 3),
+			(job, rounds))
+		for request in [{'players': ['Game'], 'rounds': 1}, {'players': ['Player'], 'rounds': 1},
+				{'players': ['RandomPlayer'], 'rounds': 10 ** 9}, {'players': ['RandomPlayer']}, {'players': [], 'rounds': 1},
+				{'players': ['RandomPlayer'] * 3, 'rounds': 1, 'set_size': 3}]:
+			self.assertRaises(ValueError, chickenfoot.validate_job, request)
+
+	def test_simulate(self):
+		'SimulationServer: streams results after every block, agreeing with a seeded GameRunner'
+		request = {'players': ['MaxValuePlayer', 'RandomPlayer'], 'set_size': 5, 'starting_hand_size': 4, 'seed': 6, 'rounds': 10}
+		status, lines = self._request('POST', '/simulate', request)
+		self.assertEqual(200, status)
+		self.assertEqual([4, 8, 10], [line['rounds_done'] for line in lines])
+		self.assertEqual([False, False, True], [line['done'] for line in lines])
+
+		runner = chickenfoot.GameRunner(10, request['players'], 5, 4, [], seed=6)
+		runner.run()
+		for seat, player in zip(lines[-1]['seats'], runner.seating):
+			self.assertEqual(runner.aggregate_scores[player], seat['total'])
+			self.assertAlmostEqual(runner.stats[player].mean, seat['mean'])
+			self.assertAlmostEqual(runner.stats[player].stddev, seat['stddev'])
+
+		# the first blocks of a longer run are the ones already played
+		status, longer = self._request('POST', '/simulate', dict(request, rounds=12))
+		self.assertEqual([line['seats'] for line in lines[:2]], [line['seats'] for line in longer[:2]])
+		self.assertEqual((200, [{'hits': 2, 'misses': 4}]), self._request('GET', '/stats'))
+
+	def test_coalesce(self):
+		'SimulationServer: plays each block once for simultaneous requests'
+		request = {'players': ['RandomPlayer', 'RandomPlayer', 'MaxValuePlayer'], 'set_size': 6, 'starting_hand_size': 5,
+			'rounds': 20}
+		results = []
+		threads = [threading.Thread(target=lambda: results.append(self._request('POST', '/simulate', request)))
+			for num in range(4)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(4, len(results))
+		self.assertTrue(all(result == results[0] for result in results))
+		self.assertEqual((200, [{'hits': 15, 'misses': 5}]), self._request('GET', '/stats'))
+
+	def test_errors(self):
+		'SimulationServer: answers bad requests with a 400, and unknown paths with a 404'
+		status, lines = self._request('POST', '/simulate', {'players': ['NotAPlayer'], 'rounds': 5})
+		self.assertEqual((400, [{'error': 'Invalid player class: NotAPlayer'}]), (status, lines))
+		self.assertEqual(404, self._request('GET', '/nowhere')[0])
+
+	def test_failed_block(self):
+		'SimulationService: forgets blocks that fail, and the server reports the failure'
+		# Player can't choose, so its rounds fail in the worker
+		job = {'players': ['Player', 'Player'], 'set_size': 5, 'starting_hand_size': 4, 'seed': 0}
+		for attempt in range(2):
+			self.assertRaises(NotImplementedError, list, self.service.simulate(job, 4))
+		self.assertEqual((0, 2), (self.service.hits, self.service.misses))
+
+		def failing(job, rounds):
+			'fail after the first block'
+			yield {'rounds_done': 4, 'rounds': 8, 'seats': [], 'done': False}
+			raise RuntimeError('lost')
+		request = {'players': ['RandomPlayer', 'RandomPlayer'], 'rounds': 8}
+		self.service.simulate = failing
+		status, lines = self._request('POST', '/simulate', request)
+		self.assertEqual(200, status)
+		self.assertEqual({'error': 'Simulation failed: lost', 'done': True}, lines[-1])
+		def failing_at_once(job, rounds):
+			'fail before the first block'
+			raise RuntimeError('lost')
+			yield
+		self.service.simulate = failing_at_once
+		self.assertEqual((500, [{'error': 'Simulation failed: lost'}]), self._request('POST', '/simulate', request))